@@ -2,26 +2,107 @@
 
 import sys
 import os
+import json
 import time
+import argparse
 import platform
 import psutil
-import GPUtil
-import socket
+from collections import deque
 from PySide6.QtWidgets import (
-    QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QSizePolicy, QPushButton, QGraphicsOpacityEffect
+    QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QSizePolicy, QPushButton, QGraphicsOpacityEffect, QMenu,
+    QLineEdit
 )
 from PySide6.QtCore import Qt, QTimer, QPoint, QThread, Signal
-from PySide6.QtGui import QFont, QPixmap, QColor, QFontDatabase, QPainter, QBrush, QPolygon, QFontMetrics
+from PySide6.QtGui import QFont, QPixmap, QColor, QFontDatabase, QPainter, QBrush, QPolygon, QFontMetrics, QShortcut, QKeySequence
+
+from prts_diag import DIAG, StallMeter, DiagnosticsOverlay
+from prts_probes import REGISTRY, Probe, COST_IO, TARGETS, DEFAULT_TARGETS, query_gpus
+from prts_workers import TIMEOUT_ERRORS
+from prts_breakers import CircuitOpen
+from prts_bus import SnapshotBus
+from prts_heatmap import CpuHeatmap
+from prts_proctable import ProcessTable
+from prts_fleet import FleetClient
+from prts_fleetview import FleetPanel
+from prts_alerts import AlertEngine, AlertEvent, DEFAULT_RULES, load_rules
+from prts_anomaly import AnomalyDetector
+from prts_ports import ListenerHistory, PortScanner, PortScan
+from prts_services import SERVICES
+from prts_portview import PortListView, PortEntry, format_age
+from prts_config import CONFIG_FILE, ConfigError, ConfigWatcher, load_config, validate
+from prts_leaks import LEAKS, FIELDS as LEAK_FIELDS
 
 # 常量配置
 NOVECENTO_FONT = "Novecento Wide"  # 已安装字体名
 BENDER_FONT = "Bender"             # 已安装字体名
 CHINESE_FONT = "FZQuenyaSongS-R-GB"  # 方正准雅宋字体名（需已安装）
 
+# 异常检测分组及各组标准差下限（避免长期恒定的序列出现微小波动就被判为异常）
+ANOMALY_GROUPS = {"metrics": 0.5, "cpu_cores": 2.0, "net": 1.0, "diskio": 0.1}
+ANOMALY = "anomaly"
+
 IMG_DIR = r"C:\Users\24177\Desktop\PROJECT PRTS"
 NET_ON = os.path.join(IMG_DIR, "NET-ON.png")
 NET_OFF = os.path.join(IMG_DIR, "NET-OFF.png")
 SPLASH_IMG = os.path.join(IMG_DIR, "62c55f42d02be5ae409df87cde30f1d.jpg")
+
+# 界面进程的数据源：内置采集项 + 端口栏的端口扫描（agent 不采集端口栏数据）
+APP_REGISTRY = REGISTRY.copy()
+APP_REGISTRY.register(Probe("ports", PortScanner(), cadence=1500, cost=COST_IO, value_type=PortScan, slot="ports"))
+# 本进程的资源用量（泄漏监测），要遍历Qt对象，在界面线程执行
+APP_REGISTRY.register(Probe("leaks", LEAKS, cadence=10000, value_type=dict, slot="leaks"))
+DIAG.add_section("leaks", LEAKS.stats)
+
+# 浸泡测试：倍速与预热后允许的增长（预热后最初1/4与最后1/4样本中位数之差）
+SOAK_SPEED = 100
+SOAK_LIMITS = {"rss_mb": 16.0, "fds": 4, "threads": 4, "qt_objects": 0, "windows": 0, "py_objects": 2000}
+
+def set_img_dir(path):
+    """切换图片目录（配置文件 [ui] img_dir）"""
+    global IMG_DIR, NET_ON, NET_OFF, SPLASH_IMG
+    IMG_DIR = path
+    NET_ON = os.path.join(IMG_DIR, "NET-ON.png")
+    NET_OFF = os.path.join(IMG_DIR, "NET-OFF.png")
+    SPLASH_IMG = os.path.join(IMG_DIR, "62c55f42d02be5ae409df87cde30f1d.jpg")
+
+def apply_probe_config(config, registry=APP_REGISTRY):
+    """按配置设置探测目标与各采集项的启用/周期，返回设置有变化的采集项名称"""
+    # 采集线程随时在读 TARGETS：先合并出完整的新表，再只删多余的键、一次 update 换入，
+    # 不出现 clear() 之后键暂时缺失或只恢复了默认值的中间状态
+    targets = {**DEFAULT_TARGETS, **config["targets"]}
+    for key in TARGETS.keys() - targets.keys():
+        del TARGETS[key]
+    TARGETS.update(targets)
+    changed = []
+    for probe in registry:
+        options = config["probes"].get(probe.name, {})
+        enabled = options.get("enabled", True)
+        cadence = options.get("cadence", probe.base_cadence)
+        if enabled != probe.enabled or cadence != probe.cadence:
+            probe.enabled, probe.cadence = enabled, cadence
+            changed.append(probe.name)
+    SERVICES.set_overrides(config["services"])
+    return changed
+
+def apply_startup_config(config):
+    """创建窗口前应用配置：字体只在此时生效（修改后需重启），其余项之后可热重载"""
+    global NOVECENTO_FONT, BENDER_FONT, CHINESE_FONT
+    fonts = config["fonts"]
+    NOVECENTO_FONT = fonts["novecento"] or NOVECENTO_FONT
+    BENDER_FONT = fonts["bender"] or BENDER_FONT
+    CHINESE_FONT = fonts["chinese"] or CHINESE_FONT
+    if config["ui"]["img_dir"]:
+        set_img_dir(config["ui"]["img_dir"])
+    apply_probe_config(config)
+
+def load_startup_config(path):
+    """读取配置文件；有错误时提示并使用默认配置"""
+    try:
+        return load_config(path, {probe.name for probe in APP_REGISTRY})
+    except (ConfigError, OSError) as e:
+        print(f"配置文件无效，使用默认配置: {e}", file=sys.stderr)
+        return validate({})
+
 class SplashScreen(QWidget):
     def __init__(self, pixmap_path, duration=1800, fade_duration=800, parent=None):
         super().__init__(parent)
@@ -72,59 +153,64 @@ class SplashScreen(QWidget):
         self._on_finish = callback
 
 class PortMonitorBar(QWidget):
-    """独立的端口监听横栏 - 新层"""
-    def __init__(self, parent=None):
+    """独立的端口监听横栏 - 新层；端口数据订阅自采集总线的 ports 字段"""
+    def __init__(self, bus, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setFixedSize(200, 300)  # 纵向布局，适合显示5个栏目
+        self.setFixedSize(300, 360)  # 纵向列表，可滚动查看全部端口
         
         # 端口监听相关
         self._active_ports = []
-        self._current_display_index = 0
-        self._scan_interval = 1500  # 每1.5秒扫描一次端口（更快）
-        self._display_columns = 5  # 显示5个栏目
+        # 收到第一次扫描结果前为 None，告警规则据此跳过端口检查
+        self.listening_ports = None
+        self.udp_ports = set()
+        # (端口, 协议) -> (pid, 进程名)，随每次扫描结果替换
+        self.owners = {}
+        # 监听开始/结束记录与监听数量序列（已结束的监听只保留最近500条）
+        self.history = ListenerHistory()
+        self._shown = None
         
         self.init_ui()
         self.position_window()
         
-        # 定时器用于端口扫描
-        self._scan_timer = QTimer(self)
-        self._scan_timer.timeout.connect(self._scan_ports)
-        self._scan_timer.start(self._scan_interval)
-        
-        # 定时器用于滚动显示端口信息（更快的流动速度）
-        self._scroll_timer = QTimer(self)
-        self._scroll_timer.timeout.connect(self._scroll_ports)
-        self._scroll_timer.start(2000)  # 每2秒切换一次显示（更快）
-        
-        # 立即执行一次扫描
-        self._scan_ports()
+        # 扫描由采集总线按 ports 采集项的周期（默认1.5秒）在后台执行，订阅时回放最近一次结果
+        self.bus = bus
+        self.bus.subscribe(["ports"], self._on_results)
         
     def init_ui(self):
         """初始化界面"""
         layout = QVBoxLayout(self)  # 改为纵向布局
         layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(8)
+        layout.setSpacing(6)
         
-        # 创建5个端口显示标签
-        self.port_labels = []
-        for i in range(self._display_columns):
-            label = QLabel(f"端口{i+1}: 扫描中...")
-            label.setFont(QFont(BENDER_FONT, 11, QFont.Bold))
-            label.setStyleSheet(f"""
-                color: #FFFFFF;
-                background: rgba(35, 39, 46, 0.9);
-                border: none;
-                border-radius: 4px;
-                padding: 8px 12px;
-                font-family: '{BENDER_FONT}', '{CHINESE_FONT}', Arial, sans-serif;
-                min-width: 160px;
-            """)
-            label.setAlignment(Qt.AlignCenter)
-            label.setFixedHeight(45)
-            self.port_labels.append(label)
-            layout.addWidget(label)
+        panel_style = f"""
+            color: #FFFFFF;
+            background: rgba(35, 39, 46, 0.9);
+            border: none;
+            border-radius: 4px;
+            font-family: '{BENDER_FONT}', '{CHINESE_FONT}', Arial, sans-serif;
+        """
+        # 标题：监听数量（点击手动刷新）
+        self.title_label = QLabel("端口: 扫描中...")
+        self.title_label.setFont(QFont(BENDER_FONT, 11, QFont.Bold))
+        self.title_label.setStyleSheet(panel_style + "padding: 6px 10px; color: #FFB400;")
+        layout.addWidget(self.title_label)
+        
+        # 过滤：匹配端口号、协议、服务名、进程名
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("过滤 端口/进程/协议")
+        self.filter_edit.setStyleSheet(panel_style + "padding: 4px 8px;")
+        self.filter_edit.textChanged.connect(self._on_filter_changed)
+        layout.addWidget(self.filter_edit)
+        
+        # 端口列表：只绘制可见行，点击表头排序
+        self.port_view = PortListView()
+        self.port_view.setFont(QFont(BENDER_FONT, 10))
+        self.port_view.setStyleSheet(
+            "QTableView { color: #FFFFFF; background: rgba(35, 39, 46, 0.9); border: none; border-radius: 4px; }"
+            "QHeaderView::section { background: rgba(35, 39, 46, 0.9); color: #FFB400; border: none; }")
+        layout.addWidget(self.port_view)
         
         # 设置整体样式
         self.setStyleSheet("""
@@ -140,194 +226,101 @@ class PortMonitorBar(QWidget):
         y = 20  # 距离顶部20px
         self.move(x, y)
         
-    def _scan_ports(self):
-        """扫描活跃端口 - 优化版本"""
-        try:
-            listening_ports = set()
-            
-            # 方法1: 使用psutil获取网络连接（主要方法）
-            try:
-                connections = psutil.net_connections(kind='inet')
-                for conn in connections:
-                    if conn.status == 'LISTEN' and conn.laddr:
-                        port = conn.laddr.port
-                        if 1 <= port <= 65535:
-                            listening_ports.add(port)
-                print(f"psutil检测到 {len(listening_ports)} 个监听端口")
-            except Exception as e:
-                print(f"psutil方法失败: {e}")
-            
-            # 方法2: 使用netstat命令（补充方法）
-            try:
-                import subprocess
-                import re
-                
-                if platform.system().lower() == "windows":
-                    result = subprocess.run(['netstat', '-an'], capture_output=True, text=True, timeout=2)
-                else:
-                    result = subprocess.run(['netstat', '-tuln'], capture_output=True, text=True, timeout=2)
-                
-                if result.returncode == 0:
-                    lines = result.stdout.split('\n')
-                    netstat_ports = set()
-                    for line in lines:
-                        if 'LISTENING' in line or 'LISTEN' in line:
-                            # 匹配端口号
-                            match = re.search(r':(\d+)\s', line)
-                            if match:
-                                port = int(match.group(1))
-                                if 1 <= port <= 65535:
-                                    netstat_ports.add(port)
-                    
-                    # 合并结果
-                    listening_ports.update(netstat_ports)
-                    print(f"netstat补充检测到 {len(netstat_ports)} 个端口")
-            except Exception as e:
-                print(f"netstat方法失败: {e}")
-            
-            # 方法3: 主动扫描常用端口（验证方法）
-            try:
-                import socket
-                # 扩展的常用端口列表
-                common_ports = [
-                    21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389,
-                    5432, 3306, 6379, 27017, 8080, 8443, 3000, 5000, 8000, 9000,
-                    1433, 1521, 5984, 9200, 9300, 11211, 2181, 9092, 5672, 15672
-                ]
-                
-                active_ports = set()
-                for port in common_ports:
-                    if self._is_port_listening(port):
-                        active_ports.add(port)
-                
-                # 合并结果
-                listening_ports.update(active_ports)
-                print(f"socket验证检测到 {len(active_ports)} 个活跃端口")
-            except Exception as e:
-                print(f"socket扫描失败: {e}")
-            
-            # 转换为列表并排序
-            self._active_ports = sorted(list(listening_ports))
-            
-            # 限制显示数量，优先显示常用端口
-            if len(self._active_ports) > 30:
-                # 优先保留常用端口
-                priority_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389, 5432, 3306, 6379, 27017, 8080, 8443]
-                priority_found = [p for p in self._active_ports if p in priority_ports]
-                other_ports = [p for p in self._active_ports if p not in priority_ports]
-                self._active_ports = priority_found + other_ports[:30-len(priority_found)]
-            
-            self._update_display()
-                
-        except Exception as e:
-            print(f"端口扫描总错误: {e}")
-            # 显示错误信息
-            for i, label in enumerate(self.port_labels):
-                label.setText(f"端口 {i+1}\n扫描错误")
-    
-    def _is_port_listening(self, port):
-        """检测端口是否真正在监听 - 优化版本"""
-        try:
-            import socket
-            
-            # 尝试多种地址
-            addresses = ['127.0.0.1', 'localhost', '0.0.0.0']
-            
-            for addr in addresses:
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(0.03)  # 更短的超时时间
-                    result = sock.connect_ex((addr, port))
-                    sock.close()
-                    if result == 0:
-                        return True
-                except:
-                    continue
-            
-            return False
-        except:
-            return False
+    def _on_results(self, results):
+        """收到端口扫描结果：更新监听记录与列表"""
+        ok, scan = results["ports"]
+        if not ok:
+            # 显示错误信息（失败次数已记入诊断的 ports 项）
+            self.title_label.setText("端口: 扫描错误")
+            self.title_label.setToolTip(str(scan))
+            return
+        # 完整的TCP监听集合另存一份，供告警规则使用；列表不设数量上限
+        self.listening_ports = scan.tcp
+        self.udp_ports = scan.udp
+        self._active_ports = scan.active
+        self.owners = scan.owners
+        self.history.update(self._active_ports, self.owners)
+        self._update_display()
+        self.port_view.port_model.set_counts(scan.counts)
     
     def _update_display(self):
-        """更新显示内容"""
-        if not self._active_ports:
-            for i, label in enumerate(self.port_labels):
-                label.setText(f"端口 {i+1}\n无活跃")
-        else:
-            # 显示当前索引开始的5个端口
-            for i, label in enumerate(self.port_labels):
-                port_index = (self._current_display_index + i) % len(self._active_ports)
-                if port_index < len(self._active_ports):
-                    current_port = self._active_ports[port_index]
-                    port_info = self._get_port_info(current_port)
-                    display_text = f"端口 {current_port}\n{port_info}"
-                    
-                    # 如果信息太长，截断显示
-                    if len(port_info) > 12:
-                        port_info = port_info[:9] + "..."
-                        display_text = f"端口 {current_port}\n{port_info}"
-                    
-                    label.setText(display_text)
-                else:
-                    label.setText(f"端口 {i+1}\n无")
-            
-    def _get_port_info(self, port):
-        """获取端口信息 - 扩展版本"""
-        common_ports = {
-            # 基础服务
-            21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP", 53: "DNS",
-            # Web服务
-            80: "HTTP", 443: "HTTPS", 8080: "HTTP-Alt", 8443: "HTTPS-Alt",
-            # 邮件服务
-            110: "POP3", 143: "IMAP", 993: "IMAPS", 995: "POP3S",
-            # 数据库
-            3306: "MySQL", 5432: "PostgreSQL", 27017: "MongoDB", 6379: "Redis",
-            1433: "SQL Server", 1521: "Oracle", 5984: "CouchDB",
-            # 搜索引擎
-            9200: "Elasticsearch", 9300: "Elasticsearch",
-            # 缓存
-            11211: "Memcached",
-            # 消息队列
-            2181: "Zookeeper", 9092: "Kafka", 5672: "RabbitMQ", 15672: "RabbitMQ-Web",
-            # 远程服务
-            3389: "RDP", 5900: "VNC", 22: "SSH",
-            # 开发服务
-            3000: "Node.js", 5000: "Flask", 8000: "Django", 9000: "SonarQube"
-        }
-        return common_ports.get(port, "未知")
-            
-    def _scroll_ports(self):
-        """滚动显示端口信息"""
-        if len(self._active_ports) > self._display_columns:
-            self._current_display_index = (self._current_display_index + 1) % len(self._active_ports)
-            self._update_display()
+        """更新显示内容：监听开始/结束、重启或进程归属变化时才重建列表"""
+        history = self.history
+        key = (history.generation, self.owners)
+        if self._shown is not None and self._shown[0] == key[0] and self._shown[1] is key[1]:
+            return
+        self._shown = key
+        entries = []
+        for port, proto in self._active_ports:
+            owner = self.owners.get((port, proto))
+            pid, name = owner if owner is not None else (None, "")
+            record = history.active.get((port, proto))
+            restarts, since = (record.restarts, record.since) if record is not None else (0, time.time())
+            entries.append(PortEntry(port, proto, self._get_port_info(port, proto), name, pid,
+                                     restarts, since, (port, proto) in history.flapping))
+        self.port_view.port_model.set_entries(entries)
+        tcp, udp = len(self.listening_ports or ()), len(self.udp_ports)
+        text = f"端口: TCP {tcp}  UDP {udp}" if tcp or udp else "端口: 无活跃"
+        if history.flapping:
+            text += f"  频繁重启 {len(history.flapping)}"
+        self.title_label.setText(text)
+        self.title_label.setToolTip(self._history_tooltip())
+
+    def _history_tooltip(self):
+        """监听数量变化范围与最近结束的监听"""
+        history = self.history
+        now = time.time()
+        lines = []
+        if history.counts:
+            counts = [n for _, n in history.counts]
+            span = now - history.counts[0][0]
+            lines.append(f"最近 {format_age(span)} 监听数 {min(counts)} ~ {max(counts)}")
+        for record in history.recent_ended(8):
+            port, proto = record.key
+            lines.append(f"{port}/{proto} {record.name or '-'} 已停止 {format_age(now - record.ended)}"
+                         f"（存活 {format_age(record.lifetime(now))}，重启 {record.restarts} 次）")
+        return "\n".join(lines)
             
+    def _get_port_info(self, port, proto="tcp"):
+        """获取端口信息：服务名注册表（内置表 + 系统 services 文件）"""
+        return SERVICES.lookup(port, proto) or ""
+
+    def _on_filter_changed(self, text):
+        self.port_view.port_model.set_filter(text)
+
     def mousePressEvent(self, event):
-        """鼠标按下事件 - 手动刷新端口扫描"""
+        """鼠标按下事件 - 请求刷新端口扫描（与其他刷新请求合并，后台执行）"""
         if event.button() == Qt.LeftButton:
-            self._scan_ports()
+            self.bus.request_refresh(["ports"])
         super().mousePressEvent(event)
         
     def mouseDoubleClickEvent(self, event):
-        """双击事件 - 重置显示索引"""
-        self._current_display_index = 0
-        self._update_display()
+        """双击事件 - 回到列表顶部"""
+        self.port_view.scrollToTop()
         super().mouseDoubleClickEvent(event)
     
+    def apply_config(self, config):
+        """热重载：服务名覆盖可能变化，重建列表（扫描周期即 ports 采集项的周期）"""
+        self._shown = None
+        self._update_display()
+
     def close_monitor(self):
-        """关闭端口监听栏"""
-        self._scan_timer.stop()
-        self._scroll_timer.stop()
+        """关闭端口监听栏；不再订阅后端口扫描随之停止"""
+        self.bus.unsubscribe(self._on_results)
         self.close()
 
 class ArknightsMonitor(QWidget):
-    def __init__(self):
+    def __init__(self, bus=None):
         super().__init__()
         # 拖拽相关
         self._drag_active = False
         self._drag_pos = None
         # 端口监听栏引用
         self.port_monitor = None
+        # 诊断浮层（按需创建）
+        self.diag_overlay = None
+        # 多主机面板（--fleet 时创建）
+        self.fleet_panel = None
         # 字体动态加载（如有本地ttf/otf）
         # QFontDatabase.addApplicationFont("C:/path/to/Bender.ttf")
         # QFontDatabase.addApplicationFont("C:/path/to/NovecentoWide.ttf")
@@ -369,20 +362,47 @@ class ArknightsMonitor(QWidget):
                 color: #23272E;
             }}
         """)
-        self.last_net = psutil.net_io_counters()
-        self.last_time = time.time()
+        # 采集总线（应用共享；未传入时自建）：卡片由注册表生成，采集按开销等级分派线程
+        self._owns_bus = bus is None
+        self.bus = SnapshotBus(APP_REGISTRY, parent=self) if bus is None else bus
+        self.registry = self.bus.registry
+        self.scheduler = self.bus.scheduler
+        self._values = {}
+        # 各卡片最近一次成功的值与时间：采集超时时显示该值并标注 stale 及其时长
+        self._last_good = {}
+        # 告警规则：每次刷新后按最新数值增量评估，触发时闪烁对应卡片
+        self.alerts = AlertEngine(DEFAULT_RULES)
+        self.alert_events = deque(maxlen=200)
+        self._new_alert_events = []
+        self._flashing = set()
+        self._flash_on = False
+        # 异常检测：各指标的在线基线，只送入本次刷新中新产生的样本
+        self.anomalies = AnomalyDetector()
+        for group, min_std in ANOMALY_GROUPS.items():
+            self.anomalies.bank(group, min_std=min_std)
+        self._anomaly_fed = {}
+        self._alert_fed = {}
+        self._core_names = []
         self.init_ui()
         psutil.cpu_percent(interval=0.1)  # 预热
+        # 订阅主界面显示的全部采集项（端口扫描由端口栏订阅）；每次整周期刷新后评估告警与异常
+        self.bus.subscribe([p.name for p in self.registry if p.slot != "ports"], self._apply_results)
+        self.bus.ticked.connect(self._after_tick)
         self.update_status()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_status)
-        self.timer.start(1000)
+        if self._owns_bus:
+            self.bus.start()
+        self._flash_timer = QTimer(self)
+        self._flash_timer.timeout.connect(self._flash_cards)
         # 跑马灯相关
         self._marquee_text = ""
         self._marquee_pos = 0
         self._marquee_timer = QTimer(self)
         self._marquee_timer.timeout.connect(self._update_marquee)
         self._marquee_timer.start(120)  # 可调整速度
+        # 诊断：UI线程卡顿计量 + F12 打开诊断浮层
+        self._stall_meter = StallMeter(self)
+        self._diag_shortcut = QShortcut(QKeySequence("F12"), self)
+        self._diag_shortcut.activated.connect(self.toggle_diagnostics)
 
     def showEvent(self, event):
         """窗口显示事件"""
@@ -397,11 +417,56 @@ class ArknightsMonitor(QWidget):
         super().changeEvent(event)
 
 
+    def _load_net_pixmaps(self):
+        h = self._net_img_h
+        self._net_pixmaps = {
+            True: QPixmap(NET_ON).scaled(h, h, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+            False: QPixmap(NET_OFF).scaled(h, h, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+        }
+
+    def apply_config(self, config):
+        """应用（重载后的）配置：只调整定时器周期、采集项设置、探测目标与图片，不重建控件"""
+        ui = config["ui"]
+        if self._owns_bus:
+            self.bus.apply_config(config)
+        self._marquee_timer.setInterval(ui["marquee_ms"])
+        targets = dict(TARGETS)
+        changed = apply_probe_config(config, self.registry)
+        if TARGETS != targets:
+            # 探测目标变了，此前的失败不再说明问题，所有熔断器复位
+            self.scheduler.reschedule()
+            self.scheduler.reset_breakers()
+        info_changed = False
+        for name in changed:
+            probe = self.registry.get(name)
+            if probe.enabled:
+                continue
+            # 停用的采集项不再保留旧值，卡片显示停用
+            self._values.pop(name, None)
+            if probe.label:
+                self.cards[name].setText("已停用")
+            info_changed |= bool(probe.info or probe.slot == "iface")
+        self.scheduler.reschedule(changed)
+        self.scheduler.reset_breakers(changed)
+        if info_changed:
+            self._refresh_info_bar()
+        if ui["img_dir"] and ui["img_dir"] != IMG_DIR:
+            set_img_dir(ui["img_dir"])
+            self._load_net_pixmaps()
+            self.net_label.setPixmap(self._net_pixmaps[self._net_online])
+        if changed:
+            print(f"配置已应用，变化的采集项: {', '.join(changed)}", file=sys.stderr)
+
     def _on_exit_clicked(self):
         """退出按钮点击处理"""
         # 关闭端口监听栏
         if hasattr(self, 'port_monitor') and self.port_monitor:
             self.port_monitor.close_monitor()
+        if self.diag_overlay:
+            self.diag_overlay.close()
+        if self.fleet_panel:
+            self.fleet_panel.close_panel()
+        self.bus.shutdown()
         # 关闭主界面
         self.close()
 
@@ -428,6 +493,11 @@ class ArknightsMonitor(QWidget):
         self._drag_active = False
         # 记录鼠标释放操作（已移除独立操作栏）
         event.accept()
+    def mouseDoubleClickEvent(self, event):
+        # 双击打开/关闭诊断浮层
+        if event.button() == Qt.LeftButton:
+            self.toggle_diagnostics()
+            event.accept()
 
     def init_ui(self):
         # 极简透明布局
@@ -456,14 +526,16 @@ class ArknightsMonitor(QWidget):
         font_metrics = QFontMetrics(logo_font)
         logo_height = font_metrics.height()
         net_img_h = max(32, int(logo_height * 1.0))
+        self._net_img_h = net_img_h  # 供后续动态缩放用
+        self._load_net_pixmaps()
+        self._net_online = False
         self.net_label = QLabel()
-        self.net_label.setPixmap(QPixmap(NET_OFF).scaled(net_img_h, net_img_h, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.net_label.setPixmap(self._net_pixmaps[False])
         self.net_label.setStyleSheet("background: transparent;")
-        self._net_img_h = net_img_h  # 供后续动态缩放用
         top_bar.addWidget(self.net_label)
         main_layout.addLayout(top_bar)
         # 监控数据区块
-        def card(label, value, obj_name):
+        def card(label, value, name):
             h = QHBoxLayout()
             h.setContentsMargins(0, 0, 0, 0)
             l1 = QLabel(label)
@@ -476,18 +548,32 @@ class ArknightsMonitor(QWidget):
             l2.setMinimumWidth(60)
             l2.setMaximumWidth(180)
             l2.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-            setattr(self, obj_name, l2)
+            self.cards[name] = l2
+            self._card_styles[name] = l2.styleSheet()
             h.addWidget(l1)
             h.addStretch()
             h.addWidget(l2)
             return h
-        main_layout.addLayout(card("CPU", "0%", "cpu_label"))
-        main_layout.addLayout(card("GPU", "0%", "gpu_label"))
-        main_layout.addLayout(card("MEM", "0%", "mem_label"))
-        main_layout.addLayout(card("Disk", "0%", "disk_label"))
-        main_layout.addLayout(card("Net", "0 KB/s", "net_speed_label"))
-        main_layout.addLayout(card("IP", "0.0.0.0", "ip_label"))
-        main_layout.addLayout(card("Uptime", "0h0m", "uptime_label"))
+        self.cards = {}
+        self._card_styles = {}
+        for probe in self.registry.cards():
+            main_layout.addLayout(card(probe.label, probe.default, probe.name))
+            # 可选择对象的采集项（如网卡）右键弹出选择菜单
+            if hasattr(probe.collect, "choices"):
+                label = self.cards[probe.name]
+                label.setContextMenuPolicy(Qt.CustomContextMenu)
+                label.customContextMenuRequested.connect(
+                    lambda pos, p=probe, l=label: self._show_choice_menu(p, l.mapToGlobal(pos)))
+        # 逐核CPU热力图
+        self.cpu_heatmap = None
+        if any(p.slot == "cpu_heatmap" for p in self.registry):
+            self.cpu_heatmap = CpuHeatmap(cores=psutil.cpu_count(logical=True) or 1)
+            main_layout.addWidget(self.cpu_heatmap)
+        # Top-N 进程面板
+        self.proc_table = None
+        if any(p.slot == "procs" for p in self.registry):
+            self.proc_table = ProcessTable(font_family=BENDER_FONT)
+            main_layout.addWidget(self.proc_table)
         main_layout.addStretch()
         # 信息采集栏
         self.info_bar = QLabel()
@@ -535,9 +621,9 @@ class ArknightsMonitor(QWidget):
         info["Mainboard"] = getattr(uname, 'version', 'Unknown')
         # 显卡信息
         try:
-            gpus = GPUtil.getGPUs()
+            gpus = query_gpus("name", timeout=2.0)
             if gpus:
-                info["GPU"] = gpus[0].name
+                info["GPU"] = gpus[0][0]
             else:
                 info["GPU"] = "N/A"
         except Exception:
@@ -557,163 +643,164 @@ class ArknightsMonitor(QWidget):
             info["Disk"] = "N/A"
         return info
 
-    def update_status(self):
-        # CPU
-        try:
-            cpu = psutil.cpu_percent(interval=0)
-            self.cpu_label.setText(f"{cpu:.1f}%")
-        except Exception:
-            self.cpu_label.setText("N/A")
-        # 内存
-        try:
-            mem = psutil.virtual_memory().percent
-            self.mem_label.setText(f"{mem:.1f}%")
-        except Exception:
-            self.mem_label.setText("N/A")
-        # GPU
-        try:
-            gpus = GPUtil.getGPUs()
-            if gpus:
-                gpu = gpus[0]
-                gpu_load = getattr(gpu, 'load', None)
-                gpu_load_str = f"{gpu_load * 100:.1f}%" if gpu_load is not None else "N/A"
-                freq_str = ""
-                clock = getattr(gpu, 'clock', None)
-                if clock and isinstance(clock, (int, float)) and clock > 0:
-                    freq_str = f" @ {clock:.0f}MHz"
+    def update_status(self, force=False):
+        """立即执行一次整周期刷新（结果经总线分发，之后由 _after_tick 评估告警）"""
+        self.bus.tick(force=force)
+
+    def _after_tick(self):
+        with DIAG.timed("alerts"):
+            self._check_alerts()
+        with DIAG.timed("anomaly"):
+            self._check_anomalies()
+
+    def alert_samples(self):
+        """告警规则使用的数值：自上次评估后有新结果的数值型采集项 + 派生指标"""
+        # 慢速采集项没有新结果时不重复送入，避免同一样本在窗口聚合里被计多次
+        samples = {name: value for name, value in self.metrics().items()
+                   if self._fresh_value(name, self._alert_fed) is not None}
+        if "disk" in samples:
+            samples["disk_free"] = 100.0 - samples["disk"]
+        ping = self._fresh_value("ping", self._alert_fed)
+        if ping:
+            samples["ping"] = float(ping)
+        return samples
+
+    def _check_alerts(self):
+        ports = self.port_monitor.listening_ports if self.port_monitor is not None else None
+        events = self.alerts.feed(self.alert_samples(), ports=ports)
+        if not events:
+            return
+        self.alert_events.extend(events)
+        self._new_alert_events.extend(events)
+        flashing = {r.card for r in self.alerts.firing() if r.card in self.cards}
+        for name in self._flashing - flashing:
+            self.cards[name].setStyleSheet(self._card_styles[name])
+        self._flashing = flashing
+        if flashing and not self._flash_timer.isActive():
+            self._flash_timer.start(500)
+        elif not flashing:
+            self._flash_timer.stop()
+
+    def _fresh_value(self, name, fed):
+        """采集项自上次记入 fed 后有新结果时返回其值，否则返回 None"""
+        # 每次采集结果都会写入新的 (ok, value) 元组，按元组身份判断是否为新样本
+        entry = self._values.get(name)
+        if entry is None or fed.get(name) is entry:
+            return None
+        fed[name] = entry
+        ok, value = entry
+        return value if ok else None
+
+    def anomaly_series(self):
+        """按组整理本次要送入异常检测的序列：{组: (名称列表, 数值)}"""
+        series = {}
+        metrics = {name: value for name, value in self.metrics().items()
+                   if self._fresh_value(name, self._anomaly_fed) is not None}
+        if metrics:
+            series["metrics"] = (list(metrics), list(metrics.values()))
+        cores = self._fresh_value("cpu_cores", self._anomaly_fed)
+        if cores is not None and len(cores):
+            if len(self._core_names) != len(cores):
+                self._core_names = [f"core{i}" for i in range(len(cores))]
+            series["cpu_cores"] = (self._core_names, cores)
+        net = self._fresh_value("net", self._anomaly_fed)
+        if net and net.get("rates"):
+            names, values = [], []
+            for nic, (up, down) in net["rates"].items():
+                names += (f"{nic}:up", f"{nic}:down")
+                values += (up, down)
+            series["net"] = (names, values)
+        diskio = self._fresh_value("diskio", self._anomaly_fed)
+        if diskio and diskio.get("devices"):
+            names, values = [], []
+            for dev, stats in diskio["devices"].items():
+                for key in ("read_mbps", "write_mbps", "busy"):
+                    names.append(f"{dev}:{key}")
+                    values.append(stats.get(key) or 0.0)
+            series["diskio"] = (names, values)
+        return series
+
+    def _check_anomalies(self):
+        events = []
+        for group, (names, values) in self.anomaly_series().items():
+            for name, value, score in self.anomalies.observe(group, names, values):
+                events.append(AlertEvent(f"anomaly:{group}/{name}", ANOMALY, value, round(score, 2), time.time()))
+        if events:
+            self.alert_events.extend(events)
+            self._new_alert_events.extend(events)
+
+    def _flash_cards(self):
+        self._flash_on = not self._flash_on
+        for name in self._flashing:
+            style = self._card_styles[name]
+            self.cards[name].setStyleSheet(style.replace("color: #FFFFFF", "color: #FF3B3B") if self._flash_on else style)
+
+    def take_alert_events(self):
+        """取出自上次调用以来的新告警事件"""
+        events, self._new_alert_events = self._new_alert_events, []
+        return events
+
+    def _apply_results(self, results):
+        """把采集结果写入对应的卡片/信息栏"""
+        info_changed = False
+        for name, (ok, value) in results.items():
+            probe = self.registry.get(name)
+            # 停用前已在后台执行的结果直接丢弃
+            if probe is None or not probe.enabled:
+                continue
+            self._values[name] = (ok, value)
+            if probe.label:
+                stale = None
+                if ok:
+                    self._last_good[name] = (value, time.time())
+                    text = probe.format(value)
+                elif isinstance(value, TIMEOUT_ERRORS + (CircuitOpen,)) and name in self._last_good:
+                    good, at = self._last_good[name]
+                    stale = format_age(time.time() - at)
+                    text = f"{probe.format(good)} (stale {stale})"
                 else:
-                    try:
-                        import subprocess
-                        result = subprocess.check_output(
-                            ["nvidia-smi", "--query-gpu=clocks.sm", "--format=csv,noheader,nounits"],
-                            encoding="utf-8", stderr=subprocess.DEVNULL
-                        )
-                        freq_val = result.strip().split('\n')[0]
-                        if freq_val.isdigit():
-                            freq_str = f" @ {freq_val}MHz"
-                    except Exception:
-                        pass
-                self.gpu_label.setText(f"{gpu_load_str}{freq_str}")
-            else:
-                self.gpu_label.setText("N/A")
-        except Exception:
-            self.gpu_label.setText("N/A")
-        # 硬盘
-        try:
-            disk = psutil.disk_usage('/').percent
-            self.disk_label.setText(f"{disk:.1f}%")
-        except Exception:
-            self.disk_label.setText("N/A")
-        # 网络速度
-        try:
-            now_net = psutil.net_io_counters()
-            now_time = time.time()
-            sent = now_net.bytes_sent - getattr(self, 'last_net', now_net).bytes_sent
-            recv = now_net.bytes_recv - getattr(self, 'last_net', now_net).bytes_recv
-            duration = now_time - getattr(self, 'last_time', now_time)
-            if duration > 0:
-                up_speed = sent / duration / 1024
-                down_speed = recv / duration / 1024
-                self.net_speed_label.setText(f"↑{up_speed:.1f}KB/s ↓{down_speed:.1f}KB/s")
-            self.last_net = now_net
-            self.last_time = now_time
-        except Exception:
-            self.net_speed_label.setText("N/A")
-        # IP
-        try:
-            hostname = socket.gethostname()
-            ip = socket.gethostbyname(hostname)
-            self.ip_label.setText(f"{ip}")
-        except Exception:
-            self.ip_label.setText("N/A")
-        # Uptime
-        try:
-            uptime = int(time.time() - psutil.boot_time())
-            hours = uptime // 3600
-            minutes = (uptime % 3600) // 60
-            self.uptime_label.setText(f"{hours}h{minutes}m")
-        except Exception:
-            self.uptime_label.setText("N/A")
-        # 网络状态图标
-        try:
-            socket.create_connection(("8.8.8.8", 53), timeout=1)
-            self.net_label.setPixmap(QPixmap(NET_ON).scaled(self._net_img_h, self._net_img_h, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        except Exception:
-            self.net_label.setPixmap(QPixmap(NET_OFF).scaled(self._net_img_h, self._net_img_h, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                    text = probe.fallback
+                if text is not None:
+                    self.cards[name].setText(text)
+                if stale is not None:
+                    reason = "连续失败，暂停重试" if isinstance(value, CircuitOpen) else "采集超时"
+                    self.cards[name].setToolTip(f"{reason}，显示的是 {stale} 前的值")
+                elif probe.tooltip and ok:
+                    self.cards[name].setToolTip(probe.tooltip(value))
+            if probe.info or probe.slot == "iface":
+                info_changed = True
+            if probe.slot == "net_icon":
+                online = bool(ok and value)
+                if online != self._net_online:
+                    self._net_online = online
+                    self.net_label.setPixmap(self._net_pixmaps[online])
+            elif probe.slot == "cpu_heatmap":
+                if ok and self.cpu_heatmap is not None:
+                    self.cpu_heatmap.set_values(value)
+            elif probe.slot == "procs":
+                if ok and self.proc_table is not None:
+                    self.proc_table.set_data(value)
+            elif probe.slot == "webinfo":
+                self.webinfo_bar.setText(value if ok else probe.fallback)
+        if info_changed:
+            self._refresh_info_bar()
 
+    def _refresh_info_bar(self):
         # 信息采集栏
         # 复杂网络状态分析
         net_analysis = []
-        # 本地IP
-        try:
-            hostname = socket.gethostname()
-            local_ip = socket.gethostbyname(hostname)
-            net_analysis.append(f"IP:{local_ip}")
-        except Exception:
-            net_analysis.append("IP:未知")
-        # 默认网关
-        try:
-            gws = psutil.net_if_stats()
-            # 只取第一个up的接口
-            gw_name = next((k for k, v in gws.items() if v.isup), None)
-            net_analysis.append(f"网卡:{gw_name if gw_name else '未知'}")
-        except Exception:
-            net_analysis.append("网卡:未知")
-        # DNS可用性
-        dns_status = []
-        for dnsip, name in [("8.8.8.8", "DNS1"), ("114.114.114.114", "DNS2")]:
-            try:
-                socket.create_connection((dnsip, 53), timeout=1)
-                dns_status.append(f"{name}:可用")
-            except Exception:
-                dns_status.append(f"{name}:异常")
-        net_analysis.append(",".join(dns_status))
-        # ping延迟
-        try:
-            import subprocess
-            import platform as pf
-            ping_host = "www.baidu.com"
-            if pf.system().lower() == "windows":
-                ping_cmd = ["ping", "-n", "1", "-w", "1000", ping_host]
-            else:
-                ping_cmd = ["ping", "-c", "1", "-W", "1", ping_host]
-            result = subprocess.run(ping_cmd, capture_output=True, text=True)
-            import re
-            match = re.search(r"平均 = (\d+)ms|time[=<]([\d\.]+)ms", result.stdout)
-            if match:
-                delay = match.group(1) or match.group(2)
-                net_analysis.append(f"延迟:{delay}ms")
-            else:
-                net_analysis.append("延迟:超时")
-        except Exception:
-            net_analysis.append("延迟:未知")
-        # 网络类型
-        try:
-            nics = psutil.net_if_addrs()
-            net_type = "未知"
-            for nic in nics:
-                if "wi-fi" in nic.lower() or "wlan" in nic.lower():
-                    net_type = "无线"
-                    break
-                elif "eth" in nic.lower() or "以太网" in nic.lower():
-                    net_type = "有线"
-            net_analysis.append(f"类型:{net_type}")
-        except Exception:
-            net_analysis.append("类型:未知")
+        for probe in self.registry.info_probes():
+            if probe.name not in self._values:
+                continue
+            ok, value = self._values[probe.name]
+            net_analysis.append(probe.info(value) if ok else probe.info_fallback)
         net_status = "网络: " + ", ".join(net_analysis)
         # 仅USB等其他接口状态检测（不显示网卡）
         iface_lines = [net_status]
-        try:
-            for part in psutil.disk_partitions():
-                # Windows下removable设备通常为U盘、移动硬盘
-                if 'removable' in part.opts.lower() or part.fstype == '':
-                    try:
-                        usage = psutil.disk_usage(part.mountpoint)
-                        iface_lines.append(f"USB[{part.device}]: {usage.total//(1024**3)}GB 已挂载")
-                    except Exception:
-                        iface_lines.append(f"USB[{part.device}]: 已挂载")
-        except Exception:
-            iface_lines.append("USB检测失败")
+        for probe in self.registry:
+            if probe.slot == "iface" and probe.name in self._values:
+                ok, value = self._values[probe.name]
+                iface_lines.extend(value if ok else [probe.fallback])
         # 只取前两栏内容
         info_str = " | ".join(iface_lines[:2])
         # 跑马灯内容更新逻辑
@@ -723,38 +810,43 @@ class ArknightsMonitor(QWidget):
         # 只显示一部分，剩余部分由定时器滚动
         self._set_marquee_text()
 
-        # 新增：网页信息采集栏内容
-        try:
-            webinfo = self._get_browser_active_title()
-            self.webinfo_bar.setText(webinfo)
-        except Exception:
-            self.webinfo_bar.setText("网页信息采集失败")
-    def _get_browser_active_title(self):
-        """获取主流浏览器的活动窗口标题（仅支持Windows，需pywin32）"""
-        try:
-            import win32gui
-            import win32process
-        except ImportError:
-            return "请安装pywin32以启用网页信息采集"
-        browser_names = ["chrome.exe", "msedge.exe", "firefox.exe", "opera.exe", "iexplore.exe", "safari.exe"]
-        def enum_windows_callback(hwnd, result):
-            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
-                try:
-                    tid, pid = win32process.GetWindowThreadProcessId(hwnd)
-                    p = psutil.Process(pid)
-                    name = p.name().lower()
-                    if name in browser_names:
-                        result.append((name, win32gui.GetWindowText(hwnd)))
-                except Exception:
-                    pass
-        result = []
-        win32gui.EnumWindows(enum_windows_callback, result)
-        if result:
-            # 只取第一个浏览器窗口
-            name, title = result[0]
-            return f"当前网页窗口: {name} | {title}"
-        else:
-            return "未检测到浏览器活动窗口"
+    def _show_choice_menu(self, probe, global_pos):
+        """右键菜单：自动选择或固定某个对象"""
+        menu = QMenu(self)
+        auto = menu.addAction("自动")
+        auto.setCheckable(True)
+        auto.setChecked(probe.collect.selected is None)
+        auto.triggered.connect(lambda: probe.collect.select(None))
+        for choice in probe.collect.choices():
+            action = menu.addAction(choice)
+            action.setCheckable(True)
+            action.setChecked(probe.collect.selected == choice)
+            action.triggered.connect(lambda checked=False, c=choice: probe.collect.select(c))
+        menu.exec(global_pos)
+
+    def snapshot(self):
+        """当前各卡片显示值，供无界面模式与导出使用"""
+        values = {name: label.text() for name, label in self.cards.items()}
+        values["info"] = self._marquee_text
+        return values
+
+    def metrics(self):
+        """数值型采集项的最新原始值"""
+        metrics = {}
+        for name, (ok, value) in self._values.items():
+            probe = self.registry.get(name)
+            if ok and probe.value_type in (int, float) and value is not None:
+                metrics[name] = value
+        return metrics
+
+    def toggle_diagnostics(self):
+        """显示/隐藏诊断浮层（F12 或双击主界面）"""
+        if self.diag_overlay is None:
+            self.diag_overlay = DiagnosticsOverlay()
+            geo = self.geometry()
+            self.diag_overlay.move(geo.x() + geo.width() + 10, geo.y())
+        self.diag_overlay.toggle()
+
     def _set_marquee_text(self):
         # 跑马灯显示宽度（字符数，实际可根据label宽度动态调整）
         width = 48
@@ -823,21 +915,164 @@ class SlantCard(QFrame):
         ]
         painter.drawPolygon(QPolygon(points))
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="PRTS 设备状态监视")
+    parser.add_argument("--headless", action="store_true", help="无界面模式：每秒输出一行JSON（含诊断数据）")
+    parser.add_argument("--export", type=str, default="", help="每秒将诊断数据以Prometheus文本格式写入该文件")
+    parser.add_argument("--rules", type=str, default="", help="告警规则文件（每行一条），替换默认规则")
+    parser.add_argument("--fleet", type=str, default="", help="连接 aggregator（host:port），额外显示多主机面板")
+    parser.add_argument("--services", type=str, default="", help="自定义端口服务名文件（/etc/services 格式），覆盖内置名称")
+    parser.add_argument("--config", type=str, default=CONFIG_FILE, help="TOML 配置文件，修改后自动重载")
+    parser.add_argument("--tracemalloc", type=int, default=0, metavar="FRAMES",
+                        help="开启 tracemalloc（记录的栈深度），诊断中列出增长最多的分配位置")
+    parser.add_argument("--soak", type=float, default=0, metavar="SECONDS",
+                        help=f"浸泡测试：伪造数据源、{SOAK_SPEED}倍速运行该秒数，预热后资源仍增长则返回1")
+    return parser.parse_known_args(argv)
+
+def export_diagnostics(path, monitor=None):
+    """原子写入诊断导出文件，避免读取方读到半个文件"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(DIAG.render_prometheus())
+        if monitor is not None:
+            f.write("# TYPE prts_probe_value gauge\n")
+            for name, value in monitor.metrics().items():
+                f.write(f'prts_probe_value{{probe="{name}"}} {value}\n')
+    os.replace(tmp, path)
+
+def watch_config(path, *views):
+    """配置文件变化时依次调用各界面的 apply_config"""
+    watcher = ConfigWatcher(path, {probe.name for probe in APP_REGISTRY})
+    for view in views:
+        watcher.changed.connect(view.apply_config)
+    watcher.failed.connect(lambda message: print(f"配置重载失败，保留当前配置: {message}", file=sys.stderr))
+    return watcher
+
+def run_headless(args, qt_argv, config):
+    """无界面运行：复用 ArknightsMonitor 的采集逻辑但不显示窗口"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication(qt_argv)
+    monitor = ArknightsMonitor()
+    monitor.apply_config(config)
+    watcher = watch_config(args.config, monitor)
+    if args.rules:
+        monitor.alerts = AlertEngine(load_rules(args.rules))
+    def emit():
+        record = {
+            "time": round(time.time(), 3),
+            "values": monitor.snapshot(),
+            "metrics": monitor.metrics(),
+            "alerts": [event._asdict() for event in monitor.take_alert_events()],
+            "anomalies": monitor.anomalies.snapshot(),
+            "diagnostics": DIAG.snapshot(),
+        }
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+        if args.export:
+            export_diagnostics(args.export, monitor)
+    monitor.bus.ticked.connect(emit)
+    return app.exec()
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def run_soak(args, qt_argv):
+    """浸泡测试：伪造数据源 + 倍速运行主界面与端口栏，前一半时间预热，之后资源仍增长则返回1"""
+    # 只在浸泡测试时需要，放在函数内导入
+    import contextlib
+    import prts_fakes
+    import prts_probes
+    import prts_procs
+    import prts_mounts
+    import prts_ifaces
+    import prts_ports
+    import prts_workers
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication(qt_argv)
+    modules = [sys.modules[__name__], prts_probes, prts_procs, prts_mounts, prts_ifaces, prts_ports, prts_workers]
+    for probe in APP_REGISTRY:
+        probe.cadence = max(1, probe.base_cadence // SOAK_SPEED)
+    APP_REGISTRY.get("procs").collect.procfs = False
+    scanner = APP_REGISTRY.get("ports").collect
+    LEAKS.samples = deque(maxlen=1_000_000)
+    LEAKS.start_tracing(max(1, args.tracemalloc))
+    with prts_fakes.installed(modules), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        scanner.owners = prts_ports.PortOwners(procfs=False)
+        scanner.sockets = prts_ports.SocketTable(procfs=False)
+        bus = SnapshotBus(APP_REGISTRY, tick_ms=max(1, 1000 // SOAK_SPEED), poll_ms=5)
+        window = ArknightsMonitor(bus)
+        window._marquee_timer.setInterval(max(1, 120 // SOAK_SPEED))
+        port_monitor = PortMonitorBar(bus)
+        window.port_monitor = port_monitor
+        window.show()
+        port_monitor.show()
+        started = time.monotonic()
+        bus.start()
+        # 预热结束时重取 tracemalloc 基准，报告中只含预热之后的分配增长
+        QTimer.singleShot(int(args.soak * 500), LEAKS.start_tracing)
+        QTimer.singleShot(int(args.soak * 1000), app.quit)
+        app.exec()
+        bus.shutdown()
+
+    warm = [s for s in LEAKS.samples if s["time"] >= started + args.soak / 2]
+    quarter = max(1, len(warm) // 4)
+    growth = {field: round(_median(s[field] for s in warm[-quarter:]) - _median(s[field] for s in warm[:quarter]), 2)
+              for field in LEAK_FIELDS}
+    failed = {field: value for field, value in growth.items() if value > SOAK_LIMITS[field]}
+    print(f"浸泡测试 {args.soak:.0f}秒 × {SOAK_SPEED}倍 ≈ {args.soak * SOAK_SPEED / 3600:.1f} 小时，"
+          f"样本 {len(LEAKS.samples)} 个（预热后 {len(warm)} 个）")
+    for field in LEAK_FIELDS:
+        mark = "  超出" if field in failed else ""
+        print(f"  {field:<12}{growth[field]:>+12}  上限 {SOAK_LIMITS[field]}{mark}")
+    print("tracemalloc 增长最多的分配：")
+    for where, kb, count in LEAKS.top_allocations():
+        print(f"  {kb:>+10.1f} KB {count:>+8}  {where}")
+    print(json.dumps({"growth": growth, "failed": sorted(failed)}, ensure_ascii=False))
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.soak:
+        sys.exit(run_soak(args, sys.argv[:1] + qt_args))
+    if args.tracemalloc:
+        LEAKS.start_tracing(args.tracemalloc)
+    if args.services:
+        SERVICES.load_file(args.services)
+    config = load_startup_config(args.config)
+    apply_startup_config(config)
+    if args.headless:
+        sys.exit(run_headless(args, sys.argv[:1] + qt_args, config))
+    app = QApplication(sys.argv[:1] + qt_args)
     splash = SplashScreen(SPLASH_IMG, duration=1800, fade_duration=800)
-    window = ArknightsMonitor()
+    # 应用共享的采集总线：主界面与端口栏订阅各自需要的字段
+    bus = SnapshotBus(APP_REGISTRY)
+    bus.apply_config(config)
+    window = ArknightsMonitor(bus)
     window.setMinimumSize(400, 540)
-    window.resize(520, 660)
+    window.resize(520, 880)
     window.setWindowOpacity(0.0)
     
     # 创建独立的端口监听栏
-    port_monitor = PortMonitorBar()
+    port_monitor = PortMonitorBar(bus)
     window.port_monitor = port_monitor  # 设置引用
+    window.apply_config(config)
+    port_monitor.apply_config(config)
+    config_watcher = watch_config(args.config, bus, window, port_monitor)
+    bus.start()
+    if args.rules:
+        window.alerts = AlertEngine(load_rules(args.rules))
+    if args.export:
+        bus.ticked.connect(lambda: export_diagnostics(args.export, window))
+    if args.fleet:
+        window.fleet_panel = FleetPanel(FleetClient(args.fleet).start())
     
     def show_main():
         window.show()
         port_monitor.show()  # 显示端口监听栏
+        if window.fleet_panel is not None:
+            geo = window.geometry()
+            window.fleet_panel.move(geo.x() + geo.width() + 10, geo.y())
+            window.fleet_panel.show()
         # 渐变显示主界面
         effect = QGraphicsOpacityEffect(window)
         window.setGraphicsEffect(effect)
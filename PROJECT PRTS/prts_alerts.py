@@ -0,0 +1,298 @@
+# prts_alerts.py
+"""
+告警规则引擎
+规则为一行文本，每来一个样本只更新该指标的滑动窗口并只评估引用该指标的规则：
+    cpu > 90 for 60s              持续60秒高于90
+    avg(mem, 5m) > 85             5分钟均值
+    p95(ping, 60s) > 200          60秒窗口内的p95（窗口直方图）
+    disk_free < 5                 系统盘剩余百分比
+    port 5432 down for 10s        端口停止监听
+滑动窗口的均值/最大/最小为均摊 O(1)（求和 + 单调队列），分位数用固定桶直方图，
+同一指标、同一聚合、同一窗口长度的多条规则共用一个窗口。
+"""
+
+import re
+import math
+import time
+import bisect
+import itertools
+import operator
+from collections import deque, namedtuple
+
+AlertEvent = namedtuple("AlertEvent", "rule state value threshold time")
+
+FIRING = "firing"
+RESOLVED = "resolved"
+
+# 规则指标与界面卡片不同名时的对应关系
+CARD_ALIASES = {"disk_free": "disk"}
+
+DEFAULT_RULES = (
+    "cpu > 90 for 60s",
+    "mem > 95 for 30s",
+    "disk_free < 5",
+    "p95(ping, 60s) > 200",
+)
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+        "==": operator.eq, "!=": operator.ne}
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0, "": 1.0}
+
+_NUM = r"(-?\d+(?:\.\d+)?)"
+_DUR = r"(\d+(?:\.\d+)?)\s*(ms|s|m|h)?"
+_METRIC_RULE = re.compile(
+    rf"^(?:(avg|min|max|p\d{{1,2}})\(\s*([\w:.]+)\s*,\s*{_DUR}\s*\)|([\w:.]+))"
+    rf"\s*(>=|<=|==|!=|>|<)\s*{_NUM}\s*(?:%|ms)?(?:\s+for\s+{_DUR})?$")
+_PORT_RULE = re.compile(rf"^port\s+(\d+)\s+(down|up)(?:\s+for\s+{_DUR})?$")
+
+
+class RuleError(ValueError):
+    pass
+
+
+# ---- 滑动窗口 ----
+
+class SlidingWindow:
+    """时间窗口内的和/个数，以及按需维护的单调队列求最大/最小"""
+    def __init__(self, span, track_max=False, track_min=False):
+        self.span = span
+        self._items = deque()
+        self._sum = 0.0
+        self._max = deque() if track_max else None
+        self._min = deque() if track_min else None
+
+    def add(self, t, v):
+        self._items.append((t, v))
+        self._sum += v
+        if self._max is not None:
+            q = self._max
+            while q and q[-1][1] <= v:
+                q.pop()
+            q.append((t, v))
+        if self._min is not None:
+            q = self._min
+            while q and q[-1][1] >= v:
+                q.pop()
+            q.append((t, v))
+        self._evict(t - self.span)
+
+    def _evict(self, cutoff):
+        items = self._items
+        while items and items[0][0] < cutoff:
+            self._sum -= items.popleft()[1]
+        if self._max is not None:
+            while self._max and self._max[0][0] < cutoff:
+                self._max.popleft()
+        if self._min is not None:
+            while self._min and self._min[0][0] < cutoff:
+                self._min.popleft()
+
+    def avg(self):
+        return self._sum / len(self._items) if self._items else None
+
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+
+# 直方图桶：0 单独一个桶，其余按 1.1 倍几何增长覆盖 1e-3 .. 1e7，相对误差约 5%
+_HIST_BASE = 1.1
+_HIST_MIN = 1e-3
+_HIST_BUCKETS = int(math.log(1e7 / _HIST_MIN, _HIST_BASE)) + 2
+_LOG_BASE = math.log(_HIST_BASE)
+
+
+def _bucket(v):
+    if v <= _HIST_MIN:
+        return 0
+    return min(_HIST_BUCKETS - 1, int(math.log(v / _HIST_MIN) / _LOG_BASE) + 1)
+
+
+def _bucket_value(i):
+    """桶的代表值（几何中点）"""
+    if i == 0:
+        return 0.0
+    return _HIST_MIN * _HIST_BASE ** (i - 0.5)
+
+
+class WindowHistogram:
+    """时间窗口内的固定桶直方图：加入/淘汰各 O(1)，分位数查询扫描固定数量的桶"""
+    def __init__(self, span):
+        self.span = span
+        self._items = deque()
+        self._counts = [0] * _HIST_BUCKETS
+
+    def add(self, t, v):
+        b = _bucket(v)
+        self._items.append((t, b))
+        self._counts[b] += 1
+        cutoff = t - self.span
+        items = self._items
+        while items and items[0][0] < cutoff:
+            self._counts[items.popleft()[1]] -= 1
+
+    def quantile(self, q):
+        n = len(self._items)
+        if not n:
+            return None
+        i = bisect.bisect_right(list(itertools.accumulate(self._counts)), q * (n - 1))
+        return _bucket_value(min(i, _HIST_BUCKETS - 1))
+
+
+# ---- 规则 ----
+
+class Rule:
+    __slots__ = ("name", "text", "metric", "agg", "window", "op", "op_text", "threshold", "duration",
+                 "source", "slot", "since", "firing", "value")
+
+    def __init__(self, text, name=None):
+        self.text = text.strip()
+        self.name = name or self.text
+        self.agg = None
+        self.window = 0.0
+        self.duration = 0.0
+        m = _PORT_RULE.match(self.text)
+        if m:
+            port, state, dur, unit = m.groups()
+            self.metric = f"port:{int(port)}"
+            self.op_text, self.threshold = "==", 0.0 if state == "down" else 1.0
+            if dur:
+                self.duration = float(dur) * _UNITS[unit]
+        else:
+            m = _METRIC_RULE.match(self.text)
+            if not m:
+                raise RuleError(f"无法解析的规则: {text!r}")
+            agg, agg_metric, win, win_unit, metric, op, threshold, dur, unit = m.groups()
+            if agg:
+                self.agg = agg
+                self.metric = agg_metric
+                self.window = float(win) * _UNITS[win_unit]
+                if agg.startswith("p") and not 0 < int(agg[1:]) < 100:
+                    raise RuleError(f"分位数超出范围: {agg}")
+            else:
+                self.metric = metric
+            self.op_text, self.threshold = op, float(threshold)
+            if dur:
+                self.duration = float(dur) * _UNITS[unit]
+        self.op = _OPS[self.op_text]
+        self.source = None   # 取值函数，由引擎绑定到共享窗口
+        self.slot = 0        # 在该指标取值列表中的位置，0 为原始样本值
+        self.since = None    # 条件开始成立的时间
+        self.firing = False
+        self.value = None
+
+    @property
+    def card(self):
+        return CARD_ALIASES.get(self.metric, self.metric)
+
+    def __repr__(self):
+        return f"Rule({self.text!r})"
+
+
+class AlertEngine:
+    """
+    sample()/feed() 返回本次产生的 AlertEvent 列表（开始告警 firing / 恢复 resolved）。
+    规则按指标索引，一个样本只触及引用该指标的窗口和规则。
+    """
+    def __init__(self, rules=()):
+        self.rules = []
+        self._by_metric = {}   # 指标 -> [规则]
+        self._windows = {}     # (指标, 聚合类型, 窗口秒数) -> 窗口
+        self._feeds = {}       # 指标 -> [窗口.add]
+        self._sources = {}     # 指标 -> [取值函数]，同一窗口同一聚合的规则共用一次计算
+        self._ports = set()    # 端口规则关注的端口
+        for r in rules:
+            self.add(r)
+
+    def add(self, rule, name=None):
+        if not isinstance(rule, Rule):
+            rule = Rule(rule, name)
+        if rule.agg is None:
+            rule.source = None
+        elif rule.agg.startswith("p"):
+            hist = self._window(rule.metric, "hist", rule.window, lambda: WindowHistogram(rule.window))
+            q = int(rule.agg[1:]) / 100.0
+            rule.source = lambda h=hist, q=q: h.quantile(q)
+        else:
+            win = self._window(rule.metric, "win", rule.window, lambda: SlidingWindow(rule.window))
+            if rule.agg == "max" and win._max is None:
+                win._max = deque()
+            if rule.agg == "min" and win._min is None:
+                win._min = deque()
+            rule.source = getattr(win, rule.agg)
+        if rule.source is not None:
+            sources = self._sources.setdefault(rule.metric, [])
+            for i, (key, _) in enumerate(sources):
+                if key == (rule.agg, rule.window):
+                    rule.slot = i + 1
+                    break
+            else:
+                sources.append(((rule.agg, rule.window), rule.source))
+                rule.slot = len(sources)
+        if rule.metric.startswith("port:"):
+            self._ports.add(int(rule.metric[5:]))
+        self.rules.append(rule)
+        self._by_metric.setdefault(rule.metric, []).append(rule)
+        return rule
+
+    def _window(self, metric, kind, span, factory):
+        key = (metric, kind, span)
+        win = self._windows.get(key)
+        if win is None:
+            win = self._windows[key] = factory()
+            self._feeds.setdefault(metric, []).append(win.add)
+        return win
+
+    def sample(self, metric, value, now=None, events=None):
+        rules = self._by_metric.get(metric)
+        events = [] if events is None else events
+        if not rules:
+            return events
+        now = time.monotonic() if now is None else now
+        for add in self._feeds.get(metric, ()):
+            add(now, value)
+        values = [value]
+        values.extend(source() for _, source in self._sources.get(metric, ()))
+        for rule in rules:
+            current = rule.value = values[rule.slot]
+            if current is not None and rule.op(current, rule.threshold):
+                if rule.since is None:
+                    rule.since = now
+                if not rule.firing and now - rule.since >= rule.duration:
+                    rule.firing = True
+                    events.append(AlertEvent(rule.name, FIRING, current, rule.threshold, time.time()))
+            else:
+                rule.since = None
+                if rule.firing:
+                    rule.firing = False
+                    events.append(AlertEvent(rule.name, RESOLVED, current, rule.threshold, time.time()))
+        return events
+
+    def feed(self, samples, ports=None, now=None):
+        """samples: {指标: 数值}；ports: 当前监听端口集合（None 表示本次没有端口数据）"""
+        now = time.monotonic() if now is None else now
+        events = []
+        by_metric = self._by_metric
+        for metric, value in samples.items():
+            if metric in by_metric and value is not None:
+                self.sample(metric, float(value), now, events)
+        if ports is not None:
+            for port in self._ports:
+                self.sample(f"port:{port}", 1.0 if port in ports else 0.0, now, events)
+        return events
+
+    def firing(self):
+        return [r for r in self.rules if r.firing]
+
+
+def load_rules(path):
+    """每行一条规则，# 开头为注释"""
+    rules = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                rules.append(Rule(line))
+    return rules
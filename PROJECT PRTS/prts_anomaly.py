@@ -0,0 +1,193 @@
+# prts_anomaly.py
+"""
+流式异常检测
+每条序列维护 EWMA 均值/方差与 P² 分位数估计（Jain & Chlamtac 1985，每个分位数5个标记），
+内存与已处理样本数无关。同一组序列（各核、各网卡、各磁盘）按列存放在 numpy 数组中，
+每次更新是一组向量运算，不逐条序列循环。
+样本同时满足“偏离 EWMA 均值超过 z 倍标准差”与“落在历史分位数带 [低, 高] 之外”才判为异常，
+单独的高方差或单独的分位数越界都不够。
+"""
+
+import numpy as np
+
+_MARKERS = np.arange(5)
+
+
+class P2Quantiles:
+    """
+    多条序列 × 多个分位数的 P² 估计器，行数 = 序列数 × 分位数个数。
+    update(x) 的 x 形状为 (序列数,)，只对已收满5个样本的行执行标记调整。
+    """
+    def __init__(self, series, quantiles):
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        self.series = series
+        rows = series * len(self.quantiles)
+        p = np.tile(self.quantiles, series)
+        self.q = np.zeros((rows, 5))
+        self.n = np.tile(np.arange(1.0, 6.0), (rows, 1))
+        self.np = np.stack([np.ones(rows), 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, np.full(rows, 5.0)], axis=1)
+        self.dn = np.stack([np.zeros(rows), p / 2, p, (1 + p) / 2, np.ones(rows)], axis=1)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    def take(self, rows):
+        """按行号取出子集（序列增减时对齐用）"""
+        out = P2Quantiles(0, self.quantiles)
+        for name in ("q", "n", "np", "dn", "count"):
+            setattr(out, name, getattr(self, name)[rows].copy())
+        out.series = len(rows) // len(self.quantiles)
+        return out
+
+    def update(self, x):
+        x = np.repeat(np.asarray(x, dtype=np.float64), len(self.quantiles))
+        count = self.count
+        warm = count >= 5
+        if not warm.all():
+            # 前5个样本直接记录，收满后排序作为初始标记
+            cold = np.nonzero(~warm)[0]
+            self.q[cold, count[cold]] = x[cold]
+            count[cold] += 1
+            full = cold[count[cold] == 5]
+            if len(full):
+                self.q[full] = np.sort(self.q[full], axis=1)
+            if not warm.any():
+                return
+            idx = np.nonzero(warm)[0]
+            q, n, np_, dn, x = self.q[idx], self.n[idx], self.np[idx], self.dn[idx], x[idx]
+        else:
+            idx = None
+            q, n, np_, dn = self.q, self.n, self.np, self.dn
+
+        np.minimum(q[:, 0], x, out=q[:, 0])
+        np.maximum(q[:, 4], x, out=q[:, 4])
+        k = (x[:, None] >= q[:, 1:4]).sum(axis=1)
+        n += _MARKERS[None, :] > k[:, None]
+        np_ += dn
+        for i in (1, 2, 3):
+            d = np_[:, i] - n[:, i]
+            adj = ((d >= 1) & (n[:, i + 1] - n[:, i] > 1)) | ((d <= -1) & (n[:, i - 1] - n[:, i] < -1))
+            if not adj.any():
+                continue
+            ds = np.sign(d[adj])
+            qi, qm, qp = q[adj, i], q[adj, i - 1], q[adj, i + 1]
+            ni, nm, npl = n[adj, i], n[adj, i - 1], n[adj, i + 1]
+            # 抛物线插值，越界时退回线性插值
+            par = qi + ds / (npl - nm) * ((ni - nm + ds) * (qp - qi) / (npl - ni) +
+                                          (npl - ni - ds) * (qi - qm) / (ni - nm))
+            lin = qi + ds * (np.where(ds > 0, qp, qm) - qi) / (np.where(ds > 0, npl, nm) - ni)
+            q[adj, i] = np.where((qm < par) & (par < qp), par, lin)
+            n[adj, i] += ds
+        count[idx if idx is not None else slice(None)] += 1
+        if idx is not None:
+            self.q[idx], self.n[idx], self.np[idx] = q, n, np_
+
+    def estimates(self):
+        """形状 (序列数, 分位数个数)；未收满5个样本的行为 nan"""
+        est = np.where(self.count >= 5, self.q[:, 2], np.nan)
+        return est.reshape(-1, len(self.quantiles))
+
+
+class SeriesBank:
+    """
+    一组同时采样的序列。update(names, values) 返回布尔数组：本次样本是否异常。
+    names 变化（网卡插拔、核心热插拔）时按名称对齐，新序列从头学习。
+    """
+    def __init__(self, alpha=0.05, quantiles=(0.01, 0.99), z=4.0, warmup=30, min_std=1e-3):
+        self.alpha = alpha
+        self.quantiles = tuple(quantiles)
+        self.z = z
+        self.warmup = warmup
+        self.min_std = min_std
+        self.names = []
+        self._index = {}
+        self._alloc(0)
+
+    def _alloc(self, size):
+        self.mean = np.zeros(size)
+        self.var = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.p2 = P2Quantiles(size, self.quantiles)
+        self.score = np.zeros(size)
+
+    def _align(self, names):
+        names = list(names)
+        old = self._index
+        mean, var, count, p2 = self.mean, self.var, self.count, self.p2
+        self._alloc(len(names))
+        nq = len(self.quantiles)
+        keep_new, keep_old = [], []
+        for i, name in enumerate(names):
+            j = old.get(name)
+            if j is not None:
+                keep_new.append(i)
+                keep_old.append(j)
+        if keep_new:
+            self.mean[keep_new] = mean[keep_old]
+            self.var[keep_new] = var[keep_old]
+            self.count[keep_new] = count[keep_old]
+            rows_old = (np.asarray(keep_old)[:, None] * nq + np.arange(nq)).ravel()
+            rows_new = (np.asarray(keep_new)[:, None] * nq + np.arange(nq)).ravel()
+            kept = p2.take(rows_old)
+            for attr in ("q", "n", "np", "dn", "count"):
+                getattr(self.p2, attr)[rows_new] = getattr(kept, attr)
+        self.names = names
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def update(self, names, values):
+        if list(names) != self.names:
+            self._align(names)
+        x = np.asarray(values, dtype=np.float64)
+        fresh = self.count == 0
+        # 先用已有基线给本次样本打分，再把样本并入基线
+        std = np.sqrt(self.var) + self.min_std
+        self.score = np.where(fresh, 0.0, (x - self.mean) / std)
+        band = self.p2.estimates()
+        outside = (x < band[:, 0]) | (x > band[:, -1])
+        flagged = (self.count >= self.warmup) & (np.abs(self.score) > self.z) & outside
+
+        diff = x - self.mean
+        a = self.alpha
+        self.mean = np.where(fresh, x, self.mean + a * diff)
+        self.var = np.where(fresh, 0.0, (1 - a) * (self.var + a * diff * diff))
+        self.count += 1
+        self.p2.update(x)
+        return flagged
+
+    def band(self):
+        """各序列当前的分位数带，形状 (序列数, 分位数个数)"""
+        return self.p2.estimates()
+
+
+class AnomalyDetector:
+    """按组管理多个 SeriesBank；current 记录各组当前处于异常的序列"""
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self.banks = {}
+        self.current = {}   # 组 -> {名称: 数值}
+        self.total = 0      # 累计进入异常的次数
+
+    def bank(self, group, **kwargs):
+        bank = self.banks.get(group)
+        if bank is None:
+            bank = self.banks[group] = SeriesBank(**{**self.defaults, **kwargs})
+        return bank
+
+    def observe(self, group, names, values):
+        """送入一组样本，返回本次新进入异常的 [(名称, 数值, z分数)]"""
+        bank = self.bank(group)
+        flagged = bank.update(names, values)
+        before = self.current.get(group, {})
+        now = {}
+        entered = []
+        if flagged.any():
+            values = np.asarray(values, dtype=np.float64)
+            for i in np.nonzero(flagged)[0]:
+                name = bank.names[i]
+                now[name] = float(values[i])
+                if name not in before:
+                    entered.append((name, float(values[i]), float(bank.score[i])))
+        self.current[group] = now
+        self.total += len(entered)
+        return entered
+
+    def snapshot(self):
+        return {group: dict(items) for group, items in self.current.items() if items}
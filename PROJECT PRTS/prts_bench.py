@@ -0,0 +1,324 @@
+# prts_bench.py
+"""
+PRTS 热路径基准测试
+覆盖：ArknightsMonitor.update_status / 端口扫描（经采集总线分发到端口栏）/ _update_display /
+      _set_marquee_text / SlantCard.paintEvent / 逐核热力图（256核）/ 进程采样（2000进程）/
+      多主机面板 / 端口列表（5000条）/ 告警规则 / 异常检测
+使用伪造数据源 + Qt offscreen 平台，可在无GPU、无网络的Linux上运行
+
+用法：
+    python prts_bench.py --save        # 记录基线
+    python prts_bench.py               # 与基线比较，退化时返回非0
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+from contextlib import redirect_stdout
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage
+from PySide6.QtCore import Qt
+
+import PRTSmain
+import prts_fakes
+import prts_probes
+import prts_procs
+import prts_mounts
+import prts_ifaces
+import prts_ports
+import prts_workers
+import prts_fleet
+import prts_fleetview
+import prts_portview
+import prts_alerts
+import prts_anomaly
+
+# 模拟的逻辑核数与进程数，按大机器取值
+FAKE_CORES = 256
+FAKE_PROCESSES = 2000
+FAKE_HOSTS = 500
+FAKE_LISTENERS = 5000
+# 告警规则数与涉及的指标数
+FAKE_RULES = 5000
+ALERT_METRICS = 50
+# 异常检测：每核一条序列，网卡按上/下行各一条
+FAKE_NICS = 64
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PRTS 热路径基准测试")
+    parser.add_argument("--iterations", type=int, default=200, help="每项计时的迭代次数")
+    parser.add_argument("--repeat", type=int, default=3, help="计时轮数，取最好的一轮")
+    parser.add_argument("--alloc-iterations", type=int, default=50, help="内存分配统计的迭代次数")
+    parser.add_argument("--baseline", type=str, default=BASELINE_FILE, help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="允许的耗时退化比例")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.25, help="允许的内存分配退化比例")
+    parser.add_argument("--only", type=str, default="", help="只运行指定项，逗号分隔")
+    return parser.parse_args()
+
+
+def measure(fn, iterations, alloc_iterations, repeat=3, warmup=10):
+    """返回单次调用耗时分位数（微秒）与内存分配统计"""
+    for _ in range(warmup):
+        fn()
+    # 多轮计时取p50最小的一轮，降低调度抖动带来的误报
+    samples = None
+    for _ in range(repeat):
+        rnd = []
+        for _ in range(iterations):
+            t0 = time.perf_counter_ns()
+            fn()
+            rnd.append(time.perf_counter_ns() - t0)
+        rnd.sort()
+        if samples is None or rnd[len(rnd) // 2] < samples[len(samples) // 2]:
+            samples = rnd
+
+    # 每次调用后残留的内存块数（泄漏指标），取两轮中较小值以排除首轮缓存填充
+    retained = None
+    for _ in range(2):
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(alloc_iterations):
+            fn()
+        gc.collect()
+        growth = (sys.getallocatedblocks() - blocks_before) / alloc_iterations
+        retained = growth if retained is None else min(retained, growth)
+
+    # 单次调用内的瞬时分配峰值
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_iterations):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - current)
+    tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000,
+        "mean_us": sum(samples) / len(samples) / 1000,
+        "peak_kb": peaks[len(peaks) // 2] / 1024,
+        "retained_blocks": retained,
+    }
+
+
+def _alert_rules(count):
+    """按常见形态生成规则：持续阈值、窗口均值/最大值、分位数、端口"""
+    forms = ("m{m} > {v} for 30s", "avg(m{m}, 60s) > {v}", "max(m{m}, 5m) >= {v}", "p95(m{m}, 60s) > {v}")
+    rules = []
+    for i in range(count):
+        if i % 50 == 49:
+            rules.append(f"port {8000 + i % 100} down for 5s")
+        else:
+            rules.append(forms[i % len(forms)].format(m=i % ALERT_METRICS, v=50 + i % 50))
+    return rules
+
+
+def build_cases(monitor, bar, card):
+    """构造各基准项的调用函数"""
+    image = QImage(card.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def marquee():
+        monitor._marquee_pos += 1
+        monitor._set_marquee_text()
+
+    def slant_paint():
+        image.fill(0)
+        card.render(image)
+
+    sampler = prts_probes.PerCoreSampler()
+    heatmap = monitor.cpu_heatmap
+    heatmap.resize(480, heatmap.height())
+    heat_image = QImage(heatmap.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def cpu_heatmap():
+        heatmap.set_values(sampler())
+        heatmap.render(heat_image)
+
+    procs = prts_procs.ProcessSampler(procfs=False)
+
+    # 500 台模拟主机的多主机面板：一次数据更新 + 一次重绘
+    fleet_panel = prts_fleetview.FleetPanel(prts_fleet.FleetSimulator(hosts=FAKE_HOSTS))
+    fleet_panel._timer.stop()
+    fleet_panel.view.sortByColumn(2, Qt.DescendingOrder)
+    fleet_panel.resize(560, 420)
+    fleet_image = QImage(fleet_panel.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def fleet_grid():
+        fleet_panel.model.set_fleet(fleet_panel.client.step())
+        fleet_panel.render(fleet_image)
+
+    # 5000 个监听端口的端口列表：每次有一个端口变化，重建列表 + 按进程列排序 + 重绘
+    port_view = prts_portview.PortListView()
+    port_view.resize(300, 300)
+    port_entries = prts_portview.simulated_entries(FAKE_LISTENERS)
+    port_view.port_model.sort(3, Qt.AscendingOrder)
+    port_image = QImage(port_view.size(), QImage.Format_ARGB32_Premultiplied)
+    port_step = [0]
+
+    def port_list():
+        port_step[0] += 1
+        i = port_step[0] % len(port_entries)
+        entry = port_entries[i]
+        port_entries[i] = entry._replace(pid=None if entry.pid else 1000)
+        port_view.port_model.set_entries(list(port_entries))
+        port_view.render(port_image)
+
+    long_text = "网络: " + ", ".join(f"字段{i}:数值{i}" for i in range(20))
+    monitor._marquee_text = long_text
+
+    # 数千条告警规则：每次送入一组指标样本与端口集合
+    alert_engine = prts_alerts.AlertEngine(_alert_rules(FAKE_RULES))
+    alert_clock = [0.0]
+
+    def alert_rules():
+        alert_clock[0] += 1.0
+        t = alert_clock[0]
+        samples = {f"m{i}": (t * 7 + i * 13) % 100 for i in range(ALERT_METRICS)}
+        ports = {p for p in range(8000, 8100) if (p + int(t)) % 7}
+        alert_engine.feed(samples, ports=ports, now=t)
+
+    # 先填满最长的5分钟窗口，测量的是稳态而不是窗口增长
+    for _ in range(400):
+        alert_rules()
+
+    # 每秒一次的全量异常检测：256核 + 64网卡×2 + 标量指标
+    detector = prts_anomaly.AnomalyDetector(min_std=1.0)
+    core_names = [f"core{i}" for i in range(FAKE_CORES)]
+    nic_names = [f"eth{i}:{d}" for i in range(FAKE_NICS) for d in ("up", "down")]
+    metric_names = [f"m{i}" for i in range(ALERT_METRICS)]
+    anomaly_rng = np.random.default_rng(0)
+
+    def anomaly():
+        detector.observe("cpu_cores", core_names, anomaly_rng.uniform(0, 100, FAKE_CORES))
+        detector.observe("net", nic_names, anomaly_rng.exponential(100.0, len(nic_names)))
+        detector.observe("metrics", metric_names, anomaly_rng.normal(50, 5, ALERT_METRICS))
+
+    for _ in range(50):
+        anomaly()
+
+    return {
+        # 强制全部采集项在本线程执行，计入完整的一次刷新开销
+        "update_status": lambda: monitor.update_status(force=True),
+        "scan_ports": lambda: bar.bus.tick(force=True),
+        "update_display": bar._update_display,
+        "set_marquee_text": marquee,
+        "slantcard_paint": slant_paint,
+        "cpu_heatmap": cpu_heatmap,
+        "process_scan": procs,
+        "fleet_grid": fleet_grid,
+        "port_list": port_list,
+        "alert_rules": alert_rules,
+        "anomaly": anomaly,
+    }
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    only = {x.strip() for x in args.only.split(",") if x.strip()}
+    results = {}
+    providers = prts_fakes.make_providers(cpu_count=FAKE_CORES, processes=FAKE_PROCESSES)
+    # 进程采样不走 /proc 快速路径，使用伪造的psutil进程数据
+    prts_probes.REGISTRY.get("procs").collect.procfs = False
+    scanner = PRTSmain.APP_REGISTRY.get("ports").collect
+    with prts_fakes.installed([PRTSmain, prts_probes, prts_procs, prts_mounts, prts_ifaces, prts_ports, prts_workers], providers), open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        # 端口归属同样使用伪造的psutil连接表
+        scanner.owners = prts_ports.PortOwners(procfs=False)
+        scanner.sockets = prts_ports.SocketTable(procfs=False)
+        monitor = PRTSmain.ArknightsMonitor()
+        # 端口栏单独一条总线，update_status 与 scan_ports 分开计时
+        bar_bus = PRTSmain.SnapshotBus(PRTSmain.APP_REGISTRY, name="bar")
+        bar_bus.scheduler.inline = True
+        bar = PRTSmain.PortMonitorBar(bar_bus)
+        card = PRTSmain.SlantCard()
+        card.setObjectName("slant_card")
+        card.resize(400, 60)
+        # 只测采集与绘制本身，不让定时器在测量期间插入
+        monitor.bus.stop()
+        monitor.scheduler.inline = True
+        # 等待构造时已提交到后台的采集完成，之后全部在本线程执行
+        while monitor.scheduler.pending():
+            time.sleep(0.01)
+            monitor.bus.poll()
+        monitor._marquee_timer.stop()
+        for name, fn in build_cases(monitor, bar, card).items():
+            if only and name not in only:
+                continue
+            results[name] = measure(fn, args.iterations, args.alloc_iterations, args.repeat)
+            app.processEvents()
+    return results
+
+
+def compare(results, baseline, tolerance, alloc_tolerance):
+    """与基线比较，返回退化项列表"""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        # 5us 的绝对余量，微秒级的项不因计时抖动误报
+        if cur["p50_us"] > base["p50_us"] * (1 + tolerance) + 5.0:
+            regressions.append(f"{name}: p50 {base['p50_us']:.1f}us -> {cur['p50_us']:.1f}us")
+        # 1KB 的绝对余量，避免极小值上的抖动误报
+        if cur["peak_kb"] > base["peak_kb"] * (1 + alloc_tolerance) + 1.0:
+            regressions.append(f"{name}: peak {base['peak_kb']:.1f}KB -> {cur['peak_kb']:.1f}KB")
+        if cur["retained_blocks"] > base["retained_blocks"] + 1.0:
+            regressions.append(f"{name}: retained {base['retained_blocks']:.2f} -> {cur['retained_blocks']:.2f} blocks/call")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'case':<18}{'p50(us)':>12}{'p99(us)':>12}{'mean(us)':>12}{'peak(KB)':>12}{'retained':>10}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['p50_us']:>12.1f}{r['p99_us']:>12.1f}{r['mean_us']:>12.1f}"
+              f"{r['peak_kb']:>12.1f}{r['retained_blocks']:>10.2f}")
+
+
+def main():
+    args = parse_args()
+    results = run(args)
+    print_table(results)
+    if args.save:
+        data = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "results": results,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"基线已保存: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # 没有基线就无从判断是否退化，按失败处理，避免检查形同虚设
+        print(f"未找到基线文件 {args.baseline}，使用 --save 生成", file=sys.stderr)
+        return 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.alloc_tolerance)
+    if regressions:
+        print("性能退化:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print("未发现性能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# prts_breakers.py
+"""
+采集项熔断器
+连续失败 threshold 次后断开：断开期间调度器不再执行该采集项（离线主机上不再每次都等满超时）。
+断开时长从 base 秒起，每次重试仍失败就翻倍，上限 max_backoff 秒；
+到期后进入半开：先执行廉价的本地预检（如“有没有默认路由”“nvidia-smi 是否存在”），
+预检不通过直接再次断开，不做任何网络/子进程调用；通过后放行一次真实采集，成功即闭合。
+"""
+
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """熔断期间跳过的采集；retry_in 为距下次重试的秒数"""
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} 熔断中，{retry_in:.0f}秒后重试")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, base=5.0, threshold=3, max_backoff=300.0, precheck=None):
+        self.base = base
+        self.threshold = threshold
+        self.max_backoff = max_backoff
+        self.precheck = precheck
+        self.state = CLOSED
+        self.failures = 0       # 连续失败次数
+        self.backoff = base
+        self.retry_at = 0.0
+        self.trips = 0          # 累计从闭合变为断开的次数
+        self.skipped = 0        # 累计因断开而跳过的采集次数
+        self.prechecks = 0      # 累计执行的预检次数
+
+    def allow(self, now=None):
+        """本次是否执行真实采集；半开时在这里执行预检"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic() if now is None else now
+        if self.state == OPEN:
+            if now < self.retry_at:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+        if self.precheck is not None:
+            self.prechecks += 1
+            try:
+                passed = self.precheck()
+            except Exception:
+                passed = False
+            if not passed:
+                self._trip(now)
+                self.skipped += 1
+                return False
+        return True
+
+    def record(self, success, now=None):
+        now = time.monotonic() if now is None else now
+        if success:
+            self.state = CLOSED
+            self.failures = 0
+            self.backoff = self.base
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self._trip(now)
+
+    def _trip(self, now):
+        if self.state == CLOSED:
+            self.backoff = self.base
+            self.trips += 1
+        else:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        self.state = OPEN
+        self.retry_at = now + self.backoff
+
+    def retry_in(self, now=None):
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.retry_at - now) if self.state == OPEN else 0.0
+
+    def reset(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = self.base
+        self.retry_at = 0.0
+
+    def stats(self, now=None):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff_s": round(self.backoff, 1),
+            "retry_in_s": round(self.retry_in(now), 1),
+            "trips": self.trips,
+            "skipped": self.skipped,
+            "prechecks": self.prechecks,
+        }
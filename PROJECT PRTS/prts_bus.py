@@ -0,0 +1,144 @@
+# prts_bus.py
+"""
+应用级采集总线
+持有唯一的 ProbeScheduler 与刷新定时器；各视图按字段订阅，采样结果只分发给订阅了该字段的视图。
+无论打开多少个视图，每个数据源每个周期最多采样一次，没有订阅者的数据源不采样。
+手动刷新请求在同一轮事件循环内合并为一次，且刚采样过的数据源不会重复采样。
+
+    bus = SnapshotBus(registry)
+    bus.subscribe(["ports"], bar.on_results)   # 回调参数为 {名称: (是否成功, 值)}
+    bus.ticked.connect(after_tick)             # 每次整周期刷新分发完成后
+    bus.request_refresh(["ports"])
+    bus.start()
+
+诊断中的 workers / breakers 段属于各自的总线；同一进程中有多条总线时用 name 区分（段名加 _name 后缀）。
+"""
+
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from prts_diag import DIAG
+from prts_probes import REGISTRY, ProbeScheduler
+
+# 距上次采样不足该时间（秒）的数据源，手动刷新时不再重复采样
+REFRESH_MIN_GAP = 0.5
+
+
+class SnapshotBus(QObject):
+    ticked = Signal()
+
+    def __init__(self, registry=REGISTRY, tick_ms=1000, poll_ms=100, diag=DIAG, name=None, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.diag = diag
+        self.scheduler = ProbeScheduler(registry, diag=diag)
+        suffix = f"_{name}" if name else ""
+        self._sections = {f"workers{suffix}": self.scheduler.pool_stats,
+                          f"breakers{suffix}": self.scheduler.breaker_stats}
+        for section, fn in self._sections.items():
+            if diag.has_section(section):
+                raise ValueError(f"诊断段 {section} 已被另一条总线使用，请为新总线指定 name")
+            diag.add_section(section, fn)
+        self.latest = {}           # 名称 -> 最近一次的 (是否成功, 值)
+        self.sampled_at = {}       # 名称 -> 最近一次结果到达的时间（monotonic）
+        self._subscribers = []     # [(字段集合，None 表示全部), 回调]
+        self._wanted = frozenset()
+        self._refresh = set()
+        self._refresh_pending = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(tick_ms)
+        self.timer.timeout.connect(self.tick)
+        # 后台采集结果回收（不等下一次整周期刷新）
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_ms)
+        self._poll_timer.timeout.connect(self.poll)
+
+    # ---- 订阅 ----
+
+    def subscribe(self, fields, callback):
+        """fields 为采集项名称列表，None 表示全部；已有的最新值立即回放给新订阅者"""
+        fields = None if fields is None else frozenset(fields)
+        before = self._wanted
+        self._subscribers.append((fields, callback))
+        self._update_wanted()
+        # 新需要的数据源在下一次刷新时立即采样，不等各自的周期
+        if before is not None:
+            self.scheduler.reschedule(None if self._wanted is None else self._wanted - before)
+        current = {name: entry for name, entry in self.latest.items() if fields is None or name in fields}
+        if current:
+            callback(current)
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(fields, cb) for fields, cb in self._subscribers if cb != callback]
+        self._update_wanted()
+
+    def _update_wanted(self):
+        wanted = set()
+        for fields, _ in self._subscribers:
+            if fields is None:
+                self._wanted = None
+                return
+            wanted |= fields
+        self._wanted = frozenset(wanted)
+
+    # ---- 采样与分发 ----
+
+    def start(self):
+        self.timer.start()
+        self._poll_timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self._poll_timer.stop()
+
+    def tick(self, force=False):
+        """整周期刷新：运行到期的数据源并分发结果，之后发出 ticked"""
+        with self.diag.timed("tick"):
+            self._publish(self.scheduler.tick(force=force, names=self._wanted))
+        self.ticked.emit()
+
+    def poll(self):
+        if self.scheduler.pending():
+            self._publish(self.scheduler.poll())
+
+    def request_refresh(self, fields=None):
+        """手动刷新（如点击端口栏）；同一轮事件循环内的多次请求合并为一次采样"""
+        names = self.registry if fields is None else fields
+        self._refresh.update(name if isinstance(name, str) else name.name for name in names)
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            QTimer.singleShot(0, self._run_refresh)
+
+    def _run_refresh(self):
+        self._refresh_pending = False
+        now = time.monotonic()
+        wanted = self._wanted
+        names = {name for name in self._refresh
+                 if (wanted is None or name in wanted) and now - self.sampled_at.get(name, -REFRESH_MIN_GAP) >= REFRESH_MIN_GAP}
+        self._refresh.clear()
+        if names:
+            self.scheduler.reschedule(names)
+            self._publish(self.scheduler.tick(names=names))
+
+    def _publish(self, results):
+        if not results:
+            return
+        now = time.monotonic()
+        for name in results:
+            self.sampled_at[name] = now
+        self.latest.update(results)
+        for fields, callback in list(self._subscribers):
+            part = results if fields is None else {name: entry for name, entry in results.items() if name in fields}
+            if part:
+                callback(part)
+
+    def apply_config(self, config):
+        """热重载：刷新周期"""
+        self.timer.setInterval(config["ui"]["tick_ms"])
+
+    def shutdown(self):
+        self.stop()
+        self.scheduler.shutdown()
+        for section in self._sections:
+            self.diag.remove_section(section)
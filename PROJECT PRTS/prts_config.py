@@ -0,0 +1,221 @@
+# prts_config.py
+"""
+配置文件（TOML）与热重载
+文件中只需写要改的项，其余使用内置默认值；删除某项后重载即恢复默认。
+
+    [ui]
+    img_dir = "D:/PRTS"          # 图片目录（网络图标热重载，启动图仅启动时）
+    tick_ms = 1000               # 主界面刷新周期
+    marquee_ms = 120             # 跑马灯速度
+
+    [fonts]                      # 字体在重启后生效
+    novecento = "Novecento Wide"
+    bender = "Bender"
+    chinese = "FZQuenyaSongS-R-GB"
+
+    [targets]
+    online = "10.0.0.1:53"                      # 网络图标的连通性探测
+    ping = "10.0.0.1"
+    timeout = 0.5
+    dns = { DNS1 = "10.0.0.2", DNS2 = "10.0.0.3:53" }
+
+    [probes.ping]
+    enabled = false
+    [probes.procs]
+    cadence = 5000
+    [probes.ports]               # 端口栏扫描
+    cadence = 3000
+
+    [services]
+    "7000/tcp" = "myapp"
+
+ConfigWatcher 监视文件及其所在目录（编辑器常以“写临时文件再改名”的方式保存），
+防抖后重新解析，成功时发出 changed(配置)，失败时发出 failed(错误信息) 并保留当前配置。
+"""
+
+import os
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10 及以下
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prts.toml")
+
+# 界面周期的默认值；字体与图片目录默认沿用 PRTSmain 中的常量（None）
+DEFAULTS = {
+    "ui": {"img_dir": None, "tick_ms": 1000, "marquee_ms": 120},
+    "fonts": {"novecento": None, "bender": None, "chinese": None},
+    "targets": {},
+    "probes": {},
+    "services": {},
+}
+_SECTIONS = set(DEFAULTS)
+_MIN_INTERVAL_MS = 50
+_MIN_CADENCE_MS = 100
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def parse_target(text, default_port=None):
+    """'host'、'host:port' 或 '[v6地址]:port' -> (host, port)"""
+    text = str(text).strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+    if not host:
+        raise ConfigError(f"目标地址为空: {text!r}")
+    if not port:
+        return host, default_port
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ConfigError(f"端口不是数字: {text!r}")
+
+
+def _check_ms(section, key, value, minimum):
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ConfigError(f"[{section}] {key} 应为不小于 {minimum} 的整数（毫秒）: {value!r}")
+
+
+def validate(data, probe_names=None):
+    """检查类型并与默认值合并，返回完整配置"""
+    unknown = set(data) - _SECTIONS
+    if unknown:
+        raise ConfigError(f"未知的配置段: {', '.join(sorted(unknown))}")
+    config = {section: dict(values) for section, values in DEFAULTS.items()}
+
+    ui = data.get("ui", {})
+    for key, value in ui.items():
+        if key not in DEFAULTS["ui"]:
+            raise ConfigError(f"[ui] 未知的配置项: {key}")
+        if key == "img_dir":
+            if not isinstance(value, str):
+                raise ConfigError(f"[ui] img_dir 应为字符串: {value!r}")
+        else:
+            _check_ms("ui", key, value, _MIN_INTERVAL_MS)
+        config["ui"][key] = value
+
+    for key, value in data.get("fonts", {}).items():
+        if key not in DEFAULTS["fonts"] or not isinstance(value, str):
+            raise ConfigError(f"[fonts] 无效的配置项: {key} = {value!r}")
+        config["fonts"][key] = value
+
+    targets = {}
+    for key, value in data.get("targets", {}).items():
+        if key == "online":
+            targets[key] = parse_target(value, 53)
+        elif key == "ping":
+            targets[key] = parse_target(value)[0]
+        elif key == "timeout":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise ConfigError(f"[targets] timeout 应为正数（秒）: {value!r}")
+            targets[key] = float(value)
+        elif key == "dns":
+            if not isinstance(value, dict) or not value:
+                raise ConfigError("[targets] dns 应为非空的表，如 { DNS1 = \"10.0.0.2\" }")
+            targets[key] = tuple((name,) + parse_target(addr, 53) for name, addr in value.items())
+        else:
+            raise ConfigError(f"[targets] 未知的配置项: {key}")
+    config["targets"] = targets
+
+    probes = {}
+    for name, options in data.get("probes", {}).items():
+        if probe_names is not None and name not in probe_names:
+            raise ConfigError(f"[probes] 未知的采集项: {name}")
+        if not isinstance(options, dict):
+            raise ConfigError(f"[probes.{name}] 应为表")
+        for key, value in options.items():
+            if key == "enabled":
+                if not isinstance(value, bool):
+                    raise ConfigError(f"[probes.{name}] enabled 应为 true/false")
+            elif key == "cadence":
+                _check_ms(f"probes.{name}", key, value, _MIN_CADENCE_MS)
+            else:
+                raise ConfigError(f"[probes.{name}] 未知的配置项: {key}")
+        probes[name] = dict(options)
+    config["probes"] = probes
+
+    services = {}
+    for key, name in data.get("services", {}).items():
+        port, _, proto = str(key).partition("/")
+        if not port.isdigit() or not 0 < int(port) < 65536 or proto not in ("", "tcp", "udp"):
+            raise ConfigError(f"[services] 无效的端口: {key!r}")
+        if not isinstance(name, str):
+            raise ConfigError(f"[services] 服务名应为字符串: {key} = {name!r}")
+        services[(int(port), proto or "tcp")] = name
+    config["services"] = services
+    return config
+
+
+def load_config(path, probe_names=None):
+    """读取并校验配置文件；文件不存在时返回默认配置"""
+    if not os.path.exists(path):
+        return validate({}, probe_names)
+    if tomllib is None:
+        raise ConfigError("读取 TOML 需要 Python 3.11+ 或安装 tomli")
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ConfigError(f"TOML 语法错误: {e}")
+    return validate(data, probe_names)
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+class ConfigWatcher(QObject):
+    changed = Signal(dict)
+    failed = Signal(str)
+
+    def __init__(self, path, probe_names=None, debounce=200, parent=None):
+        super().__init__(parent)
+        self.path = os.path.abspath(path)
+        self.probe_names = probe_names
+        self._signature = _signature(self.path)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.addPath(os.path.dirname(self.path))
+        if self._signature is not None:
+            self._watcher.addPath(self.path)
+        self._watcher.fileChanged.connect(self._schedule)
+        self._watcher.directoryChanged.connect(self._schedule)
+        # 保存时常触发多次变化通知，合并为一次重载
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce)
+        self._debounce.timeout.connect(self.reload)
+
+    def _schedule(self, _path=None):
+        self._debounce.start()
+
+    def reload(self, force=False):
+        signature = _signature(self.path)
+        # 改名保存后原文件的监视会失效，重新加上
+        if signature is not None and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        if signature == self._signature and not force:
+            return
+        self._signature = signature
+        try:
+            config = load_config(self.path, self.probe_names)
+        except (ConfigError, OSError) as e:
+            self.failed.emit(str(e))
+            return
+        self.changed.emit(config)
@@ -0,0 +1,241 @@
+# prts_diag.py
+"""
+采集项耗时诊断
+每个采集项（GPU、ping、DNS、IP、磁盘分区……）的耗时进入对数分桶直方图，
+并统计超时与异常次数；另有UI线程卡顿计量与可隐藏的诊断浮层。
+其他模块可用 add_section(名称, 函数) 挂上自己的状态表（函数返回 {行名: {字段: 值}}），
+随快照、Prometheus 导出（只导出数值字段）与浮层一起输出。
+"""
+
+import time
+import bisect
+import subprocess
+
+from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont
+
+# 直方图桶上界（毫秒）：1us ~ 约30s，按1.5倍等比增长
+_BOUNDS_MS = []
+_b = 0.001
+while _b < 30000:
+    _BOUNDS_MS.append(_b)
+    _b *= 1.5
+_BOUNDS_MS.append(float("inf"))
+
+_TIMEOUT_ERRORS = (TimeoutError, subprocess.TimeoutExpired)
+
+
+class ProbeStats:
+    """单个采集项的耗时直方图与计数"""
+    __slots__ = ("buckets", "count", "total_ms", "max_ms", "last_ms", "timeouts", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * len(_BOUNDS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.timeouts = 0
+        self.errors = 0
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q):
+        """由直方图估算分位数，返回所在桶的上界（最后一桶返回最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                bound = _BOUNDS_MS[i]
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "p50_ms": round(self.quantile(0.50), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
+
+
+class _Timer:
+    """with 语句计时器；异常照常向外抛出，只记录类型"""
+    __slots__ = ("_stats", "_t0")
+
+    def __init__(self, stats):
+        self._stats = stats
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stats = self._stats
+        stats.add((time.perf_counter() - self._t0) * 1000)
+        if exc_type is not None:
+            if issubclass(exc_type, _TIMEOUT_ERRORS):
+                stats.timeouts += 1
+            else:
+                stats.errors += 1
+        return False
+
+
+class Diagnostics:
+    """采集项诊断注册表"""
+    def __init__(self):
+        self._stats = {}
+        self._sections = {}
+        self._started = time.time()
+
+    def stats(self, name):
+        s = self._stats.get(name)
+        if s is None:
+            s = self._stats[name] = ProbeStats()
+        return s
+
+    def timed(self, name):
+        return _Timer(self.stats(name))
+
+    def record(self, name, ms):
+        self.stats(name).add(ms)
+
+    def timeout(self, name):
+        """记录不以异常形式出现的超时（如ping无响应）"""
+        self.stats(name).timeouts += 1
+
+    def add_section(self, name, fn):
+        """挂上一张状态表；同名时替换"""
+        self._sections[name] = fn
+
+    def remove_section(self, name):
+        self._sections.pop(name, None)
+
+    def has_section(self, name):
+        return name in self._sections
+
+    def sections(self):
+        tables = {}
+        for name, fn in self._sections.items():
+            try:
+                tables[name] = fn()
+            except Exception as e:
+                tables[name] = {"error": {"message": str(e)}}
+        return tables
+
+    def snapshot(self):
+        snap = {
+            "uptime_s": round(time.time() - self._started, 1),
+            "probes": {name: s.to_dict() for name, s in sorted(self._stats.items())},
+        }
+        if self._sections:
+            snap["sections"] = self.sections()
+        return snap
+
+    def render_prometheus(self):
+        """导出为 Prometheus 文本格式（node_exporter textfile 收集器可直接读取）"""
+        lines = [
+            "# HELP prts_probe_duration_ms Probe duration quantiles in milliseconds",
+            "# TYPE prts_probe_duration_ms summary",
+        ]
+        for name, s in sorted(self._stats.items()):
+            lines.append(f'prts_probe_duration_ms{{probe="{name}",quantile="0.5"}} {s.quantile(0.5):.3f}')
+            lines.append(f'prts_probe_duration_ms{{probe="{name}",quantile="0.99"}} {s.quantile(0.99):.3f}')
+            lines.append(f'prts_probe_duration_ms_sum{{probe="{name}"}} {s.total_ms:.3f}')
+            lines.append(f'prts_probe_duration_ms_count{{probe="{name}"}} {s.count}')
+        lines.append("# TYPE prts_probe_timeouts_total counter")
+        for name, s in sorted(self._stats.items()):
+            lines.append(f'prts_probe_timeouts_total{{probe="{name}"}} {s.timeouts}')
+        lines.append("# TYPE prts_probe_errors_total counter")
+        for name, s in sorted(self._stats.items()):
+            lines.append(f'prts_probe_errors_total{{probe="{name}"}} {s.errors}')
+        for section, rows in self.sections().items():
+            for row, fields in rows.items():
+                for field, value in fields.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        lines.append(f'prts_{section}_{field}{{name="{row}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+# 全局诊断实例
+DIAG = Diagnostics()
+
+
+class StallMeter:
+    """UI线程卡顿计量：固定间隔的心跳定时器，实际间隔超出部分即为事件循环被阻塞的时间"""
+    def __init__(self, parent, diag=DIAG, interval=100, name="ui_stall"):
+        self._diag = diag
+        self._name = name
+        self._interval = interval
+        self._last = time.perf_counter()
+        self._timer = QTimer(parent)
+        self._timer.timeout.connect(self._beat)
+        self._timer.start(interval)
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag = (now - self._last) * 1000 - self._interval
+        self._last = now
+        self._diag.record(self._name, max(0.0, lag))
+
+    def stop(self):
+        self._timer.stop()
+
+
+class DiagnosticsOverlay(QWidget):
+    """诊断浮层：默认隐藏，显示时每秒刷新各采集项 p50/p99"""
+    def __init__(self, diag=DIAG, parent=None):
+        super().__init__(parent)
+        self._diag = diag
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setStyleSheet("background: rgba(20, 22, 26, 0.92);")
+        self.label = QLabel(self)
+        self.label.setFont(QFont("Consolas", 10))
+        self.label.setStyleSheet("color: #00FF88; background: transparent; padding: 8px;")
+        self.label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.label)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        lines = [f"{'probe':<16}{'p50':>9}{'p99':>9}{'max':>9}{'n':>7}{'t/o':>5}{'err':>5}"]
+        snap = self._diag.snapshot()
+        for name, s in snap["probes"].items():
+            lines.append(f"{name:<16}{s['p50_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.1f}"
+                         f"{s['count']:>7}{s['timeouts']:>5}{s['errors']:>5}")
+        for section, rows in snap.get("sections", {}).items():
+            lines.append("")
+            lines.append(f"[{section}]")
+            for row, fields in rows.items():
+                lines.append(f"{row:<16}" + "  ".join(f"{k}={v}" for k, v in fields.items()))
+        self.label.setText("\n".join(lines))
+        self.adjustSize()
+
+    def toggle(self):
+        if self.isVisible():
+            self._timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self._timer.start(1000)
+
+    def mouseDoubleClickEvent(self, event):
+        self.toggle()
+        event.accept()
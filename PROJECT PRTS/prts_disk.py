@@ -0,0 +1,126 @@
+# prts_disk.py
+"""
+逐磁盘IO采样
+Linux 下每次刷新只读一次 /proc/diskstats，整盘数据写入预分配数组后由 RateEngine 统一求速率：
+读/写 MB/s、IOPS、队列深度（进行中的IO数）、繁忙度（io_ticks）。
+分区过滤结果按设备名缓存，只在出现新设备名时判断一次。
+其他平台退回 psutil.disk_io_counters(perdisk=True)。
+"""
+
+import os
+import sys
+
+import numpy as np
+import psutil
+
+from prts_rates import RateEngine
+
+DISKSTATS = "/proc/diskstats"
+SECTOR_SIZE = 512  # /proc/diskstats 中的扇区固定按512字节计
+# 不显示的虚拟块设备
+IGNORED_PREFIXES = ("loop", "ram", "fd", "sr")
+
+# 速率字段：读次数、写次数、读字节、写字节、繁忙毫秒
+_FIELDS = ("reads", "writes", "read_bytes", "write_bytes", "busy_ms")
+
+
+def _is_whole_disk(name):
+    """/sys/block 下只有整盘（含dm、md），分区不在其中"""
+    if name.startswith(IGNORED_PREFIXES):
+        return False
+    return os.path.exists(f"/sys/block/{name.replace('/', '!')}")
+
+
+class DiskIOSampler:
+    """每次调用返回 {"dev": 当前显示的设备, "devices": {名称: {...}}}"""
+    def __init__(self, max_devices=64, procfs=None):
+        self.procfs = (sys.platform.startswith("linux") and os.path.exists(DISKSTATS)) if procfs is None else procfs
+        self.engine = RateEngine(_FIELDS)
+        self.selected = None
+        self._whole = {}  # 设备名 -> 是否整盘，只对新设备名判断一次
+        self._counters = np.zeros((max_devices, len(_FIELDS)))
+        self._queue = np.zeros(max_devices)
+        self._names = []
+
+    def _read_diskstats(self):
+        with open(DISKSTATS, "rb") as f:
+            data = f.read()
+        counters = self._counters
+        queue = self._queue
+        names = []
+        whole = self._whole
+        for line in data.split(b"\n"):
+            parts = line.split()
+            if len(parts) < 14:
+                continue
+            name = parts[2].decode()
+            is_whole = whole.get(name)
+            if is_whole is None:
+                is_whole = whole[name] = _is_whole_disk(name)
+            if not is_whole:
+                continue
+            i = len(names)
+            if i >= len(counters):
+                break
+            counters[i, 0] = int(parts[3])
+            counters[i, 1] = int(parts[7])
+            counters[i, 2] = int(parts[5]) * SECTOR_SIZE
+            counters[i, 3] = int(parts[9]) * SECTOR_SIZE
+            counters[i, 4] = int(parts[12])
+            queue[i] = int(parts[11])
+            names.append(name)
+        return names
+
+    def _read_psutil(self):
+        counters = self._counters
+        names = []
+        for name, c in psutil.disk_io_counters(perdisk=True).items():
+            i = len(names)
+            if i >= len(counters):
+                break
+            counters[i] = (c.read_count, c.write_count, c.read_bytes, c.write_bytes, getattr(c, "busy_time", 0))
+            self._queue[i] = np.nan  # psutil 不提供队列深度
+            names.append(name)
+        return names
+
+    def __call__(self):
+        names = self._read_diskstats() if self.procfs else self._read_psutil()
+        n = len(names)
+        rates = self.engine.update(names, self._counters[:n])
+        self._names = names
+        mb = 1024 * 1024
+        busy = np.clip(rates[:, 4] / 10.0, 0.0, 100.0)  # 每秒繁忙毫秒数 -> 百分比
+        devices = {}
+        for i, name in enumerate(names):
+            devices[name] = {
+                "read_mbps": float(rates[i, 2] / mb),
+                "write_mbps": float(rates[i, 3] / mb),
+                "iops": float(rates[i, 0] + rates[i, 1]),
+                "queue": None if np.isnan(self._queue[i]) else int(self._queue[i]),
+                "busy": float(busy[i]),
+            }
+        dev = self.selected if self.selected in devices else self._busiest(devices)
+        return {"dev": dev, "devices": devices}
+
+    @staticmethod
+    def _busiest(devices):
+        if not devices:
+            return None
+        return max(devices, key=lambda d: (devices[d]["busy"], devices[d]["read_mbps"] + devices[d]["write_mbps"]))
+
+    def choices(self):
+        return list(self._names)
+
+    def select(self, name):
+        self.selected = name
+
+
+def format_disk_io(value):
+    dev = value["dev"]
+    if dev is None:
+        return "N/A"
+    d = value["devices"][dev]
+    text = f"{dev} R{d['read_mbps']:.1f} W{d['write_mbps']:.1f}MB/s {d['iops']:.0f}IOPS {d['busy']:.0f}%"
+    if d["queue"]:
+        text += f" Q{d['queue']}"
+    return text
@@ -0,0 +1,273 @@
+# prts_fakes.py
+"""
+伪造的 psutil / GPUtil / socket / subprocess 数据源
+供基准测试在无GPU、无网络的Linux机器上驱动 PRTSmain 的采集逻辑
+"""
+
+import subprocess
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+# 与psutil返回值字段一致的轻量结构
+svmem = namedtuple('svmem', 'total available percent used free')
+sdiskusage = namedtuple('sdiskusage', 'total used free percent')
+snetio = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout')
+snicstats = namedtuple('snicstats', 'isup duplex speed mtu flags')
+snicaddr = namedtuple('snicaddr', 'family address netmask broadcast ptp')
+scputimes = namedtuple('scputimes', 'user nice system idle iowait irq softirq steal guest guest_nice')
+sdiskio = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes read_time write_time busy_time')
+sdiskpart = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+addr = namedtuple('addr', 'ip port')
+sconn = namedtuple('sconn', 'fd family type laddr raddr status pid')
+
+
+spcputimes = namedtuple('spcputimes', 'user system children_user children_system')
+spmem = namedtuple('spmem', 'rss vms')
+spio = namedtuple('spio', 'read_count write_count read_bytes write_bytes')
+
+
+class NoSuchProcess(Exception):
+    pass
+
+
+class AccessDenied(Exception):
+    pass
+
+
+class ZombieProcess(NoSuchProcess):
+    pass
+
+
+class FakeProcess:
+    """模拟psutil.Process：CPU时间与IO随所属FakePsutil的计数递增"""
+    def __init__(self, owner, pid):
+        self._owner = owner
+        self.pid = pid
+
+    def oneshot(self):
+        return nullcontext()
+
+    def name(self):
+        return f"proc{self.pid}"
+
+    def create_time(self):
+        return 1000.0 + self.pid
+
+    def cpu_times(self):
+        n = self._owner._tick
+        return spcputimes(n * (self.pid % 7) * 0.01, n * 0.001, 0.0, 0.0)
+
+    def memory_info(self):
+        return spmem((self.pid % 97) * 1024 * 1024, 0)
+
+    def io_counters(self):
+        n = self._owner._tick
+        return spio(n, n, n * (self.pid % 13) * 4096, n * 512)
+
+
+class FakePsutil:
+    """模拟psutil的常用接口，计数器随调用单调递增"""
+    NoSuchProcess = NoSuchProcess
+    AccessDenied = AccessDenied
+    ZombieProcess = ZombieProcess
+
+    def __init__(self, listen_ports=None, cpu_count=8, processes=300):
+        self._tick = 0
+        self._processes = processes
+        self._cpu_count = cpu_count
+        self._listen_ports = list(listen_ports if listen_ports is not None else
+                                  [22, 53, 80, 443, 3306, 5432, 6379, 8080, 9000, 27017])
+
+    def cpu_percent(self, interval=None, percpu=False):
+        self._tick += 1
+        value = 10.0 + (self._tick * 7) % 80
+        if percpu:
+            return [value] * self._cpu_count
+        return value
+
+    def cpu_times(self, percpu=False):
+        self._tick += 1
+        n = self._tick
+        def times(i):
+            busy = n * (i % 10 + 1)
+            return scputimes(busy, 0.0, busy / 4, n * 10.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        if percpu:
+            return [times(i) for i in range(self._cpu_count)]
+        return times(0)
+
+    def cpu_count(self, logical=True):
+        return self._cpu_count if logical else max(1, self._cpu_count // 2)
+
+    def virtual_memory(self):
+        total = 16 * 1024 ** 3
+        return svmem(total, total // 2, 50.0, total // 2, total // 2)
+
+    def disk_usage(self, path):
+        total = 512 * 1024 ** 3
+        return sdiskusage(total, total // 4, total * 3 // 4, 25.0)
+
+    def net_io_counters(self, pernic=False):
+        n = self._tick
+        counters = snetio(n * 4096, n * 16384, n * 8, n * 32, 0, 0, 0, 0)
+        if pernic:
+            return {'lo': counters, 'eth0': counters}
+        return counters
+
+    def disk_io_counters(self, perdisk=False):
+        n = self._tick
+        counters = sdiskio(n * 10, n * 20, n * 40960, n * 81920, n, n, n * 3)
+        if perdisk:
+            return {'sda': counters, 'nvme0n1': counters}
+        return counters
+
+    def boot_time(self):
+        return 0.0
+
+    def net_if_stats(self):
+        return {
+            'lo': snicstats(True, 0, 0, 65536, 'up,loopback,running'),
+            'eth0': snicstats(True, 2, 1000, 1500, 'up,broadcast,running,multicast'),
+        }
+
+    def net_if_addrs(self):
+        return {
+            'lo': [snicaddr(2, '127.0.0.1', '255.0.0.0', None, None)],
+            'eth0': [snicaddr(2, '192.168.1.10', '255.255.255.0', '192.168.1.255', None)],
+        }
+
+    def disk_partitions(self, all=False):
+        return [
+            sdiskpart('/dev/sda1', '/', 'ext4', 'rw,relatime'),
+            sdiskpart('/dev/sdb1', '/media/usb', 'vfat', 'rw,removable'),
+        ]
+
+    def pids(self):
+        # 每次有少量进程退出、新进程启动
+        start = self._tick % 50
+        return list(range(start + 1, start + 1 + self._processes))
+
+    def Process(self, pid):
+        return FakeProcess(self, pid)
+
+    def net_connections(self, kind='inet'):
+        return [sconn(-1, 2, 1, addr('0.0.0.0', p), (), 'LISTEN', 100 + i) for i, p in enumerate(self._listen_ports)]
+
+
+class FakeGPU:
+    def __init__(self):
+        self.name = 'Fake GPU'
+        self.load = 0.42
+        self.clock = 1500
+
+
+class FakeGPUtil:
+    def __init__(self, gpus=1):
+        self._gpus = [FakeGPU() for _ in range(gpus)]
+
+    def getGPUs(self):
+        return self._gpus
+
+
+class _FakeSock:
+    def __init__(self, refused=True):
+        self._refused = refused
+
+    def settimeout(self, value):
+        pass
+
+    def connect_ex(self, address):
+        return 111 if self._refused else 0
+
+    def connect(self, address):
+        pass
+
+    def getsockname(self):
+        return ('192.168.1.10', 40000)
+
+    def close(self):
+        pass
+
+
+class FakeSocket:
+    """模拟socket模块：DNS立即返回，连接立即成功或被拒绝"""
+    AF_INET = 2
+    AF_INET6 = 10
+    SOCK_STREAM = 1
+    SOCK_DGRAM = 2
+    timeout = TimeoutError
+    error = OSError
+
+    def __init__(self, online=True):
+        self._online = online
+
+    def gethostname(self):
+        return 'prts-bench'
+
+    def gethostbyname(self, name):
+        return '192.168.1.10'
+
+    def create_connection(self, address, timeout=None, *args, **kwargs):
+        if not self._online:
+            raise OSError("network unreachable")
+        return _FakeSock(refused=False)
+
+    def socket(self, *args, **kwargs):
+        return _FakeSock(refused=True)
+
+    def if_nameindex(self):
+        return [(1, 'lo'), (2, 'eth0')]
+
+
+class FakeSubprocess:
+    """模拟subprocess：ping/netstat/nvidia-smi 返回固定输出"""
+    DEVNULL = subprocess.DEVNULL
+    PIPE = subprocess.PIPE
+    CompletedProcess = subprocess.CompletedProcess
+    TimeoutExpired = subprocess.TimeoutExpired
+
+    def __init__(self, listen_ports=(22, 80, 443)):
+        lines = [f"tcp        0      0 0.0.0.0:{p}            0.0.0.0:*               LISTEN"
+                 for p in listen_ports]
+        self._netstat = "\n".join(lines) + "\n"
+
+    def run(self, cmd, *args, **kwargs):
+        if cmd and cmd[0] == 'ping':
+            out = "64 bytes from 10.0.0.1: icmp_seq=1 ttl=55 time=12.3ms\n"
+        elif cmd and cmd[0] == 'netstat':
+            out = self._netstat
+        elif cmd and cmd[0] == 'nvidia-smi':
+            out = "NVIDIA GeForce RTX 3060\n" if "--query-gpu=name" in cmd else "37, 1500\n"
+        else:
+            out = ""
+        return subprocess.CompletedProcess(cmd, 0, stdout=out, stderr="")
+
+    def check_output(self, cmd, *args, **kwargs):
+        return "1500\n"
+
+
+def make_providers(**kwargs):
+    """生成一套完整的伪造数据源"""
+    return {
+        'psutil': FakePsutil(listen_ports=kwargs.get('listen_ports'), cpu_count=kwargs.get('cpu_count', 8),
+                             processes=kwargs.get('processes', 300)),
+        'GPUtil': FakeGPUtil(gpus=kwargs.get('gpus', 1)),
+        'socket': FakeSocket(online=kwargs.get('online', True)),
+        'subprocess': FakeSubprocess(),
+    }
+
+
+@contextmanager
+def installed(modules, providers=None):
+    """在给定模块上临时替换数据源，退出时恢复"""
+    providers = providers or make_providers()
+    saved = []
+    for mod in modules:
+        for name, fake in providers.items():
+            if hasattr(mod, name):
+                saved.append((mod, name, getattr(mod, name)))
+                setattr(mod, name, fake)
+    try:
+        yield providers
+    finally:
+        for mod, name, original in reversed(saved):
+            setattr(mod, name, original)
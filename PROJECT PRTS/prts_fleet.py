@@ -0,0 +1,580 @@
+# prts_fleet.py
+"""
+多主机模式：采集代理（agent）与汇聚端（aggregator）
+agent 在每台机器上运行，复用采集注册表，每秒通过TCP推送一帧快照；
+aggregator 与所有 agent 各保持一条长连接（断开后指数退避重连），汇总成全体主机状态，
+再推送给 PRTS 窗口。每个下游连接只保留“最新一帧”，慢的接收方只会丢掉中间帧，
+不会让上游缓冲无限增长，也不会反过来拖住 agent。
+
+帧格式：4字节大端长度 + 内容。连接建立后服务端先发 JSON 的 hello（含协议版本与编码），
+之后 agent 的快照按 hello 中声明的编码发送（默认 prts_wire 的二进制差量编码），汇总帧为 JSON。
+
+本机端到端演示（启动3个使用模拟数据的agent、一个汇聚端并打印汇总）：
+    python prts_fleet.py demo --agents 3
+"""
+
+import sys
+import json
+import time
+import socket
+import random
+import struct
+import asyncio
+import argparse
+import threading
+import subprocess
+
+import psutil
+
+import prts_fakes
+import prts_probes
+import prts_procs
+import prts_mounts
+import prts_ifaces
+from prts_probes import REGISTRY, ProbeScheduler
+from prts_wire import CODEC_NAME, SnapshotEncoder, SnapshotDecoder, WireError
+
+PROTO_VERSION = 2
+CODEC_JSON = "json"
+DEFAULT_AGENT_PORT = 9101
+DEFAULT_AGGREGATOR_PORT = 9100
+_HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_json(message):
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_frame(message):
+    payload = encode_json(message)
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _decode_payload(payload):
+    message = json.loads(payload.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ProtocolError("帧内容不是对象")
+    return message
+
+
+async def read_payload(reader):
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"帧过大: {length}")
+    return await reader.readexactly(length)
+
+
+async def read_frame(reader):
+    return _decode_payload(await read_payload(reader))
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("连接已关闭")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    """阻塞式读取一帧（供界面侧的后台线程使用）"""
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if length > MAX_FRAME:
+        raise ProtocolError(f"帧过大: {length}")
+    return _decode_payload(_recv_exact(sock, length))
+
+
+def _check_hello(message, role):
+    if message.get("type") != "hello" or message.get("role") != role:
+        raise ProtocolError(f"期望 {role} 的 hello，收到 {message.get('type')}")
+    if message.get("proto") != PROTO_VERSION:
+        raise ProtocolError(f"协议版本不匹配: {message.get('proto')}")
+    if message.get("codec", CODEC_JSON) not in (CODEC_JSON, CODEC_NAME):
+        raise ProtocolError(f"不支持的编码: {message.get('codec')}")
+
+
+class Backoff:
+    """指数退避：base, 2*base, 4*base ... 封顶 cap，带 ±20% 抖动避免多个连接同时重连"""
+    def __init__(self, base=0.5, cap=30.0):
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+
+    def next(self):
+        delay = min(self.cap, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return delay * random.uniform(0.8, 1.2)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class LatestSlot:
+    """单值邮箱：put 覆盖未发送的旧值（计入 dropped），get 等待新值"""
+    def __init__(self):
+        self._value = None
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, value):
+        if self._event.is_set():
+            self.dropped += 1
+        self._value = value
+        self._event.set()
+
+    async def get(self):
+        await self._event.wait()
+        self._event.clear()
+        value, self._value = self._value, None
+        return value
+
+
+class Broadcaster:
+    """
+    TCP服务端：向每个连接推送 publish() 的最新消息。
+    二进制编码是差量的，每个连接各有一个编码器，在发送时才对该连接上次收到的内容求差，
+    因此丢弃中间帧不会破坏解码状态。
+    """
+    def __init__(self, hello, codec=CODEC_JSON):
+        self.codec = codec
+        self.hello = dict(hello, codec=codec)
+        self._slots = set()
+        self._handlers = set()   # 各连接的发送任务，关闭时一并结束
+        self._server = None
+        self._json_cache = (None, b"")
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    def _encoder(self):
+        if self.codec == CODEC_NAME:
+            return SnapshotEncoder().encode
+        return self._encode_json
+
+    def _encode_json(self, message):
+        # JSON 与连接无关，同一条消息只序列化一次
+        cached, payload = self._json_cache
+        if cached is not message:
+            payload = encode_json(message)
+            self._json_cache = (message, payload)
+        return payload
+
+    async def _handle(self, reader, writer):
+        slot = LatestSlot()
+        encode = self._encoder()
+        task = asyncio.current_task()
+        self._slots.add(slot)
+        self._handlers.add(task)
+        try:
+            writer.write(encode_frame(self.hello))
+            await writer.drain()
+            while True:
+                payload = encode(await slot.get())
+                writer.write(_HEADER.pack(len(payload)) + payload)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._slots.discard(slot)
+            self._handlers.discard(task)
+            writer.close()
+
+    def publish(self, message):
+        for slot in self._slots:
+            slot.put(message)
+
+    def clients(self):
+        return len(self._slots)
+
+    async def close(self):
+        """停止监听并断开已有连接（只关闭监听套接字时，已建立的连接会一直挂着，对端察觉不到下线）"""
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def listening_ports():
+    """本机监听中的TCP端口（升序）"""
+    ports = set()
+    try:
+        for c in psutil.net_connections(kind="inet"):
+            if c.status == 'LISTEN' and c.laddr:
+                ports.add(c.laddr.port)
+    except (psutil.AccessDenied, OSError):
+        pass
+    return sorted(ports)
+
+
+class Agent:
+    """按 interval 采集一次，推送 snapshot 帧"""
+    def __init__(self, name=None, interval=1.0, registry=None, codec=CODEC_NAME):
+        self.name = name or socket.gethostname()
+        self.interval = interval
+        self.registry = registry or REGISTRY
+        self.scheduler = ProbeScheduler(self.registry)
+        self.port = None   # run() 实际监听的端口（传入0时由系统分配）
+        self.seq = 0
+        self._values = {}
+        self.broadcaster = Broadcaster({"type": "hello", "role": "agent", "proto": PROTO_VERSION, "host": self.name},
+                                       codec=codec)
+
+    def snapshot(self):
+        self._values.update(self.scheduler.tick())
+        values, metrics, info = {}, {}, []
+        for probe in self.registry:
+            if probe.name not in self._values:
+                continue
+            ok, value = self._values[probe.name]
+            if probe.label:
+                text = probe.format(value) if ok else probe.fallback
+                if text is not None:
+                    values[probe.name] = text
+            if probe.info:
+                info.append(probe.info(value) if ok else probe.info_fallback)
+            if ok and probe.value_type in (int, float) and value is not None:
+                metrics[probe.name] = value
+        values["info"] = ", ".join(info)
+        self.seq += 1
+        return {"type": "snapshot", "host": self.name, "seq": self.seq, "time": round(time.time(), 3),
+                "values": values, "metrics": metrics, "ports": listening_ports()}
+
+    async def run(self, host="0.0.0.0", port=DEFAULT_AGENT_PORT):
+        port = self.port = await self.broadcaster.start(host, port)
+        print(f"agent {self.name} 监听 {host}:{port}", flush=True)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # 采集（含 net_connections 等可能较慢的调用）放到线程中执行，不阻塞各连接的推送
+                self.broadcaster.publish(await loop.run_in_executor(None, self.snapshot))
+                await asyncio.sleep(self.interval)
+        finally:
+            await self.broadcaster.close()
+            self.scheduler.shutdown()
+
+
+class HostState:
+    __slots__ = ("address", "name", "connected", "snapshot", "received", "reconnects", "error")
+
+    def __init__(self, address):
+        self.address = address
+        self.name = address
+        self.connected = False
+        self.snapshot = None
+        self.received = None   # 最近一帧的单调时钟时间
+        self.reconnects = 0
+        self.error = ""
+
+    def to_dict(self, now):
+        return {
+            "name": self.name,
+            "connected": self.connected,
+            "age": round(now - self.received, 1) if self.received is not None else None,
+            "reconnects": self.reconnects,
+            "error": self.error,
+            "snapshot": self.snapshot,
+        }
+
+
+def parse_address(text, default_port):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+class Aggregator:
+    """对每个 agent 维持一条长连接，定期向下游推送 fleet 帧"""
+    def __init__(self, agents=(), interval=1.0, connect_timeout=3.0):
+        self.interval = interval
+        self.connect_timeout = connect_timeout
+        self.hosts = {}
+        self._tasks = {}
+        self._pending = list(agents)
+        self.port = None   # run() 实际监听的端口
+        self.broadcaster = Broadcaster({"type": "hello", "role": "aggregator", "proto": PROTO_VERSION})
+
+    def add_agent(self, address):
+        if address in self.hosts:
+            return
+        self.hosts[address] = HostState(address)
+        self._tasks[address] = asyncio.create_task(self._link(address))
+
+    async def _link(self, address):
+        state = self.hosts[address]
+        host, port = parse_address(address, DEFAULT_AGENT_PORT)
+        backoff = Backoff()
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.connect_timeout)
+                hello = await read_frame(reader)
+                _check_hello(hello, "agent")
+                decode = SnapshotDecoder().decode if hello.get("codec") == CODEC_NAME else _decode_payload
+                while True:
+                    message = decode(await read_payload(reader))
+                    if message.get("type") != "snapshot":
+                        continue
+                    state.name = message.get("host", address)
+                    state.snapshot = message
+                    state.received = time.monotonic()
+                    if not state.connected:
+                        state.connected = True
+                        state.error = ""
+                        backoff.reset()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError, WireError, ValueError) as e:
+                state.error = str(e) or type(e).__name__
+            finally:
+                if writer is not None:
+                    writer.close()
+            # 只有连上过又断开才算一次重连，首次连接失败不计
+            if state.connected:
+                state.connected = False
+                state.reconnects += 1
+            await asyncio.sleep(backoff.next())
+
+    def fleet(self):
+        now = time.monotonic()
+        return {"type": "fleet", "time": round(time.time(), 3),
+                "hosts": {addr: s.to_dict(now) for addr, s in self.hosts.items()}}
+
+    async def run(self, host="0.0.0.0", port=DEFAULT_AGGREGATOR_PORT):
+        for address in self._pending:
+            self.add_agent(address)
+        port = self.port = await self.broadcaster.start(host, port)
+        print(f"aggregator 监听 {host}:{port}，agent 数 {len(self.hosts)}", flush=True)
+        try:
+            while True:
+                self.broadcaster.publish(self.fleet())
+                await asyncio.sleep(self.interval)
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            await self.broadcaster.close()
+
+
+class FleetClient:
+    """
+    界面侧客户端：后台线程连接 aggregator 并持续读取，只保留最新一帧；
+    界面定时调用 latest() 取数据，读取快慢互不影响。
+    """
+    def __init__(self, address, connect_timeout=3.0):
+        self.host, self.port = parse_address(address, DEFAULT_AGGREGATOR_PORT)
+        self.connect_timeout = connect_timeout
+        self.connected = False
+        self.error = ""
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sock = None
+        self._thread = threading.Thread(target=self._run, name="prts-fleet", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        backoff = Backoff()
+        while not self._stop.is_set():
+            try:
+                self._sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+                self._sock.settimeout(None)
+                _check_hello(recv_frame(self._sock), "aggregator")
+                self.connected = True
+                self.error = ""
+                backoff.reset()
+                while not self._stop.is_set():
+                    message = recv_frame(self._sock)
+                    if message.get("type") == "fleet":
+                        with self._lock:
+                            self._latest = message
+            except (OSError, ProtocolError, ValueError) as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+            self._stop.wait(backoff.next())
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class FleetSimulator:
+    """
+    本地模拟的多主机数据源，接口与 FleetClient 相同（latest/start/stop）。
+    每步只有一部分主机的数值随机游走，其余主机沿用上一步的对象。
+    """
+    def __init__(self, hosts=500, interval=0.2, changed_ratio=0.2, seed=0):
+        self.host, self.port = "simulator", hosts
+        self.connected = True
+        self.error = ""
+        self.interval = interval
+        self.changed_ratio = changed_ratio
+        self._rng = random.Random(seed)
+        self._hosts = {}
+        for i in range(hosts):
+            addr = f"10.0.{i // 250}.{i % 250 + 1}:{DEFAULT_AGENT_PORT}"
+            self._hosts[addr] = self._make_host(f"node-{i + 1:04d}", self._rng.uniform(0, 100),
+                                                self._rng.uniform(10, 90), self._rng.uniform(5, 95))
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prts-fleet-sim", daemon=True)
+        self.step()
+
+    def _make_host(self, name, cpu, mem, disk, connected=True, ports=None):
+        metrics = {"cpu": round(cpu, 1), "mem": round(mem, 1), "disk": round(disk, 1)}
+        values = {k: f"{v:.1f}%" for k, v in metrics.items()}
+        if ports is None:
+            ports = sorted(self._rng.sample(range(1, 10000), self._rng.randint(2, 12)))
+        return {"name": name, "connected": connected, "age": 0.0, "reconnects": 0, "error": "",
+                "snapshot": {"type": "snapshot", "host": name, "values": values, "metrics": metrics, "ports": ports}}
+
+    def step(self):
+        rng = self._rng
+        hosts = dict(self._hosts)
+        for addr in rng.sample(list(hosts), int(len(hosts) * self.changed_ratio)):
+            old = hosts[addr]
+            m = old["snapshot"]["metrics"]
+            walk = lambda v, d: min(100.0, max(0.0, v + rng.uniform(-d, d)))
+            ports = None if rng.random() < 0.05 else old["snapshot"]["ports"]
+            hosts[addr] = self._make_host(old["name"], walk(m["cpu"], 15), walk(m["mem"], 3), walk(m["disk"], 0.5),
+                                          connected=rng.random() > 0.01, ports=ports)
+        self._hosts = hosts
+        fleet = {"type": "fleet", "time": round(time.time(), 3), "hosts": hosts}
+        with self._lock:
+            self._latest = fleet
+        return fleet
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.step()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def stop(self):
+        self._stop.set()
+
+
+def _run_agent(args):
+    agent = Agent(name=args.name, interval=args.interval, codec=args.codec)
+    if args.fake:
+        modules = [prts_probes, prts_procs, prts_mounts, prts_ifaces, sys.modules[__name__]]
+        providers = prts_fakes.make_providers(listen_ports=[22, 80, 443, 8080 + random.randrange(10)])
+        with prts_fakes.installed(modules, providers):
+            asyncio.run(agent.run(args.bind, args.port))
+    else:
+        asyncio.run(agent.run(args.bind, args.port))
+
+
+def _run_aggregator(args):
+    agents = [a for a in args.agents.split(",") if a]
+    asyncio.run(Aggregator(agents, interval=args.interval).run(args.bind, args.port))
+
+
+def _run_demo(args):
+    """在本机启动若干模拟agent子进程与汇聚端，通过 FleetClient 打印汇总"""
+    children = []
+    agents = []
+    for i in range(args.agents):
+        port = args.base_port + 1 + i
+        cmd = [sys.executable, __file__, "agent", "--fake", "--bind", "127.0.0.1", "--port", str(port),
+               "--name", f"agent-{i + 1}"]
+        children.append(subprocess.Popen(cmd, stdout=subprocess.DEVNULL))
+        agents.append(f"127.0.0.1:{port}")
+
+    def serve():
+        asyncio.run(Aggregator(agents).run("127.0.0.1", args.base_port))
+    threading.Thread(target=serve, daemon=True).start()
+    client = FleetClient(f"127.0.0.1:{args.base_port}").start()
+    try:
+        for _ in range(args.duration):
+            time.sleep(1)
+            fleet = client.latest()
+            if fleet is None:
+                print("等待汇聚端...", flush=True)
+                continue
+            up = sum(1 for h in fleet["hosts"].values() if h["connected"])
+            print(f"在线 {up}/{len(fleet['hosts'])}", flush=True)
+            for h in fleet["hosts"].values():
+                snap = h["snapshot"] or {}
+                values = snap.get("values", {})
+                print(f"  {h['name']:<10} CPU {values.get('cpu', '-'):>6}  MEM {values.get('mem', '-'):>6}"
+                      f"  ports {len(snap.get('ports', []))}  age {h['age']}", flush=True)
+    finally:
+        client.stop()
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.wait()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PRTS 多主机模式")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("agent", help="采集本机并推送快照")
+    p.add_argument("--bind", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_AGENT_PORT)
+    p.add_argument("--name", default=None, help="主机显示名，默认使用主机名")
+    p.add_argument("--interval", type=float, default=1.0)
+    p.add_argument("--fake", action="store_true", help="使用模拟数据（本机演示用）")
+    p.add_argument("--codec", choices=(CODEC_NAME, CODEC_JSON), default=CODEC_NAME, help="快照编码")
+
+    p = sub.add_parser("aggregate", help="连接多个agent并向PRTS窗口推送汇总")
+    p.add_argument("--bind", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_AGGREGATOR_PORT)
+    p.add_argument("--agents", required=True, help="逗号分隔的 host:port 列表")
+    p.add_argument("--interval", type=float, default=1.0)
+
+    p = sub.add_parser("demo", help="本机端到端演示")
+    p.add_argument("--agents", type=int, default=3)
+    p.add_argument("--base-port", type=int, default=19100)
+    p.add_argument("--duration", type=int, default=10, help="运行秒数")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.mode == "agent":
+            _run_agent(args)
+        elif args.mode == "aggregate":
+            _run_aggregator(args)
+        else:
+            return _run_demo(args)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
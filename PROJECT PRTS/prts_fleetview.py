@@ -0,0 +1,251 @@
+# prts_fleetview.py
+"""
+多主机面板
+QTableView + 自定义模型：只绘制可见行，数百台主机也不会创建成千上万个 QLabel。
+数据源（FleetClient / FleetSimulator）只在每秒一次的定时器中读取，重绘频率上限 1Hz；
+排序列的值变化时只把变化的行用二分插入重新定位，变化过多时才整体重排。
+
+本地模拟 500 台主机：
+    python prts_fleetview.py --simulate 500
+"""
+
+import sys
+import bisect
+import argparse
+
+from PySide6.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QFont, QColor
+
+from prts_fleet import FleetSimulator
+
+# (字段, 表头)；数值列为 None 时表示无数据
+COLUMNS = (("name", "主机"), ("status", "状态"), ("cpu", "CPU"), ("mem", "MEM"),
+           ("disk", "Disk"), ("ports", "Ports"), ("age", "Age"))
+_PERCENT = {2, 3, 4}
+# 超过该比例的行需要重新定位时直接整体排序
+_RESORT_RATIO = 0.125
+
+_OFFLINE = QColor("#FF5555")
+_ONLINE = QColor("#F8F8F8")
+_DISPLAY = Qt.DisplayRole.value
+_FOREGROUND = Qt.ForegroundRole.value
+_ALIGNMENT = Qt.TextAlignmentRole.value
+_ALIGN_RIGHT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+def _host_row(host):
+    snap = host.get("snapshot") or {}
+    metrics = snap.get("metrics", {})
+    return (host["name"], "在线" if host["connected"] else "离线",
+            metrics.get("cpu"), metrics.get("mem"), metrics.get("disk"),
+            len(snap.get("ports", ())), host.get("age"))
+
+
+def _row_text(row):
+    """行的显示文本，只在行数据变化时生成"""
+    texts = []
+    for col, value in enumerate(row):
+        if value is None:
+            texts.append("-")
+        elif col in _PERCENT:
+            texts.append(f"{value:.1f}%")
+        elif col == 6:
+            texts.append(f"{value:.0f}s")
+        else:
+            texts.append(str(value))
+    return tuple(texts)
+
+
+class FleetModel(QAbstractTableModel):
+    """
+    行数据按地址保存为元组，_order 为按当前排序列升序排列的 (无数据, 值, 地址) 列表；
+    降序显示时反向取下标，切换升降序无需重排。
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = {}
+        self._text = {}
+        self._order = []
+        self._sort_col = 0
+        self._descending = False
+
+    # ---- Qt 模型接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def _addr(self, row):
+        order = self._order
+        return order[len(order) - 1 - row][2] if self._descending else order[row][2]
+
+    def data(self, index, role=Qt.DisplayRole):
+        # 每个可见单元格每次绘制会按多个角色各调用一次，先按整数角色快速分流
+        if role == _DISPLAY:
+            return self._text[self._addr(index.row())][index.column()]
+        if role == _FOREGROUND:
+            return _ONLINE if self._rows[self._addr(index.row())][1] == "在线" else _OFFLINE
+        if role == _ALIGNMENT and index.column() >= 2:
+            return _ALIGN_RIGHT
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort_col = column
+        self._descending = order == Qt.DescendingOrder
+        self._order = sorted(self._key(addr, row) for addr, row in self._rows.items())
+        self.layoutChanged.emit()
+
+    # ---- 数据更新 ----
+
+    def _key(self, addr, row):
+        value = row[self._sort_col]
+        # 无数据的行排在末尾；地址作为次键保证键唯一
+        return (value is None, 0 if value is None else value, addr)
+
+    def _display_row(self, pos):
+        return len(self._order) - 1 - pos if self._descending else pos
+
+    def set_fleet(self, fleet):
+        """应用一帧汇总数据，返回发生变化的行数"""
+        hosts = fleet["hosts"]
+        rows = self._rows
+        if hosts.keys() != rows.keys():
+            # 主机增减：整体重建
+            self.beginResetModel()
+            self._rows = {addr: _host_row(h) for addr, h in hosts.items()}
+            self._text = {addr: _row_text(row) for addr, row in self._rows.items()}
+            self._order = sorted(self._key(addr, row) for addr, row in self._rows.items())
+            self.endResetModel()
+            return len(hosts)
+
+        col = self._sort_col
+        changed = []
+        for addr, host in hosts.items():
+            row = _host_row(host)
+            old = rows[addr]
+            if row != old:
+                rows[addr] = row
+                self._text[addr] = _row_text(row)
+                changed.append((addr, old, row))
+        if not changed:
+            return 0
+
+        moving = [(addr, old, row) for addr, old, row in changed if old[col] != row[col]]
+        order = self._order
+        if len(moving) > len(order) * _RESORT_RATIO:
+            self.layoutAboutToBeChanged.emit()
+            self._order = sorted(self._key(addr, row) for addr, row in rows.items())
+            self.layoutChanged.emit()
+            return len(changed)
+        if moving:
+            new_order = list(order)
+            moved = False
+            for addr, old, row in moving:
+                old_key, new_key = self._key(addr, old), self._key(addr, row)
+                i = bisect.bisect_left(new_order, old_key)
+                del new_order[i]
+                j = bisect.bisect_left(new_order, new_key)
+                new_order.insert(j, new_key)
+                moved |= i != j
+            if moved:
+                self.layoutAboutToBeChanged.emit()
+                self._order = new_order
+                self.layoutChanged.emit()
+                return len(changed)
+            self._order = new_order
+        # 行位置不变：只通知变化的行范围
+        positions = [self._display_row(bisect.bisect_left(self._order, self._key(addr, row)))
+                     for addr, _, row in changed]
+        last_col = len(COLUMNS) - 1
+        self.dataChanged.emit(self.index(min(positions), 0), self.index(max(positions), last_col))
+        return len(changed)
+
+
+class FleetPanel(QWidget):
+    """独立小窗口：每秒从数据源取一次最新汇总"""
+    def __init__(self, client, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self._last = None
+        self.setWindowTitle("PRTS Fleet")
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setStyleSheet("background: #23272E; color: #F8F8F8;")
+        self.title = QLabel(self)
+        self.title.setFont(QFont("Bender", 12, QFont.Bold))
+        self.title.setStyleSheet("color: #FFB400;")
+
+        self.model = FleetModel(self)
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(0, Qt.AscendingOrder)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setFont(QFont("Consolas", 10))
+        # 固定行高与列宽，避免按内容计算尺寸时遍历全部行
+        vheader = self.view.verticalHeader()
+        vheader.setVisible(False)
+        vheader.setSectionResizeMode(QHeaderView.Fixed)
+        vheader.setDefaultSectionSize(20)
+        hheader = self.view.horizontalHeader()
+        hheader.setSectionResizeMode(QHeaderView.Interactive)
+        hheader.setStretchLastSection(True)
+        for col, width in enumerate((130, 50, 70, 70, 70, 55, 50)):
+            self.view.setColumnWidth(col, width)
+        self.view.setStyleSheet("QTableView { background: #23272E; border: none; }"
+                                "QHeaderView::section { background: #23272E; color: #FFB400; border: none; }")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.addWidget(self.title)
+        layout.addWidget(self.view)
+        self.resize(560, 420)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        fleet = self.client.latest()
+        if fleet is None:
+            state = "已连接" if self.client.connected else f"连接中… {self.client.error}"
+            self.title.setText(f"FLEET {self.client.host}:{self.client.port}  {state}")
+            return
+        if fleet is self._last:
+            return
+        self._last = fleet
+        self.model.set_fleet(fleet)
+        hosts = fleet["hosts"]
+        up = sum(1 for h in hosts.values() if h["connected"])
+        self.title.setText(f"FLEET 在线 {up}/{len(hosts)}")
+
+    def close_panel(self):
+        self._timer.stop()
+        self.client.stop()
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多主机面板（本地模拟数据）")
+    parser.add_argument("--simulate", type=int, default=500, help="模拟主机数")
+    args, qt_args = parser.parse_known_args(argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    panel = FleetPanel(FleetSimulator(hosts=args.simulate).start())
+    panel.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# prts_heatmap.py
+"""
+逐核CPU热力图
+数据来自 prts_probes.PerCoreSampler（每次刷新一次逐核采样，numpy整体求差分）；
+热力图是一张每核一个像素的缓存图像，原地更新颜色后整体放大绘制
+"""
+
+import numpy as np
+
+from PySide6.QtWidgets import QWidget, QToolTip, QSizePolicy
+from PySide6.QtCore import QRect, QEvent
+from PySide6.QtGui import QImage, QPainter
+
+
+def _build_palette():
+    """0~100% 的颜色表：深灰 -> 青 -> 黄 -> 红，与主界面配色一致"""
+    stops = [(0, (0x2E, 0x33, 0x3B)), (40, (0x00, 0xCF, 0xFF)), (75, (0xFF, 0xB4, 0x00)), (100, (0xFF, 0x4C, 0x4C))]
+    palette = np.zeros(101, dtype=np.uint32)
+    for (p0, c0), (p1, c1) in zip(stops, stops[1:]):
+        for p in range(p0, p1 + 1):
+            t = (p - p0) / (p1 - p0)
+            r, g, b = (int(a + (b_ - a) * t) for a, b_ in zip(c0, c1))
+            palette[p] = 0xFF000000 | (r << 16) | (g << 8) | b
+    return palette
+
+
+class CpuHeatmap(QWidget):
+    """逐核热力图控件：一张缓存图像，每核一个像素，绘制时按格子放大"""
+    PALETTE = _build_palette()
+
+    def __init__(self, cores=1, columns=32, cell=12, parent=None):
+        super().__init__(parent)
+        self._columns = columns
+        self._cell = cell
+        self._values = np.zeros(0, dtype=np.float32)
+        self._buf = None
+        self._image = None
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setMouseTracking(True)
+        self._resize_image(cores)
+
+    def _resize_image(self, n):
+        cols = min(self._columns, n)
+        rows = (n + cols - 1) // cols
+        # 图像直接引用numpy缓冲区，更新缓冲区即更新图像
+        self._buf = np.zeros((rows, cols), dtype=np.uint32)
+        self._buf[:] = 0xFF23272E
+        self._image = QImage(self._buf.data, cols, rows, cols * 4, QImage.Format_RGB32)
+        self._n = n
+        self.setFixedHeight(rows * self._cell)
+        self.updateGeometry()
+
+    def set_values(self, values):
+        """values: 各核占用百分比数组"""
+        n = len(values)
+        if n == 0:
+            return
+        if n != self._n:
+            self._resize_image(n)
+        self._values = values
+        idx = np.clip(values, 0, 100).astype(np.intp)
+        self._buf.reshape(-1)[:n] = self.PALETTE[idx]
+        self.update()
+
+    def _grid_width(self):
+        # 核心较少时格子宽度不超过高度的2倍，避免拉成长条
+        cols = self._buf.shape[1]
+        return min(self.width(), cols * self._cell * 2)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        # 最近邻放大，保持格子边缘锐利
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        rows, cols = self._buf.shape
+        painter.drawImage(QRect(0, 0, self._grid_width(), rows * self._cell), self._image)
+        painter.end()
+
+    def event(self, e):
+        # 悬停提示：核心编号与占用率
+        if e.type() == QEvent.ToolTip and len(self._values):
+            rows, cols = self._buf.shape
+            col = int(e.pos().x() * cols / max(1, self._grid_width()))
+            row = int(e.pos().y() / self._cell)
+            core = row * cols + col
+            if 0 <= col < cols and 0 <= core < len(self._values):
+                QToolTip.showText(e.globalPos(), f"CPU{core}: {self._values[core]:.0f}%", self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().event(e)
@@ -0,0 +1,155 @@
+# prts_ifaces.py
+"""
+网卡与地址表
+由内核网卡列表构建，只在网卡集合或地址变化、或超过 max_age 时重建，热路径上不做任何DNS解析。
+主出口地址通过对公网IP字面量 connect 一个UDP套接字得到（不发送数据包），
+避免 gethostbyname(gethostname()) 在多网卡主机上返回 127.0.1.1 或被慢DNS卡住。
+"""
+
+import os
+import time
+import socket
+from collections import namedtuple
+
+import psutil
+
+# 出口探测目标，只用于让内核选路，不会真正发包
+PROBE_TARGETS = {socket.AF_INET: ("8.8.8.8", 80), socket.AF_INET6: ("2001:4860:4860::8888", 80)}
+
+VIRTUAL_NIC_PREFIXES = ("lo", "loopback", "docker", "br-", "veth", "virbr", "vmnet", "vethernet")
+WIRELESS_HINTS = ("wi-fi", "wlan", "wlp", "wifi", "无线")
+WIRED_HINTS = ("eth", "enp", "eno", "ens", "以太网")
+
+# Linux 下的地址表：IPv4 本机地址与路由在 fib_trie 中，IPv6 地址逐行列在 if_inet6
+ADDR_TABLES = ("/proc/net/fib_trie", "/proc/net/if_inet6")
+
+Interface = namedtuple("Interface", "name isup speed mtu kind mac ipv4 ipv6")
+
+
+def is_virtual_nic(name):
+    return name.lower().startswith(VIRTUAL_NIC_PREFIXES)
+
+
+def _kind(name, flags=""):
+    """网卡类型：回环 / 无线 / 有线 / 虚拟 / 未知"""
+    lower = name.lower()
+    if lower.startswith(("lo", "loopback")) or "loopback" in flags:
+        return "回环"
+    if os.path.exists(f"/sys/class/net/{name}/wireless") or any(h in lower for h in WIRELESS_HINTS):
+        return "无线"
+    if is_virtual_nic(name):
+        return "虚拟"
+    if any(h in lower for h in WIRED_HINTS):
+        return "有线"
+    return "未知"
+
+
+def _read_tables(paths):
+    """各地址表的原始内容，不存在或不可读的为 None"""
+    tables = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                tables.append(f.read())
+        except OSError:
+            tables.append(None)
+    return tuple(tables)
+
+
+class InterfaceTable:
+    """
+    check() 每次只取网卡名称列表和 Linux 地址表的原始内容作为签名，签名变化或过期时才重建整张表；
+    地址、默认路由变化在下一次 check() 即生效。其他平台没有廉价的地址签名，
+    地址变化最迟 max_age 秒后生效。
+    interfaces: {名称: Interface}；primary: (地址, 网卡名)。
+    """
+    def __init__(self, max_age=10.0, addr_tables=ADDR_TABLES):
+        self.max_age = max_age
+        self.addr_tables = addr_tables
+        self.interfaces = {}
+        self.primary = (None, None)
+        self.generation = 0  # 每次重建后加1
+        self._signature = None
+        self._built = 0.0
+
+    def _signature_now(self):
+        try:
+            names = tuple(socket.if_nameindex())
+        except (AttributeError, OSError):
+            names = tuple(psutil.net_if_stats())
+        return names, _read_tables(self.addr_tables)
+
+    def check(self, now=None):
+        """必要时重建，返回是否发生了重建"""
+        now = time.monotonic() if now is None else now
+        signature = self._signature_now()
+        if signature == self._signature and now - self._built < self.max_age:
+            return False
+        self._signature = signature
+        self._built = now
+        self._rebuild()
+        return True
+
+    def _rebuild(self):
+        stats = psutil.net_if_stats()
+        addrs = psutil.net_if_addrs()
+        link = getattr(psutil, "AF_LINK", -1)
+        table = {}
+        for name in stats.keys() | addrs.keys():
+            st = stats.get(name)
+            ipv4, ipv6, mac = [], [], None
+            for a in addrs.get(name, ()):
+                if a.family == socket.AF_INET:
+                    ipv4.append(a.address)
+                elif a.family == socket.AF_INET6:
+                    ipv6.append(a.address.split("%", 1)[0])
+                elif a.family == link:
+                    mac = a.address
+            table[name] = Interface(name, bool(st and st.isup), st.speed if st else 0, st.mtu if st else 0,
+                                    _kind(name, getattr(st, "flags", "") if st else ""), mac, ipv4, ipv6)
+        self.interfaces = table
+        self.primary = self._find_primary()
+        self.generation += 1
+
+    def _outbound(self, family):
+        s = socket.socket(family, socket.SOCK_DGRAM)
+        try:
+            s.connect(PROBE_TARGETS[family])
+            return s.getsockname()[0]
+        finally:
+            s.close()
+
+    def owner(self, address):
+        for iface in self.interfaces.values():
+            if address in iface.ipv4 or address in iface.ipv6:
+                return iface.name
+        return None
+
+    def _find_primary(self):
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                address = self._outbound(family)
+            except (OSError, KeyError):
+                continue
+            if address and not address.startswith("127."):
+                return address, self.owner(address)
+        # 没有默认路由时退回第一个已启用的非回环、非虚拟网卡
+        candidates = sorted(self.interfaces.values(), key=lambda i: (i.kind == "虚拟", i.name))
+        for iface in candidates:
+            if iface.isup and iface.kind != "回环" and iface.ipv4:
+                return iface.ipv4[0], iface.name
+        return None, None
+
+    def describe(self):
+        """每个网卡一行：名称 类型 速率 地址"""
+        lines = []
+        for name in sorted(self.interfaces):
+            i = self.interfaces[name]
+            speed = f"{i.speed}Mbps" if i.speed else "-"
+            state = "" if i.isup else " (down)"
+            lines.append(f"{name} [{i.kind}] {speed}{state}: {', '.join(i.ipv4 + i.ipv6) or '无地址'}")
+        return "\n".join(lines)
+
+
+# 进程内共享的一张表，IP、网卡类型等采集项共用
+IFACES = InterfaceTable()
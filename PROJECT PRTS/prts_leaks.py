@@ -0,0 +1,135 @@
+# prts_leaks.py
+"""
+长时间运行的资源泄漏监测
+定期记录本进程的 RSS、打开的文件描述符（Windows 为句柄）、线程数、Qt 对象数、顶层窗口数与 Python 对象数，
+用最近一段时间的线性回归斜率给出每小时增长量；开启 tracemalloc 时定期与首个快照比较，列出增长最多的分配位置。
+作为 leaks 采集项在界面线程运行（Qt 对象只能在界面线程遍历），周期较长，结果挂在诊断的 leaks 段。
+"""
+
+import gc
+import time
+import threading
+import tracemalloc
+from collections import deque
+
+import psutil
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QApplication
+
+# 参与趋势判断的字段
+FIELDS = ("rss_mb", "fds", "threads", "qt_objects", "windows", "py_objects")
+# 样本覆盖的时间不足该秒数时不给出每小时增长（外推误差太大）
+MIN_TREND_SPAN = 600
+
+
+def qt_object_count():
+    """(QObject 总数, 顶层窗口数)：QApplication 的子对象 + 各顶层窗口及其子对象"""
+    app = QApplication.instance()
+    if app is None:
+        return 0, 0
+    windows = app.topLevelWidgets()
+    total = 1 + len(app.findChildren(QObject))
+    for widget in windows:
+        total += 1 + len(widget.findChildren(QObject))
+    return total, len(windows)
+
+
+def open_handles(proc):
+    try:
+        return proc.num_fds()
+    except AttributeError:   # Windows
+        return proc.num_handles()
+
+
+def slope_per_hour(points):
+    """[(时间, 数值)] 的最小二乘斜率，换算为每小时变化量"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mt = sum(t for t, _ in points) / n
+    mv = sum(v for _, v in points) / n
+    den = sum((t - mt) ** 2 for t, _ in points)
+    if den == 0:
+        return 0.0
+    return sum((t - mt) * (v - mv) for t, v in points) / den * 3600
+
+
+class LeakMonitor:
+    """
+    作为采集项调用时记录一个样本并返回它；samples 保存最近 window 个样本。
+    trace_frames > 0 时启动 tracemalloc，每 trace_every 个样本比较一次分配。
+    """
+    def __init__(self, window=360, trace_frames=0, trace_every=6, top=5, clock=time.monotonic):
+        self.samples = deque(maxlen=window)
+        self.trace_every = trace_every
+        self.top = top
+        self.clock = clock
+        self.allocations = []    # [(位置, 增长KB, 增长个数)]
+        self._proc = psutil.Process()
+        self._baseline = None
+        self._count = 0
+        if trace_frames:
+            self.start_tracing(trace_frames)
+
+    def start_tracing(self, frames=1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def __call__(self):
+        return self.sample()
+
+    def sample(self):
+        qt_objects, windows = qt_object_count()
+        sample = {
+            "time": self.clock(),
+            "rss_mb": round(self._proc.memory_info().rss / 2 ** 20, 2),
+            "fds": open_handles(self._proc),
+            "threads": threading.active_count(),
+            "qt_objects": qt_objects,
+            "windows": windows,
+            "py_objects": len(gc.get_objects()),
+        }
+        self.samples.append(sample)
+        self._count += 1
+        if self._baseline is not None and self._count % self.trace_every == 0:
+            self.allocations = self.top_allocations()
+        return sample
+
+    def top_allocations(self):
+        """与首个快照相比增长最多的分配位置"""
+        if self._baseline is None:
+            return []
+        diff = self._snapshot().compare_to(self._baseline, "lineno")
+        top = []
+        for stat in diff[:self.top]:
+            frame = stat.traceback[0]
+            top.append((f"{frame.filename}:{frame.lineno}", round(stat.size_diff / 1024, 1), stat.count_diff))
+        return top
+
+    def growth(self, since=None):
+        """各字段每小时的增长量（since 之后的样本）"""
+        samples = [s for s in self.samples if since is None or s["time"] >= since]
+        return {field: round(slope_per_hour([(s["time"], s[field]) for s in samples]), 2) for field in FIELDS}
+
+    def stats(self):
+        """诊断段：当前值、每小时增长与 tracemalloc 增长 Top N"""
+        if not self.samples:
+            return {}
+        last = self.samples[-1]
+        rows = {"process": {field: last[field] for field in FIELDS}}
+        if last["time"] - self.samples[0]["time"] >= MIN_TREND_SPAN:
+            rows["growth_per_h"] = self.growth()
+        for i, (where, kb, count) in enumerate(self.allocations, 1):
+            rows[f"alloc{i}"] = {"where": where, "kb": kb, "count": count}
+        return rows
+
+
+LEAKS = LeakMonitor()
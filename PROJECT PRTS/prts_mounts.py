@@ -0,0 +1,195 @@
+# prts_mounts.py
+"""
+挂载点监视
+Linux 下对 /proc/self/mountinfo 做 poll()：挂载表变化时内核会置 POLLPRI/POLLERR，
+只有收到通知时才重新解析挂载列表；其他平台按固定间隔比较 psutil.disk_partitions()。
+容量查询在后台线程中异步执行，每个挂载点同时最多一个查询并有超时，
+卡死的 NFS/CIFS 挂载只会让对应条目显示“无响应”，不会阻塞界面。
+"""
+
+import os
+import sys
+import time
+import select
+import threading
+from collections import namedtuple
+
+import psutil
+
+MOUNTINFO = "/proc/self/mountinfo"
+NETWORK_FSTYPES = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "sshfs", "fuse.sshfs", "9p", "afs", "ceph", "glusterfs")
+
+Mount = namedtuple("Mount", "device mountpoint fstype opts removable network")
+
+
+def _unescape(path):
+    # mountinfo 中空格等字符以八进制转义
+    return path.replace("\\040", " ").replace("\\011", "\t").replace("\\012", "\n").replace("\\134", "\\")
+
+
+def _is_removable(device):
+    """/sys/class/block/<设备>/removable，分区则看所属整盘"""
+    if not device.startswith("/dev/"):
+        return False
+    name = os.path.basename(os.path.realpath(device))
+    path = os.path.realpath(f"/sys/class/block/{name}")
+    for candidate in (path, os.path.dirname(path)):
+        try:
+            with open(os.path.join(candidate, "removable")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return False
+
+
+def parse_mountinfo(text):
+    mounts = []
+    for line in text.splitlines():
+        left, sep, right = line.partition(" - ")
+        if not sep:
+            continue
+        lf = left.split()
+        rf = right.split()
+        if len(lf) < 6 or len(rf) < 2:
+            continue
+        mountpoint = _unescape(lf[4])
+        fstype, device = rf[0], _unescape(rf[1])
+        mounts.append(Mount(device, mountpoint, fstype, lf[5], _is_removable(device),
+                            fstype in NETWORK_FSTYPES))
+    return mounts
+
+
+class MountWatcher:
+    """挂载表变化通知；mounts() 只在变化后重新解析"""
+    def __init__(self, fallback_interval=10.0):
+        self._mounts = []
+        self._fallback_interval = fallback_interval
+        self._next_check = 0.0
+        self._file = None
+        self._poller = None
+        self.generation = 0  # 挂载表每变化一次加1
+        if sys.platform.startswith("linux") and os.path.exists(MOUNTINFO):
+            self._file = open(MOUNTINFO, "rb")
+            self._poller = select.poll()
+            self._poller.register(self._file.fileno(), select.POLLPRI | select.POLLERR)
+            self._reload()
+
+    def _reload(self):
+        if self._file is not None:
+            self._file.seek(0)
+            mounts = parse_mountinfo(self._file.read().decode("utf-8", "replace"))
+        else:
+            mounts = [Mount(p.device, p.mountpoint, p.fstype, p.opts,
+                            'removable' in p.opts.lower() or p.fstype == '',
+                            p.fstype.lower() in NETWORK_FSTYPES)
+                      for p in psutil.disk_partitions()]
+        changed = mounts != self._mounts
+        if changed:
+            self._mounts = mounts
+            self.generation += 1
+        return changed
+
+    def check(self):
+        """非阻塞检查挂载表是否变化，变化时重新解析并返回 True"""
+        if self._poller is not None:
+            if not self._poller.poll(0):
+                return False
+            return self._reload()
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self._fallback_interval
+        return self._reload()
+
+    def mounts(self):
+        return self._mounts
+
+    def close(self):
+        if self._file is not None:
+            self._poller.unregister(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._poller = None
+
+
+class UsageCache:
+    """
+    异步容量查询：get() 立即返回缓存结果，过期时在后台线程刷新。
+    每个挂载点同时最多一个查询线程，超过 timeout 未返回即标记为无响应。
+    """
+    def __init__(self, max_age=30.0, timeout=2.0):
+        self.max_age = max_age
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._results = {}   # 挂载点 -> (完成时间, usage 或 异常)
+        self._inflight = {}  # 挂载点 -> 开始时间
+
+    def _query(self, mountpoint):
+        try:
+            result = psutil.disk_usage(mountpoint)
+        except Exception as e:
+            result = e
+        with self._lock:
+            self._results[mountpoint] = (time.monotonic(), result)
+            self._inflight.pop(mountpoint, None)
+
+    def get(self, mountpoint):
+        """返回 (状态, usage)：状态为 ok / pending / stuck / error"""
+        now = time.monotonic()
+        with self._lock:
+            started = self._inflight.get(mountpoint)
+            cached = self._results.get(mountpoint)
+            if started is None and (cached is None or now - cached[0] > self.max_age):
+                self._inflight[mountpoint] = now
+                threading.Thread(target=self._query, args=(mountpoint,), daemon=True,
+                                 name=f"prts-usage:{mountpoint}").start()
+                started = now
+        if started is not None and now - started > self.timeout:
+            return "stuck", None
+        if cached is None:
+            return "pending", None
+        if isinstance(cached[1], Exception):
+            return "error", None
+        return "ok", cached[1]
+
+    def stuck(self):
+        """当前超时未返回的挂载点"""
+        now = time.monotonic()
+        with self._lock:
+            return [mp for mp, t in self._inflight.items() if now - t > self.timeout]
+
+    def forget(self, keep):
+        """清理已卸载挂载点的缓存（查询中的保留，等其自行结束）"""
+        with self._lock:
+            for mp in list(self._results):
+                if mp not in keep:
+                    del self._results[mp]
+
+
+class RemovableMounts:
+    """
+    可移动设备列表：挂载表变化时才重新筛选，容量取自 UsageCache。
+    返回信息栏文本行，与原 usb 检测的格式一致。
+    """
+    def __init__(self, watcher=None, usage=None):
+        self.watcher = watcher or MountWatcher()
+        self.usage = usage or UsageCache()
+        self._removable = []
+        self._generation = -1
+
+    def __call__(self):
+        self.watcher.check()
+        if self._generation != self.watcher.generation:
+            self._generation = self.watcher.generation
+            self._removable = [m for m in self.watcher.mounts() if m.removable]
+            self.usage.forget({m.mountpoint for m in self._removable})
+        lines = []
+        for m in self._removable:
+            state, usage = self.usage.get(m.mountpoint)
+            if state == "ok":
+                lines.append(f"USB[{m.device}]: {usage.total//(1024**3)}GB 已挂载")
+            elif state == "stuck":
+                lines.append(f"USB[{m.device}]: 无响应")
+            else:
+                lines.append(f"USB[{m.device}]: 已挂载")
+        return lines
@@ -0,0 +1,524 @@
+# prts_ports.py
+"""
+监听端口 -> 所属进程
+Linux 下从 /proc/net/{tcp,udp}{,6} 取监听套接字的 inode，再用 inode -> PID 索引找到进程。
+索引来自扫描 /proc/<pid>/fd 的符号链接（socket:[inode]），只在端口集合变化时更新：
+先只扫描新出现的PID；仍有找不到归属的 inode 且之前没尝试过时才完整重扫一次。
+其他平台使用 psutil.net_connections 自带的 pid。
+结果按 (端口, 协议) 索引，协议为 "tcp" / "udp"。
+ListenerHistory 记录各端口的监听开始/结束时间与重启次数，用来发现反复崩溃重启的服务。
+SocketTable 一次读完内核套接字表，同时得到监听集合、监听 inode 和各监听端口的连接状态计数。
+PortScanner 是端口栏的数据源（作为采集项在后台线程运行），每次返回一份不可变的 PortScan。
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import platform
+import itertools
+from collections import deque, OrderedDict, namedtuple
+
+import psutil
+
+from prts_diag import DIAG
+from prts_workers import run_command
+from prts_services import COMMON_PORTS
+
+PROC = "/proc"
+TCP_LISTEN = "0A"
+UDP_UNCONNECTED = "07"
+
+# FLAP_WINDOW 秒内重启 FLAP_THRESHOLD 次视为频繁重启
+FLAP_WINDOW = 300
+FLAP_THRESHOLD = 3
+
+# 每个监听端口的连接计数：各状态连接数与 LISTEN 套接字的 Recv-Q（已完成握手、等待 accept 的连接数）
+ConnCounts = namedtuple("ConnCounts", "established syn_recv time_wait close_wait accept_queue")
+_COLS = len(ConnCounts._fields)
+# 一次端口扫描的结果：tcp/udp 为端口集合，active 为排好序的 (端口, 协议)，
+# owners 为 {(端口, 协议): (pid, 进程名)}，counts 为 端口 -> ConnCounts 的查询函数（SocketTable.frozen_counts）
+PortScan = namedtuple("PortScan", "tcp udp active owners counts")
+_STATE_COLUMN = {"01": 0, "03": 1, "06": 2, "08": 3}
+_PSUTIL_COLUMN = {"ESTABLISHED": 0, "SYN_RECV": 1, "TIME_WAIT": 2, "CLOSE_WAIT": 3}
+
+# /proc/net 下的表 -> (协议, 视为“监听”的状态)
+_TABLES = (("tcp", "tcp", TCP_LISTEN), ("tcp6", "tcp", TCP_LISTEN),
+           ("udp", "udp", UDP_UNCONNECTED), ("udp6", "udp", UDP_UNCONNECTED))
+
+
+def listen_inodes(root=PROC):
+    """返回 {inode: (端口, 协议)}：TCP 取 LISTEN，UDP 取未连接的已绑定套接字；root 为 /proc 的路径"""
+    inodes = {}
+    for name, proto, state in _TABLES:
+        try:
+            with open(f"{root}/net/{name}", encoding="ascii") as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10 or fields[3] != state:
+                        continue
+                    inode = int(fields[9])
+                    port = int(fields[1].rpartition(":")[2], 16)
+                    if inode and port:
+                        inodes[inode] = (port, proto)
+        except OSError:
+            continue
+    return inodes
+
+
+def _read_comm(root, pid):
+    try:
+        with open(f"{root}/{pid}/comm", encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return "?"
+
+
+class InodeIndex:
+    """套接字 inode -> PID；记录每个PID扫描到的 inode，进程退出时整体移除。root 为 /proc 的路径"""
+    def __init__(self, root=PROC):
+        self.root = root
+        self._owner = {}     # inode -> pid
+        self._by_pid = {}    # pid -> 该进程持有的套接字 inode 集合
+        self._names = {}     # pid -> 进程名
+        self.scanned = 0     # 累计扫描的进程数（诊断用）
+
+    def _pids(self):
+        return {int(name) for name in os.listdir(self.root) if name.isdigit()}
+
+    def _scan(self, pid):
+        inodes = set()
+        fd_dir = f"{self.root}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            fds = ()   # 进程已退出或无权限
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(int(target[8:-1]))
+        for inode in self._by_pid.get(pid, ()):
+            if self._owner.get(inode) == pid:
+                del self._owner[inode]
+        self._by_pid[pid] = inodes
+        for inode in inodes:
+            self._owner[inode] = pid
+        self.scanned += 1
+
+    def refresh(self, full=False):
+        """扫描新出现的PID（full=True 时扫描全部PID）"""
+        pids = self._pids()
+        for pid in self._by_pid.keys() - pids:
+            for inode in self._by_pid.pop(pid):
+                if self._owner.get(inode) == pid:
+                    del self._owner[inode]
+            self._names.pop(pid, None)
+        for pid in (pids if full else pids - self._by_pid.keys()):
+            self._scan(pid)
+
+    def owner(self, inode):
+        return self._owner.get(inode)
+
+    def name(self, pid):
+        name = self._names.get(pid)
+        if name is None:
+            name = self._names[pid] = _read_comm(self.root, pid)
+        return name
+
+
+class PortOwners:
+    """
+    update(监听集合) 返回 {(端口, 协议): (pid, 进程名)}；没有变化时直接返回上次结果。
+    procfs 路径以监听套接字的 inode 集合判断是否变化：服务在同一端口上重启会换一个新 inode，
+    端口集合不变也会重新解析归属（新PID）。psutil 路径只能以监听集合判断，
+    监听集合可以是端口或 (端口, 协议)。
+    """
+    def __init__(self, procfs=None):
+        self.procfs = sys.platform.startswith("linux") if procfs is None else procfs
+        self.index = InodeIndex()
+        self.owners = {}
+        self._key = None          # 上次解析时的 inode 集合（psutil 路径为监听集合）
+        self._attempted = set()   # 已为其完整重扫过的 inode
+        self._names = {}          # 非procfs路径：pid -> 进程名
+
+    def update(self, ports, inodes=None):
+        """inodes: 已读到的 {inode: (端口, 协议)}（SocketTable.inodes），省去再读一遍 /proc/net"""
+        try:
+            if self.procfs:
+                if inodes is None:
+                    inodes = listen_inodes(self.index.root)
+                key = frozenset(inodes)
+            else:
+                key = frozenset(ports)
+            if key == self._key:
+                return self.owners
+            self._key = key
+            self.owners = self._resolve_procfs(inodes) if self.procfs else self._resolve_psutil()
+        except OSError:
+            self.owners = {}
+        return self.owners
+
+    def get(self, port, proto="tcp"):
+        return self.owners.get((port, proto))
+
+    def _resolve_procfs(self, inodes):
+        index = self.index
+        index.refresh()
+        unresolved = {inode for inode in inodes if index.owner(inode) is None}
+        # 已扫描过的进程新开了监听端口、或PID被复用时，增量扫描找不到归属，此时完整重扫一次
+        if unresolved - self._attempted:
+            index.refresh(full=True)
+            self._attempted |= unresolved
+        self._attempted &= inodes.keys()
+        owners = {}
+        for inode, key in inodes.items():
+            pid = index.owner(inode)
+            if pid is not None and key not in owners:
+                owners[key] = (pid, index.name(pid))
+        return owners
+
+    def _resolve_psutil(self):
+        owners = {}
+        pids = set()
+        for conn in psutil.net_connections(kind="inet"):
+            if not conn.laddr or conn.pid is None:
+                continue
+            if conn.type == socket.SOCK_DGRAM:
+                if conn.raddr:
+                    continue
+                proto = "udp"
+            elif conn.status == "LISTEN":
+                proto = "tcp"
+            else:
+                continue
+            pid = conn.pid
+            pids.add(pid)
+            name = self._names.get(pid)
+            if name is None:
+                try:
+                    name = psutil.Process(pid).name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    name = "?"
+                self._names[pid] = name
+            owners.setdefault((conn.laddr.port, proto), (pid, name))
+        for pid in self._names.keys() - pids:
+            del self._names[pid]
+        return owners
+
+
+class ListenerRecord:
+    """一个 (端口, 协议) 的监听记录：本次开始时间、结束时间、累计重启次数与最近的重启时间"""
+    __slots__ = ("key", "pid", "name", "since", "ended", "restarts", "recent")
+
+    def __init__(self, key, pid, name, since, restarts=0, recent=None):
+        self.key = key
+        self.pid = pid
+        self.name = name
+        self.since = since
+        self.ended = None
+        self.restarts = restarts
+        self.recent = recent if recent is not None else deque(maxlen=FLAP_THRESHOLD)
+
+    def lifetime(self, now):
+        return (self.ended if self.ended is not None else now) - self.since
+
+
+class ListenerHistory:
+    """
+    监听端口的开始/结束记录。
+    停止监听的记录放入容量固定的 LRU；同一端口再次出现（或所属PID变化）记为一次重启，
+    FLAP_WINDOW 秒内重启达到 FLAP_THRESHOLD 次视为频繁重启。
+    counts 为监听数量的时间序列（固定长度）。generation 在任何监听开始/结束/重启/频繁重启状态变化时递增。
+    """
+    def __init__(self, max_ended=500, series_len=3600):
+        self.active = {}
+        self.ended = OrderedDict()
+        self.max_ended = max_ended
+        self.counts = deque(maxlen=series_len)
+        self.flapping = frozenset()
+        self.generation = 0
+        self._owners = None       # 上次处理过的归属表（PortOwners 未更新时为同一对象）
+        self._restarted = set()   # 有过重启的活跃监听，只在这些里判断是否频繁重启
+
+    def update(self, keys, owners=None, now=None):
+        """keys: 当前监听的 (端口, 协议) 集合；返回 (开始的, 结束的) 两个列表"""
+        now = time.time() if now is None else now
+        owners = owners or {}
+        active = self.active
+        keys = set(keys)
+        stopped = [key for key in active if key not in keys]
+        started = [key for key in keys if key not in active]
+        for key in stopped:
+            record = active.pop(key)
+            record.ended = now
+            self.ended[key] = record
+            self.ended.move_to_end(key)
+        while len(self.ended) > self.max_ended:
+            self.ended.popitem(last=False)
+        for key in started:
+            pid, name = owners.get(key, (None, ""))
+            previous = self.ended.pop(key, None)
+            if previous is None:
+                active[key] = ListenerRecord(key, pid, name, now)
+            else:
+                previous.recent.append(now)
+                active[key] = ListenerRecord(key, pid, name, now, previous.restarts + 1, previous.recent)
+                self._restarted.add(key)
+        # 两次扫描之间完成的重启只能从PID变化看出来；归属表没有更新时不必逐项比较
+        if owners is not self._owners:
+            self._owners = owners
+            for key, (pid, name) in owners.items():
+                record = active.get(key)
+                if record is None or record.pid == pid:
+                    continue
+                if record.pid is not None and key not in started:
+                    record.since = now
+                    record.restarts += 1
+                    record.recent.append(now)
+                    self._restarted.add(key)
+                    started.append(key)
+                record.pid, record.name = pid, name
+        self._restarted.intersection_update(active)
+        flapping = frozenset(key for key in self._restarted
+                             if len(active[key].recent) >= FLAP_THRESHOLD and now - active[key].recent[0] <= FLAP_WINDOW)
+        if started or stopped or flapping != self.flapping:
+            self.generation += 1
+        self.flapping = flapping
+        self.counts.append((now, len(active)))
+        return started, stopped
+
+    def recent_ended(self, limit=10):
+        """最近结束的监听，新的在前"""
+        return list(itertools.islice(reversed(self.ended.values()), limit))
+
+
+class SocketTable:
+    """
+    scan() 对内核套接字表只读一遍：
+      listeners  当前监听的 {(端口, 协议)}
+      inodes     监听套接字 {inode: (端口, 协议)}（Linux）
+    frozen_counts() 给出本次扫描的计数：端口 -> 该 TCP 监听端口的 ConnCounts
+    计数存放在按行预分配的扁平列表中（每个监听端口一行），每次扫描原地清零后累加，
+    只在监听端口集合变化时重排行。内核在每个表中先列出监听套接字再列出连接，
+    因此同一遍里就能把连接归到监听端口；新出现的监听端口若排在其连接之后，下一次扫描起计入。
+    root 为 /proc 的路径（procfs 路径使用）。
+    """
+    def __init__(self, procfs=None, root=PROC):
+        self.procfs = sys.platform.startswith("linux") if procfs is None else procfs
+        self.root = root
+        self.listeners = frozenset()
+        self.inodes = {}
+        self._rows = {}      # 端口的4位十六进制文本（/proc 原样） -> 行起始下标
+        self._by_port = {}   # 端口 -> 行起始下标
+        self._counts = []
+
+    def _add_row(self, port, hexport=None):
+        base = len(self._counts)
+        self._counts.extend([0] * _COLS)
+        self._by_port[port] = base
+        self._rows[hexport or f"{port:04X}"] = base
+        return base
+
+    def _compact(self, ports):
+        """监听端口集合变化后只保留仍在监听的行"""
+        counts, by_port = self._counts, self._by_port
+        kept = [(port, counts[by_port[port]:by_port[port] + _COLS]) for port in sorted(ports)]
+        self._counts, self._rows, self._by_port = [], {}, {}
+        for port, row in kept:
+            base = self._add_row(port)
+            self._counts[base:base + _COLS] = row
+
+    def frozen_counts(self):
+        """当前计数的副本：下次 scan() 原地清零时，其他线程读到的仍是本次结果"""
+        counts, by_port = list(self._counts), dict(self._by_port)
+
+        def lookup(port):
+            base = by_port.get(port)
+            return None if base is None else ConnCounts(*counts[base:base + _COLS])
+        return lookup
+
+    def scan(self):
+        counts = self._counts
+        counts[:] = itertools.repeat(0, len(counts))
+        listeners = self._scan_procfs() if self.procfs else self._scan_psutil()
+        tcp_ports = {port for port, proto in listeners if proto == "tcp"}
+        if tcp_ports != self._by_port.keys():
+            self._compact(tcp_ports)
+        self.listeners = frozenset(listeners)
+        return self.listeners
+
+    def _scan_procfs(self):
+        listeners = set()
+        inodes = {}
+        rows, counts = self._rows, self._counts
+        state_column = _STATE_COLUMN
+        readable = False
+        for name in ("tcp", "tcp6"):
+            try:
+                with open(f"{self.root}/net/{name}", encoding="ascii") as f:
+                    lines = f.read().splitlines()[1:]
+            except OSError:
+                continue
+            readable = True
+            for line in lines:
+                fields = line.split(None, 5)
+                if len(fields) < 6:
+                    continue
+                state = fields[3]
+                if state == TCP_LISTEN:
+                    hexport = fields[1][-4:]
+                    port = int(hexport, 16)
+                    base = rows.get(hexport)
+                    if base is None:
+                        base = self._add_row(port, hexport)
+                        counts = self._counts
+                    counts[base + 4] += int(fields[4][9:], 16)
+                    listeners.add((port, "tcp"))
+                    inode = int(fields[5].split(None, 5)[4])
+                    if inode:
+                        inodes[inode] = (port, "tcp")
+                else:
+                    col = state_column.get(state)
+                    if col is not None:
+                        base = rows.get(fields[1][-4:])
+                        if base is not None:
+                            counts[base + col] += 1
+        if not readable:
+            # 一张 TCP 表都读不到时不能当作“没有监听端口”，交给调用方走后备方法
+            raise OSError(f"无法读取 {self.root}/net/tcp")
+        for name in ("udp", "udp6"):
+            try:
+                with open(f"{self.root}/net/{name}", encoding="ascii") as f:
+                    lines = f.read().splitlines()[1:]
+            except OSError:
+                continue
+            for line in lines:
+                fields = line.split(None, 5)
+                if len(fields) < 6 or fields[3] != UDP_UNCONNECTED:
+                    continue
+                port = int(fields[1][-4:], 16)
+                if port:
+                    listeners.add((port, "udp"))
+                    inode = int(fields[5].split(None, 5)[4])
+                    if inode:
+                        inodes[inode] = (port, "udp")
+        self.inodes = inodes
+        return listeners
+
+    def _scan_psutil(self):
+        listeners = set()
+        connections = psutil.net_connections(kind="inet")
+        # psutil 没有队列长度；先登记监听端口，再把连接归到监听端口
+        for conn in connections:
+            if not conn.laddr:
+                continue
+            if conn.type == socket.SOCK_DGRAM:
+                if not conn.raddr:
+                    listeners.add((conn.laddr.port, "udp"))
+            elif conn.status == "LISTEN":
+                listeners.add((conn.laddr.port, "tcp"))
+                if conn.laddr.port not in self._by_port:
+                    self._add_row(conn.laddr.port)
+        counts, by_port = self._counts, self._by_port
+        for conn in connections:
+            col = _PSUTIL_COLUMN.get(conn.status)
+            if col is not None and conn.laddr:
+                base = by_port.get(conn.laddr.port)
+                if base is not None:
+                    counts[base + col] += 1
+        return listeners
+
+
+def _is_port_listening(port):
+    """检测端口是否真正在监听 - 优化版本"""
+    try:
+        # 尝试多种地址
+        addresses = ['127.0.0.1', 'localhost', '0.0.0.0']
+
+        for addr in addresses:
+            try:
+                # connect_ex 在地址解析失败时会抛异常，用 with 保证套接字关闭
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(0.03)  # 更短的超时时间
+                    result = sock.connect_ex((addr, port))
+                if result == 0:
+                    return True
+            except:
+                continue
+
+        return False
+    except:
+        return False
+
+
+class PortScanner:
+    """
+    端口栏的数据源：套接字表，再解析进程归属。套接字表已是完整的枚举，
+    只有读取失败时才退回 netstat 与常用端口连接验证（这两者各自又是一遍枚举）。
+    只由调度器调用（同一时间只有一个在执行），返回的 PortScan 之后不再被修改，可交给界面线程。
+    """
+    def __init__(self, procfs=None, verify_ports=COMMON_PORTS):
+        self.sockets = SocketTable(procfs)
+        self.owners = PortOwners(procfs)
+        self.verify_ports = verify_ports
+
+    def __call__(self):
+        """每个环节的耗时与失败次数记入诊断（ports_table / ports_netstat / ports_socket / ports_owner），
+        某个环节失败时用其余环节的结果继续，不向外抛出"""
+        listening_ports = set()
+        udp_ports = set()
+
+        # 读取内核套接字表（Linux 直接读 /proc/net，其他平台用psutil），
+        # 同一遍扫描还给出各监听端口的连接状态计数
+        try:
+            with DIAG.timed("ports_table"):
+                listeners = self.sockets.scan()
+            for port, proto in listeners:
+                # 未连接的已绑定UDP套接字视为监听
+                (listening_ports if proto == "tcp" else udp_ports).add(port)
+        except Exception:
+            self._scan_fallback(listening_ports)
+
+        active = sorted([(p, "tcp") for p in listening_ports] + [(p, "udp") for p in udp_ports])
+        try:
+            with DIAG.timed("ports_owner"):
+                owners = self.owners.update(active, self.sockets.inodes if self.sockets.procfs else None)
+        except Exception:
+            owners = self.owners.owners
+        return PortScan(frozenset(listening_ports), frozenset(udp_ports), active, owners,
+                        self.sockets.frozen_counts())
+
+    def _scan_fallback(self, listening_ports):
+        """套接字表读取失败（无权限等）时的后备：netstat 与常用端口连接验证"""
+        # 使用netstat命令
+        try:
+            with DIAG.timed("ports_netstat"):
+                if platform.system().lower() == "windows":
+                    result = run_command(['netstat', '-an'], timeout=2)
+                else:
+                    result = run_command(['netstat', '-tuln'], timeout=2)
+                result.check_returncode()
+            for line in result.stdout.split('\n'):
+                if 'LISTENING' in line or 'LISTEN' in line:
+                    # 匹配端口号
+                    match = re.search(r':(\d+)\s', line)
+                    if match:
+                        port = int(match.group(1))
+                        if 1 <= port <= 65535:
+                            listening_ports.add(port)
+        except Exception:
+            pass
+
+        # 主动扫描常用端口
+        try:
+            with DIAG.timed("ports_socket"):
+                for port in self.verify_ports:
+                    if _is_port_listening(port):
+                        listening_ports.add(port)
+        except Exception:
+            pass
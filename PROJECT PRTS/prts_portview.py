@@ -0,0 +1,282 @@
+# prts_portview.py
+"""
+端口列表
+QTableView + 自定义模型：只绘制可见行，不限制端口数量；
+过滤与排序在模型内完成（不经 QSortFilterProxyModel 逐行回调），
+少量端口变化时只做二分插入/删除，数千条监听端口也不必每次整体重排。
+
+本地模拟 5000 个监听端口：
+    python prts_portview.py --simulate 5000
+"""
+
+import sys
+import time
+import bisect
+import random
+import argparse
+from collections import namedtuple
+
+from PySide6.QtWidgets import QApplication, QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+
+from prts_services import rank_key
+
+# 一行：since 为本次开始监听的时间（time.time()），flapping 表示近期频繁重启
+PortEntry = namedtuple("PortEntry", "port proto service process pid restarts since flapping")
+COLUMNS = ("端口", "协议", "服务", "进程", "重启", "连接")
+# 连接数每次扫描都变，显示时现取、不参与排序
+LIVE_COLUMN = 5
+UNSORTED = -1
+# 超过该比例的行增删时直接整体排序
+_RESORT_RATIO = 0.125
+
+_DISPLAY = Qt.DisplayRole.value
+_TOOLTIP = Qt.ToolTipRole.value
+_FOREGROUND = Qt.ForegroundRole.value
+_FLAPPING = QColor("#FF5555")
+_ALIGNMENT = Qt.TextAlignmentRole.value
+_ALIGN_RIGHT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+def _sort_key(col, entry):
+    """各列的排序键；(端口, 协议) 作为次键保证键唯一，未排序时使用服务注册表的优先级顺序"""
+    port, proto, service, process = entry[:4]
+    if col == 0:
+        return (port, proto)
+    if col == 1:
+        return (proto, port)
+    if col == 2:
+        return (not service, service.lower(), port, proto)
+    if col == 3:
+        return (not process, process.lower(), port, proto)
+    if col == 4:
+        return (entry.restarts, port, proto)
+    return (rank_key(port), proto)
+
+
+def _entry_text(entry):
+    return (str(entry.port), entry.proto.upper(), entry.service or "-", entry.process or "-", str(entry.restarts))
+
+
+def _filter_text(entry):
+    # 只按端口/协议/服务/进程过滤；重启次数与 "-" 占位不参与匹配
+    return "\t".join((str(entry.port), entry.proto, entry.service or "", entry.process or "")).lower()
+
+
+def format_age(seconds):
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}秒"
+    if seconds < 3600:
+        return f"{seconds // 60}分{seconds % 60}秒"
+    if seconds < 86400:
+        return f"{seconds // 3600}时{seconds % 3600 // 60}分"
+    return f"{seconds // 86400}天{seconds % 86400 // 3600}时"
+
+
+class PortListModel(QAbstractTableModel):
+    """
+    set_entries() 接收完整的监听列表；_order 为过滤后按当前排序列升序排列的 (排序键, 行) 列表，
+    降序显示时反向取下标。少量行变化时只把增删的行二分插入/删除，变化过多时才整体重排；
+    _text 缓存每行的显示文本与用于过滤的小写文本。
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._entry_set = set()
+        self._text = {}
+        self._order = []
+        self._filter = ""
+        self._sort_col = UNSORTED
+        self._descending = False
+        self._counts = None   # 端口 -> ConnCounts 的查询函数（SocketTable.frozen_counts），无数据时为 None
+
+    # ---- Qt 模型接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def entry(self, row):
+        order = self._order
+        return order[len(order) - 1 - row][1] if self._descending else order[row][1]
+
+    def _conn_counts(self, entry):
+        if self._counts is None or entry.proto != "tcp":
+            return None
+        return self._counts(entry.port)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == _DISPLAY:
+            if index.column() == LIVE_COLUMN:
+                counts = self._conn_counts(self.entry(index.row()))
+                if counts is None:
+                    return "-"
+                return f"{counts.established}+{counts.accept_queue}" if counts.accept_queue else str(counts.established)
+            return self._text[self.entry(index.row())][0][index.column()]
+        if role == _FOREGROUND:
+            return _FLAPPING if self.entry(index.row()).flapping else None
+        if role == _TOOLTIP:
+            # 存活时长随时间变化，悬停时现算，不进入显示文本缓存
+            entry = self.entry(index.row())
+            lines = [f"PID {entry.pid}  {entry.process}"] if entry.pid is not None else []
+            lines.append(f"已监听 {format_age(time.time() - entry.since)}  重启 {entry.restarts} 次")
+            if entry.flapping:
+                lines.append("近期频繁重启")
+            counts = self._conn_counts(entry)
+            if counts is not None:
+                lines.append(f"ESTABLISHED {counts.established}  SYN_RECV {counts.syn_recv}  "
+                             f"TIME_WAIT {counts.time_wait}  CLOSE_WAIT {counts.close_wait}")
+                lines.append(f"待accept {counts.accept_queue}")
+            return "\n".join(lines)
+        if role == _ALIGNMENT and index.column() in (0, 4, LIVE_COLUMN):
+            return _ALIGN_RIGHT
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._descending = order == Qt.DescendingOrder
+        if column != self._sort_col:
+            self._sort_col = column
+            self._order = sorted((_sort_key(column, e), e) for _, e in self._order)
+        self.layoutChanged.emit()
+
+    # ---- 数据更新 ----
+
+    def set_counts(self, counts):
+        """counts: 端口 -> ConnCounts；每次扫描后调用，只通知连接列重绘（视图只重绘可见行）"""
+        self._counts = counts
+        if self._order:
+            self.dataChanged.emit(self.index(0, LIVE_COLUMN), self.index(len(self._order) - 1, LIVE_COLUMN))
+
+    def entries(self):
+        return self._entries
+
+    def set_entries(self, entries):
+        """应用新的监听列表，未变化时返回 False"""
+        if entries == self._entries:
+            return False
+        new_set = set(entries)
+        removed = self._entry_set - new_set
+        added = new_set - self._entry_set
+        self._entries = entries
+        self._entry_set = new_set
+        text = self._text
+        for entry in removed:
+            del text[entry]
+        for entry in added:
+            text[entry] = (_entry_text(entry), _filter_text(entry))
+
+        if len(removed) + len(added) > len(self._order) * _RESORT_RATIO:
+            self._rebuild()
+            return True
+        col, pattern = self._sort_col, self._filter
+        order = list(self._order)
+        for entry in removed:
+            key = (_sort_key(col, entry), entry)
+            i = bisect.bisect_left(order, key)
+            if i < len(order) and order[i][1] == entry:
+                del order[i]
+        for entry in added:
+            if not pattern or pattern in text[entry][1]:
+                bisect.insort(order, (_sort_key(col, entry), entry))
+        self._set_order(order)
+        return True
+
+    def set_filter(self, pattern):
+        pattern = pattern.strip().lower()
+        if pattern != self._filter:
+            self._filter = pattern
+            self._rebuild()
+
+    def _rebuild(self):
+        pattern, text, col = self._filter, self._text, self._sort_col
+        entries = [e for e in self._entries if pattern in text[e][1]] if pattern else self._entries
+        self._set_order(sorted((_sort_key(col, e), e) for e in entries))
+
+    def _set_order(self, order):
+        # 行数不变时只通知布局变化（保留选中与滚动位置），否则重置模型
+        if len(order) == len(self._order):
+            self.layoutAboutToBeChanged.emit()
+            self._order = order
+            self.layoutChanged.emit()
+        else:
+            self.beginResetModel()
+            self._order = order
+            self.endResetModel()
+
+
+class PortListView(QTableView):
+    """固定行高、按表头点击排序的端口表；再次点击同一列切换升降序"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.port_model = PortListModel(self)
+        self.setModel(self.port_model)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        vheader = self.verticalHeader()
+        vheader.setVisible(False)
+        vheader.setSectionResizeMode(QHeaderView.Fixed)
+        vheader.setDefaultSectionSize(22)
+        hheader = self.horizontalHeader()
+        hheader.setSectionResizeMode(QHeaderView.Interactive)
+        hheader.setStretchLastSection(True)
+        hheader.setSectionsClickable(True)
+        hheader.setSortIndicatorShown(True)
+        hheader.setSortIndicator(UNSORTED, Qt.AscendingOrder)
+        hheader.sectionClicked.connect(self._on_header_clicked)
+        for col, width in enumerate((50, 36, 64, 72, 36)):
+            self.setColumnWidth(col, width)
+
+    def _on_header_clicked(self, column):
+        model = self.port_model
+        if column == LIVE_COLUMN:
+            return
+        if model._sort_col == column and not model._descending:
+            order = Qt.DescendingOrder
+        else:
+            order = Qt.AscendingOrder
+        self.horizontalHeader().setSortIndicator(column, order)
+        model.sort(column, order)
+
+
+def simulated_entries(count, seed=0):
+    """生成 count 个模拟监听端口"""
+    rng = random.Random(seed)
+    names = ("nginx", "java", "python3", "node", "postgres", "redis-server", "envoy", "")
+    ports = rng.sample(range(1024, 65536), count)
+    now = time.time()
+    entries = []
+    for i, port in enumerate(ports):
+        name = names[i % len(names)]
+        restarts = i % 7 if i % 11 == 0 else 0
+        entries.append(PortEntry(port, "udp" if i % 5 == 0 else "tcp", "", name, 1000 + i % 400 if name else None,
+                                 restarts, now - i * 37, restarts >= 3))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="端口列表（本地模拟数据）")
+    parser.add_argument("--simulate", type=int, default=5000, help="模拟监听端口数")
+    args, qt_args = parser.parse_known_args(argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    view = PortListView()
+    view.port_model.set_entries(simulated_entries(args.simulate))
+    view.resize(320, 480)
+    view.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+# prts_probes.py
+"""
+采集项注册表与调度器
+每个采集项声明名称、采集周期、开销等级、值类型与格式化方式；
+界面根据注册表生成卡片，调度器根据开销等级决定在哪个线程执行
+"""
+
+import os
+import re
+import time
+import shutil
+import platform
+import itertools
+import subprocess
+import socket
+
+import numpy as np
+import psutil
+
+from prts_diag import DIAG
+from prts_workers import DeadlinePool, run_command
+from prts_breakers import CircuitBreaker, CircuitOpen
+from prts_procs import ProcessSampler
+from prts_rates import RateEngine
+from prts_disk import DiskIOSampler, format_disk_io
+from prts_mounts import RemovableMounts
+from prts_ifaces import IFACES, is_virtual_nic
+from prts_routes import ROUTES, ROUTE_V4
+
+# 开销等级
+COST_CHEAP = "cheap"        # 微秒级系统调用，直接在UI线程执行
+COST_IO = "io"              # 读取本地设备/文件，可能毫秒级，放入IO线程
+COST_BLOCKING = "blocking"  # 网络、DNS、子进程，可能秒级阻塞，放入阻塞线程池
+
+# 后台采集的硬性截止时间（秒）：超时的调用被放弃，卡片显示上次的有效值及其时长
+DEFAULT_DEADLINES = {COST_IO: 10.0, COST_BLOCKING: 5.0}
+# 熔断后的首次重试间隔（秒，至少为采集周期的2倍），之后每次翻倍
+BREAKER_BASE = 5.0
+
+# 连通性探测目标，可由配置文件覆盖（见 prts_config）；DEFAULT_TARGETS 用于配置项删除后恢复
+TARGETS = {
+    "online": ("8.8.8.8", 53),
+    "dns": (("DNS1", "8.8.8.8", 53), ("DNS2", "114.114.114.114", 53)),
+    "ping": "www.baidu.com",
+    "timeout": 1.0,
+}
+DEFAULT_TARGETS = dict(TARGETS)
+
+
+class Probe:
+    """单个采集项的声明"""
+    def __init__(self, name, collect, label=None, default="", cadence=1000, cost=COST_CHEAP,
+                 value_type=float, formatter=None, fallback="N/A", info=None, info_fallback="",
+                 slot=None, tooltip=None, timeout=None, healthy=None, precheck=None):
+        self.name = name
+        self.collect = collect
+        self.label = label                  # 卡片标题，None 表示不生成卡片
+        self.default = default              # 卡片初始文本
+        self.cadence = cadence              # 采集周期（毫秒）
+        self.base_cadence = cadence         # 注册时的周期，配置项删除后恢复
+        self.cost = cost
+        self.value_type = value_type
+        self.formatter = formatter or str
+        self.fallback = fallback            # 采集失败时的卡片文本
+        self.info = info                    # 信息栏片段格式化，None 表示不进入信息栏
+        self.info_fallback = info_fallback  # 采集失败时的信息栏片段
+        self.slot = slot                    # 卡片/信息栏之外的特殊显示位置
+        self.tooltip = tooltip              # 卡片悬停提示，None 表示没有
+        self.timeout = timeout              # 后台执行的截止时间（秒），None 使用 DEFAULT_DEADLINES
+        self.healthy = healthy              # 值 -> 是否算成功（如 ping 返回 None 算失败），None 表示不抛异常即成功
+        self.precheck = precheck            # 熔断半开时的廉价本地预检，None 表示直接重试
+        self.enabled = True
+
+    def format(self, value):
+        return self.formatter(value)
+
+    def __repr__(self):
+        return f"Probe({self.name!r}, cost={self.cost!r}, cadence={self.cadence})"
+
+
+class ProbeRegistry:
+    """按注册顺序保存采集项"""
+    def __init__(self):
+        self._probes = {}
+
+    def register(self, probe):
+        if probe.name in self._probes:
+            raise ValueError(f"采集项重复注册: {probe.name}")
+        self._probes[probe.name] = probe
+        return probe
+
+    def probe(self, name, **kwargs):
+        """装饰器形式注册：@REGISTRY.probe("cpu", label="CPU", ...)"""
+        def deco(fn):
+            self.register(Probe(name, fn, **kwargs))
+            return fn
+        return deco
+
+    def get(self, name):
+        return self._probes.get(name)
+
+    def copy(self):
+        """同一批采集项的新注册表，可再追加只在某个进程中使用的采集项"""
+        registry = ProbeRegistry()
+        registry._probes = dict(self._probes)
+        return registry
+
+    def __iter__(self):
+        return iter(self._probes.values())
+
+    def __contains__(self, name):
+        return name in self._probes
+
+    def cards(self):
+        return [p for p in self._probes.values() if p.label]
+
+    def info_probes(self):
+        return [p for p in self._probes.values() if p.info]
+
+
+class ProbeScheduler:
+    """
+    按周期调度采集项：
+    cheap 在调用线程（UI线程）直接执行；io 与 blocking 分别进入各自的线程池，
+    阻塞型探测卡住时不会拖慢磁盘等IO采集。同一采集项同一时间只会有一个在执行。
+    后台执行的采集项有截止时间（DeadlinePool），超时的结果为 (False, CallTimeout)。
+    每个采集项有一个熔断器：断开期间不执行，到期照常返回 (False, CircuitOpen)，界面按失败显示。
+    """
+    def __init__(self, registry, io_workers=1, blocking_workers=3, diag=DIAG):
+        self.registry = registry
+        self.diag = diag
+        self.inline = False  # True 时所有采集项都在调用线程执行（基准测试/调试用）
+        self._pools = {
+            COST_IO: DeadlinePool(io_workers, name="prts-io"),
+            COST_BLOCKING: DeadlinePool(blocking_workers, name="prts-blocking"),
+        }
+        self._next_due = {}
+        self._inflight = {}
+        self._breakers = {}
+
+    def _run(self, probe):
+        try:
+            with self.diag.timed(probe.name):
+                value = probe.collect()
+            return True, value
+        except Exception as e:
+            return False, e
+
+    def tick(self, now=None, force=False, names=None):
+        """
+        运行到期的采集项，返回 {名称: (是否成功, 值)}，包含此前已完成的后台结果。
+        names 不为 None 时只运行其中的采集项（没有订阅者的数据源不采样）。
+        """
+        now = time.monotonic() if now is None else now
+        results = self.poll()
+        for probe in self.registry:
+            name = probe.name
+            if not probe.enabled or name in self._inflight or (names is not None and name not in names):
+                continue
+            if not force and now < self._next_due.get(name, 0.0):
+                continue
+            self._next_due[name] = now + probe.cadence / 1000
+            breaker = self.breaker(probe)
+            if not breaker.allow(now):
+                results[name] = (False, CircuitOpen(name, breaker.retry_in(now)))
+                continue
+            pool = self._pools.get(probe.cost)
+            if pool is None or self.inline:
+                results[name] = self._record(probe, self._run(probe), now)
+            else:
+                self._inflight[name] = pool.submit(self._run, probe,
+                                                   timeout=probe.timeout or DEFAULT_DEADLINES[probe.cost])
+        return results
+
+    @staticmethod
+    def _breaker_base(probe):
+        return max(BREAKER_BASE, probe.cadence * 2 / 1000)
+
+    def breaker(self, probe):
+        breaker = self._breakers.get(probe.name)
+        if breaker is None:
+            breaker = self._breakers[probe.name] = CircuitBreaker(
+                base=self._breaker_base(probe), precheck=probe.precheck)
+        return breaker
+
+    def _record(self, probe, result, now=None):
+        ok, value = result
+        if ok and probe.healthy is not None:
+            try:
+                ok = bool(probe.healthy(value))
+            except Exception:
+                ok = False
+        self.breaker(probe).record(ok, now)
+        return result
+
+    def reschedule(self, names=None):
+        """让这些采集项在下一次 tick 立即运行（新订阅、手动刷新、设置变化）；
+        熔断器不受影响，断开中的采集项照常返回 CircuitOpen"""
+        if names is None:
+            self._next_due.clear()
+        else:
+            for name in names:
+                self._next_due.pop(name, None)
+
+    def reset_breakers(self, names=None):
+        """周期、启用状态或探测目标变化后复位熔断器：此前的失败不再说明问题，退避时长按新周期重新计算"""
+        for name, breaker in self._breakers.items():
+            if names is not None and name not in names:
+                continue
+            probe = self.registry.get(name)
+            if probe is not None:
+                breaker.base = self._breaker_base(probe)
+            breaker.reset()
+
+    def poll(self):
+        """取回已完成的后台采集结果"""
+        results = {}
+        if self._inflight:
+            for pool in self._pools.values():
+                pool.expire()
+            for name, fut in list(self._inflight.items()):
+                if fut.done():
+                    del self._inflight[name]
+                    if fut.cancelled():
+                        continue
+                    error = fut.exception()
+                    if error is not None:
+                        # 截止时间已到：采集函数仍在后台卡着，本次按超时处理
+                        self.diag.timeout(name)
+                        result = (False, error)
+                    else:
+                        result = fut.result()
+                    probe = self.registry.get(name)
+                    results[name] = self._record(probe, result) if probe is not None else result
+        return results
+
+    def pending(self):
+        return len(self._inflight)
+
+    def pool_stats(self):
+        """各线程池的状态（诊断用）"""
+        return {f"pool:{cost}": pool.stats() for cost, pool in self._pools.items()}
+
+    def breaker_stats(self):
+        """断开过或正在失败的熔断器（诊断用）"""
+        now = time.monotonic()
+        return {name: breaker.stats(now) for name, breaker in sorted(self._breakers.items())
+                if breaker.trips or breaker.failures}
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ==================== 内置采集项 ====================
+REGISTRY = ProbeRegistry()
+
+
+@REGISTRY.probe("cpu", label="CPU", default="0%", formatter=lambda v: f"{v:.1f}%")
+def collect_cpu():
+    return psutil.cpu_percent(interval=0)
+
+
+class PerCoreSampler:
+    """逐核CPU占用采样器：保存上一次的累计时间，差分得到各核占用百分比"""
+    def __init__(self):
+        self._last = None
+        self._idle_cols = None
+        self._total_cols = None
+
+    def _columns(self, fields):
+        # idle/iowait 计为空闲；guest 已包含在 user 中，不重复计入总时间
+        idle = [i for i, f in enumerate(fields) if f in ("idle", "iowait")]
+        total = [i for i, f in enumerate(fields) if f not in ("guest", "guest_nice")]
+        return np.array(idle), np.array(total)
+
+    def __call__(self):
+        times = psutil.cpu_times(percpu=True)
+        fields = times[0]._fields
+        if self._idle_cols is None:
+            self._idle_cols, self._total_cols = self._columns(fields)
+        # fromiter 直接展开，避免逐个元组转换的开销
+        width = len(fields)
+        cur = np.fromiter(itertools.chain.from_iterable(times), dtype=np.float64,
+                          count=len(times) * width).reshape(-1, width)
+        last = self._last
+        self._last = cur
+        # 首次采样或核心数变化（热插拔）时没有可用差分
+        if last is None or last.shape != cur.shape:
+            return np.zeros(len(cur), dtype=np.float32)
+        delta = cur - last
+        d_total = delta[:, self._total_cols].sum(axis=1)
+        d_idle = delta[:, self._idle_cols].sum(axis=1)
+        # 计数器回绕/重置时差分为负，按0处理
+        busy = np.where(d_total > 0, 1.0 - d_idle / np.where(d_total > 0, d_total, 1.0), 0.0)
+        return (np.clip(busy, 0.0, 1.0) * 100).astype(np.float32)
+
+
+REGISTRY.register(Probe("cpu_cores", PerCoreSampler(), value_type=np.ndarray, slot="cpu_heatmap"))
+
+
+def _format_gpu(value):
+    if value is None:
+        return "N/A"
+    load, clock = value
+    text = f"{load * 100:.1f}%" if load is not None else "N/A"
+    if clock:
+        text += f" @ {clock:.0f}MHz"
+    return text
+
+
+def has_nvidia_smi():
+    """GPU 采集的半开预检：nvidia-smi 在 PATH 中"""
+    return shutil.which("nvidia-smi") is not None
+
+
+def query_gpus(fields, timeout=3.0):
+    """nvidia-smi 查询，返回每块GPU一行的字段列表；驱动卡住时子进程到期被杀掉"""
+    result = run_command(["nvidia-smi", f"--query-gpu={fields}", "--format=csv,noheader,nounits"], timeout=timeout)
+    if result.returncode != 0:
+        return []
+    return [[field.strip() for field in line.split(",")] for line in result.stdout.splitlines() if line.strip()]
+
+
+@REGISTRY.probe("gpu", label="GPU", default="0%", cost=COST_BLOCKING, value_type=tuple, formatter=_format_gpu,
+                healthy=lambda v: v is not None, precheck=has_nvidia_smi)
+def collect_gpu():
+    """GPU负载与频率（调用 nvidia-smi，属阻塞型）；负载与频率在同一次查询中取得"""
+    gpus = query_gpus("utilization.gpu,clocks.sm")
+    if not gpus:
+        return None
+    load, clock = (gpus[0] + ["", ""])[:2]
+    load = float(load) / 100 if load.replace(".", "", 1).isdigit() else None
+    clock = int(clock) if clock.isdigit() and int(clock) > 0 else None
+    return load, clock
+
+
+@REGISTRY.probe("mem", label="MEM", default="0%", formatter=lambda v: f"{v:.1f}%")
+def collect_mem():
+    return psutil.virtual_memory().percent
+
+
+# 系统盘：Windows 下 '/' 是当前盘符而不一定是系统盘
+SYSTEM_ROOT = os.environ.get("SystemDrive", "C:") + "\\" if platform.system().lower() == "windows" else "/"
+
+
+@REGISTRY.probe("disk", label="Disk", default="0%", formatter=lambda v: f"{v:.1f}%")
+def collect_disk():
+    return psutil.disk_usage(SYSTEM_ROOT).percent
+
+
+# 逐磁盘IO：一次读取 /proc/diskstats，右键卡片可固定显示某块磁盘
+REGISTRY.register(Probe("diskio", DiskIOSampler(), label="IO", default="N/A", value_type=dict,
+                        formatter=format_disk_io))
+
+
+class NetSpeed:
+    """
+    逐网卡网速：每块网卡单独求速率（单调时钟、处理计数器重置），
+    默认显示最忙的物理网卡，也可通过 select() 固定显示某块网卡
+    """
+    def __init__(self, tau=None):
+        self.engine = RateEngine(("bytes_sent", "bytes_recv"), tau=tau)
+        self.selected = None  # None 表示自动选择
+        self._names = []
+
+    def __call__(self):
+        counters = psutil.net_io_counters(pernic=True)
+        names = list(counters)
+        rates = self.engine.update(names, [(c.bytes_sent, c.bytes_recv) for c in counters.values()]) / 1024
+        self._names = names
+        per_nic = {name: (float(rates[i, 0]), float(rates[i, 1])) for i, name in enumerate(names)}
+        nic = self.selected if self.selected in per_nic else self._busiest(per_nic)
+        return {"nic": nic, "rates": per_nic}
+
+    @staticmethod
+    def _busiest(per_nic):
+        candidates = [n for n in per_nic if not is_virtual_nic(n)] or list(per_nic)
+        if not candidates:
+            return None
+        return max(candidates, key=lambda n: per_nic[n][0] + per_nic[n][1])
+
+    def choices(self):
+        return list(self._names)
+
+    def select(self, name):
+        self.selected = name
+
+
+def _format_net(value):
+    nic = value["nic"]
+    if nic is None:
+        return "N/A"
+    up, down = value["rates"][nic]
+    return f"{nic} ↑{up:.1f}KB/s ↓{down:.1f}KB/s"
+
+
+REGISTRY.register(Probe("net", NetSpeed(), label="Net", default="0 KB/s", value_type=dict, formatter=_format_net))
+
+
+@REGISTRY.probe("ip", label="IP", default="0.0.0.0", value_type=str, tooltip=lambda v: IFACES.describe(),
+                info=lambda v: f"IP:{v}", info_fallback="IP:未知")
+def collect_ip():
+    """主出口地址，取自共享网卡表，不经过DNS"""
+    IFACES.check()
+    address = IFACES.primary[0]
+    if address is None:
+        raise OSError("无可用地址")
+    return address
+
+
+def _format_uptime(uptime):
+    hours = uptime // 3600
+    minutes = (uptime % 3600) // 60
+    return f"{hours}h{minutes}m"
+
+
+@REGISTRY.probe("uptime", label="Uptime", default="0h0m", value_type=int, formatter=_format_uptime)
+def collect_uptime():
+    return int(time.time() - psutil.boot_time())
+
+
+def has_network():
+    """网络探测的半开预检：有默认路由（没有路由表的平台看是否有已启用的非回环网卡），不发任何数据包"""
+    if ROUTES.default() is not None:
+        return True
+    if os.path.exists(ROUTE_V4):
+        return False
+    return any(stats.isup for name, stats in psutil.net_if_stats().items()
+               if name != "lo" and not name.lower().startswith("loopback"))
+
+
+@REGISTRY.probe("net_online", cost=COST_BLOCKING, value_type=bool, slot="net_icon",
+                healthy=bool, precheck=has_network)
+def collect_net_online():
+    """网络状态图标：能否连上探测目标（默认公共DNS）"""
+    try:
+        socket.create_connection(TARGETS["online"], timeout=TARGETS["timeout"]).close()
+        return True
+    except OSError:
+        return False
+
+
+def _format_route(route):
+    if route is None:
+        return "网卡:未知"
+    text = f"网卡:{route.iface}"
+    if route.gateway:
+        text += f" 网关:{route.gateway}"
+    return text
+
+
+@REGISTRY.probe("gateway", value_type=tuple, info=_format_route, info_fallback="网卡:未知")
+def collect_gateway():
+    """默认路由（出口网卡、网关、跃点数），取自路由表"""
+    return ROUTES.default()
+
+
+@REGISTRY.probe("dns", cost=COST_BLOCKING, value_type=list,
+                healthy=lambda v: any(ok for _, ok in v), precheck=has_network,
+                info=lambda v: ",".join(f"{name}:{'可用' if ok else '异常'}" for name, ok in v))
+def collect_dns():
+    """DNS可用性"""
+    status = []
+    for name, dnsip, port in TARGETS["dns"]:
+        try:
+            socket.create_connection((dnsip, port), timeout=TARGETS["timeout"]).close()
+            status.append((name, True))
+        except OSError:
+            status.append((name, False))
+    return status
+
+
+@REGISTRY.probe("ping", cost=COST_BLOCKING, value_type=str, healthy=lambda v: v is not None, precheck=has_network,
+                info=lambda v: f"延迟:{v}ms" if v else "延迟:超时", info_fallback="延迟:未知")
+def collect_ping():
+    """ping延迟，无响应时返回 None"""
+    ping_host = TARGETS["ping"]
+    timeout = TARGETS["timeout"]
+    if platform.system().lower() == "windows":
+        ping_cmd = ["ping", "-n", "1", "-w", str(int(timeout * 1000)), ping_host]
+    else:
+        ping_cmd = ["ping", "-c", "1", "-W", str(max(1, round(timeout))), ping_host]
+    try:
+        # ping 自身的 -W 在DNS解析卡住时不起作用，子进程另有截止时间
+        result = run_command(ping_cmd, timeout=timeout + 2)
+    except subprocess.TimeoutExpired:
+        DIAG.timeout("ping")
+        return None
+    match = re.search(r"平均 = (\d+)ms|time[=<]([\d\.]+)ms", result.stdout)
+    if match:
+        return match.group(1) or match.group(2)
+    DIAG.timeout("ping")
+    return None
+
+
+@REGISTRY.probe("net_type", value_type=str, info=lambda v: f"类型:{v}", info_fallback="类型:未知")
+def collect_net_type():
+    """默认路由出口网卡的类型；没有路由表时看主出口地址所在网卡"""
+    IFACES.check()
+    route = ROUTES.default()
+    iface = IFACES.interfaces.get(route.iface if route else IFACES.primary[1])
+    if iface is not None and iface.kind in ("有线", "无线"):
+        return iface.kind
+    return "未知"
+
+
+# 可移动设备：挂载表变化时才重新枚举，容量在后台线程查询并带超时，
+# 卡住的网络挂载不会拖住刷新，因此可以在界面线程内联执行
+REGISTRY.register(Probe("usb", RemovableMounts(), cost=COST_CHEAP, value_type=list,
+                        fallback="USB检测失败", slot="iface"))
+
+
+# Top-N 进程：数千PID时单次仍需毫秒级，放入IO线程并降低频率
+REGISTRY.register(Probe("procs", ProcessSampler(), cadence=2000, cost=COST_IO, value_type=dict, slot="procs"))
+
+
+@REGISTRY.probe("webinfo", cost=COST_IO, value_type=str, fallback="网页信息采集失败", slot="webinfo")
+def collect_webinfo():
+    """获取主流浏览器的活动窗口标题（仅支持Windows，需pywin32）"""
+    try:
+        import win32gui
+        import win32process
+    except ImportError:
+        return "请安装pywin32以启用网页信息采集"
+    browser_names = ["chrome.exe", "msedge.exe", "firefox.exe", "opera.exe", "iexplore.exe", "safari.exe"]
+    def enum_windows_callback(hwnd, result):
+        if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
+            try:
+                tid, pid = win32process.GetWindowThreadProcessId(hwnd)
+                p = psutil.Process(pid)
+                name = p.name().lower()
+                if name in browser_names:
+                    result.append((name, win32gui.GetWindowText(hwnd)))
+            except Exception:
+                pass
+    result = []
+    win32gui.EnumWindows(enum_windows_callback, result)
+    if result:
+        # 只取第一个浏览器窗口
+        name, title = result[0]
+        return f"当前网页窗口: {name} | {title}"
+    else:
+        return "未检测到浏览器活动窗口"
@@ -0,0 +1,142 @@
+# prts_procs.py
+"""
+增量进程采样
+在两次采样之间保留每个PID的状态：新PID只读取一次名称等静态属性，
+每次只批量读取启动时间（识别PID复用）、CPU时间、常驻内存和IO计数；
+Top-N 用有界堆选出，不对全部进程排序
+"""
+
+import os
+import sys
+import time
+import heapq
+from operator import attrgetter
+
+import psutil
+
+SORT_KEYS = ("cpu", "mem", "io")
+_KEY_GETTERS = {key: attrgetter(key) for key in SORT_KEYS}
+
+if hasattr(os, "sysconf"):
+    _CLK_TCK = os.sysconf("SC_CLK_TCK")
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+else:
+    _CLK_TCK = 100
+    _PAGE_SIZE = 4096
+
+
+class _ProcEntry:
+    __slots__ = ("pid", "name", "start", "cpu_total", "io_total", "cpu", "mem", "io")
+
+    def __init__(self, pid, name, start):
+        self.pid = pid
+        self.name = name
+        self.start = start    # 启动时间，用于识别PID复用
+        self.cpu_total = None
+        self.io_total = None
+        self.cpu = 0.0   # CPU占用百分比（单核为100%）
+        self.mem = 0     # 常驻内存字节数
+        self.io = 0.0    # 读写速率 字节/秒
+
+
+def _read_stat(pid):
+    """读取 /proc/<pid>/stat，返回 (名称原始字节, 启动时间, CPU秒数, 常驻内存字节)"""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read()
+    # 进程名可能包含空格和括号，以最后一个 ')' 为界
+    head, _, rest = data.rpartition(b")")
+    fields = rest.split()
+    cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return head, int(fields[19]), cpu, int(fields[21]) * _PAGE_SIZE
+
+
+def _read_io(pid):
+    """读取 /proc/<pid>/io 的读写字节数之和；无权限时返回 None"""
+    try:
+        with open(f"/proc/{pid}/io", "rb") as f:
+            data = f.read()
+    except PermissionError:
+        return None
+    total = 0
+    for line in data.split(b"\n"):
+        if line.startswith(b"read_bytes") or line.startswith(b"write_bytes"):
+            total += int(line.rpartition(b" ")[2])
+    return total
+
+
+class ProcessSampler:
+    """
+    每次调用返回 {"cpu": [...], "mem": [...], "io": [...], "count": 进程数}，
+    列表元素为 (pid, 名称, 数值)。
+    Linux 下直接读 /proc/<pid>/stat 与 /proc/<pid>/io（每进程两次读取），
+    其他平台使用 psutil 的 oneshot 批量读取。
+    """
+    def __init__(self, top_n=8, procfs=None):
+        self.top_n = top_n
+        self.procfs = sys.platform.startswith("linux") if procfs is None else procfs
+        self._entries = {}
+        self._last_time = None
+
+    def _sample_procfs(self, pid, entry):
+        head, start, cpu_total, rss = _read_stat(pid)
+        if entry is None or entry.start != start:
+            name = head.partition(b"(")[2].decode("utf-8", "replace")
+            entry = self._entries[pid] = _ProcEntry(pid, name, start)
+        return entry, cpu_total, rss, _read_io(pid)
+
+    def _sample_psutil(self, pid, entry):
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            # 每次都重新读取启动时间，PID 被复用时重建条目（同 _sample_procfs）；
+            # 旧的 Process 对象不会自行发现复用，读到的会是新进程的数据
+            start = proc.create_time()
+            if entry is None or entry.start != start:
+                entry = self._entries[pid] = _ProcEntry(pid, proc.name(), start)
+            t = proc.cpu_times()
+            rss = proc.memory_info().rss
+            try:
+                io = proc.io_counters()
+                io_total = io.read_bytes + io.write_bytes
+            except (psutil.AccessDenied, AttributeError):
+                io_total = None
+        return entry, t.user + t.system, rss, io_total
+
+    def __call__(self):
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+        self._last_time = now
+        entries = self._entries
+        pids = set(psutil.pids())
+
+        # 已退出的进程
+        for pid in entries.keys() - pids:
+            del entries[pid]
+
+        sample = self._sample_procfs if self.procfs else self._sample_psutil
+        for pid in pids:
+            try:
+                entry, cpu_total, rss, io_total = sample(pid, entries.get(pid))
+            except (FileNotFoundError, ProcessLookupError, psutil.NoSuchProcess, psutil.ZombieProcess):
+                entries.pop(pid, None)
+                continue
+            except (PermissionError, psutil.AccessDenied):
+                continue
+            entry.mem = rss
+            if entry.cpu_total is not None and elapsed > 0 and cpu_total >= entry.cpu_total:
+                entry.cpu = (cpu_total - entry.cpu_total) / elapsed * 100
+            else:
+                entry.cpu = 0.0
+            if io_total is not None and entry.io_total is not None and elapsed > 0 and io_total >= entry.io_total:
+                entry.io = (io_total - entry.io_total) / elapsed
+            else:
+                entry.io = 0.0
+            entry.cpu_total = cpu_total
+            entry.io_total = io_total
+
+        n = self.top_n
+        values = entries.values()
+        result = {"count": len(entries)}
+        for key, getter in _KEY_GETTERS.items():
+            top = heapq.nlargest(n, values, key=getter)
+            result[key] = [(e.pid, e.name, getter(e)) for e in top]
+        return result
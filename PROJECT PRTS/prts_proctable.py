@@ -0,0 +1,101 @@
+# prts_proctable.py
+"""
+Top-N 进程面板
+数据来自 prts_procs.ProcessSampler；表格行数固定，刷新时只改单元格文本
+"""
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QLabel
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFont
+
+from prts_procs import SORT_KEYS
+
+
+def _format_value(key, value):
+    if key == "cpu":
+        return f"{value:.1f}%"
+    if key == "mem":
+        return f"{value / (1024 ** 2):.0f}MB"
+    return f"{value / 1024:.1f}KB/s"
+
+
+class ProcessTable(QWidget):
+    """按 CPU / 内存 / IO 切换排序的进程列表"""
+    def __init__(self, rows=8, font_family="Bender", parent=None):
+        super().__init__(parent)
+        self._key = "cpu"
+        self._data = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        bar = QHBoxLayout()
+        self.title = QLabel("PROC")
+        self.title.setFont(QFont(font_family, 12, QFont.Bold))
+        bar.addWidget(self.title)
+        bar.addStretch()
+        self._buttons = {}
+        for key in SORT_KEYS:
+            btn = QPushButton(key.upper())
+            btn.setCheckable(True)
+            btn.setFont(QFont(font_family, 10, QFont.Bold))
+            btn.setStyleSheet("QPushButton { font-size: 12px; padding: 0 6px; }"
+                              "QPushButton:checked { background: #FFB400; color: #23272E; }")
+            btn.clicked.connect(lambda checked=False, k=key: self.set_sort_key(k))
+            self._buttons[key] = btn
+            bar.addWidget(btn)
+        layout.addLayout(bar)
+
+        self.table = QTableWidget(rows, 3)
+        self.table.setHorizontalHeaderLabels(["PID", "Name", "CPU"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionMode(QTableWidget.NoSelection)
+        self.table.setFocusPolicy(Qt.NoFocus)
+        self.table.setShowGrid(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.table.setStyleSheet("QTableWidget { background: #23272E; color: #F8F8F8; border: none; }"
+                                 "QHeaderView::section { background: #23272E; color: #FFB400; border: none; }")
+        self.table.verticalHeader().setDefaultSectionSize(20)
+        self.table.setFixedHeight(20 * (rows + 1) + 4)
+        # 预先创建单元格，刷新时只改文本
+        for r in range(rows):
+            for c in range(3):
+                item = QTableWidgetItem("")
+                if c != 1:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(r, c, item)
+        layout.addWidget(self.table)
+        self._buttons[self._key].setChecked(True)
+
+    def set_sort_key(self, key):
+        self._key = key
+        for k, btn in self._buttons.items():
+            btn.setChecked(k == key)
+        self.table.horizontalHeaderItem(2).setText(key.upper())
+        self._render()
+
+    def set_data(self, data):
+        self._data = data
+        self.title.setText(f"PROC ({data['count']})")
+        self._render()
+
+    def _render(self):
+        if not self._data:
+            return
+        rows = self._data[self._key]
+        for r in range(self.table.rowCount()):
+            if r < len(rows):
+                pid, name, value = rows[r]
+                texts = (str(pid), name, _format_value(self._key, value))
+            else:
+                texts = ("", "", "")
+            for c, text in enumerate(texts):
+                item = self.table.item(r, c)
+                if item.text() != text:
+                    item.setText(text)
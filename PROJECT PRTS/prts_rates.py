@@ -0,0 +1,96 @@
+# prts_rates.py
+"""
+计数器速率引擎
+对一组具名计数器（网卡、磁盘、GPU……）整体求速率：
+使用单调时钟计时，处理计数器回绕与重置，可选按时间常数的EWMA平滑
+"""
+
+import math
+import time
+
+import numpy as np
+
+
+class RateEngine:
+    """
+    每次 update 传入行名列表与 (行数, 字段数) 的累计计数矩阵，返回同形状的每秒速率矩阵。
+    行可以增减（网卡插拔、磁盘挂载），按名称对齐；新出现的行首个周期速率为0。
+    wrap_bits: 计数器位宽（如32位计数器传32），下降时按回绕处理；None 表示下降一律视为重置。
+    tau: EWMA 时间常数（秒），None 表示不平滑。
+    """
+    def __init__(self, fields, wrap_bits=None, tau=None):
+        self.fields = tuple(fields)
+        self.wrap = float(2 ** wrap_bits) if wrap_bits else None
+        self.tau = tau
+        self._index = {}
+        self._last = None
+        self._last_time = None
+        self._rates = None
+        self.resets = 0  # 累计检测到的计数器重置次数
+
+    def update(self, names, values, now=None):
+        now = time.monotonic() if now is None else now
+        # 保存的是副本：调用方可能每次把计数写进同一个缓冲区（如逐磁盘采样）
+        values = np.array(values, dtype=np.float64).reshape(len(names), len(self.fields))
+        index = {name: i for i, name in enumerate(names)}
+        rates = np.zeros_like(values)
+
+        if self._last is not None:
+            dt = now - self._last_time
+            if dt <= 0:
+                # 同一时刻重复采样：沿用上次结果
+                return self._align(index, self._rates) if self._rates is not None else rates
+            # 按名称对齐上一周期的数据
+            if index == self._index:
+                last = self._last
+                known = np.ones(len(names), dtype=bool)
+            else:
+                last = np.zeros_like(values)
+                known = np.zeros(len(names), dtype=bool)
+                for name, i in index.items():
+                    j = self._index.get(name)
+                    if j is not None:
+                        last[i] = self._last[j]
+                        known[i] = True
+            delta = values - last
+            neg = delta < 0
+            if neg.any():
+                if self.wrap is not None:
+                    # 按回绕补偿后的增量不足半个位宽才认为是回绕，否则视为重置（如网卡重新启用）
+                    unwrapped = delta + self.wrap
+                    wrapped = neg & (last < self.wrap) & (unwrapped < self.wrap / 2)
+                    delta[wrapped] = unwrapped[wrapped]
+                    reset = neg & ~wrapped
+                else:
+                    reset = neg
+                self.resets += int(np.count_nonzero(reset & known[:, None]))
+                delta[reset] = 0.0
+            delta[~known] = 0.0
+            rates = delta / dt
+
+            if self.tau and self._rates is not None:
+                prev = self._align(index, self._rates)
+                alpha = 1.0 - math.exp(-dt / self.tau)
+                rates = np.where(known[:, None], prev + alpha * (rates - prev), rates)
+
+        self._index = index
+        self._last = values
+        self._last_time = now
+        self._rates = rates
+        return rates
+
+    def _align(self, index, rates):
+        if index == self._index:
+            return rates
+        out = np.zeros((len(index), len(self.fields)))
+        for name, i in index.items():
+            j = self._index.get(name)
+            if j is not None:
+                out[i] = rates[j]
+        return out
+
+    def reset(self):
+        self._index = {}
+        self._last = None
+        self._last_time = None
+        self._rates = None
@@ -0,0 +1,117 @@
+# prts_routes.py
+"""
+路由表
+解析 /proc/net/route 与 /proc/net/ipv6_route，得到真正的默认网关、出口网卡与跃点数。
+文件内容不变时不重新解析（proc 文件的 mtime 不可靠，以内容比较为准）；
+读取本身至多每 min_interval 秒一次。非 Linux 平台没有路由表文件，返回 None。
+"""
+
+import socket
+import struct
+import time
+from collections import namedtuple
+
+ROUTE_V4 = "/proc/net/route"
+ROUTE_V6 = "/proc/net/ipv6_route"
+
+RTF_UP = 0x0001
+RTF_GATEWAY = 0x0002
+RTF_REJECT = 0x0200
+
+Route = namedtuple("Route", "iface gateway metric family")
+
+
+def _hex_to_ipv4(text):
+    # /proc/net/route 中地址按主机字节序（小端）以十六进制输出
+    return socket.inet_ntop(socket.AF_INET, struct.pack("<I", int(text, 16)))
+
+
+def _hex_to_ipv6(text):
+    return socket.inet_ntop(socket.AF_INET6, bytes.fromhex(text))
+
+
+def parse_route_v4(text):
+    """返回全部默认路由，按跃点数升序"""
+    routes = []
+    for line in text.splitlines()[1:]:
+        f = line.split()
+        if len(f) < 8:
+            continue
+        flags = int(f[3], 16)
+        if f[1] != "00000000" or f[7] != "00000000" or not flags & RTF_UP or flags & RTF_REJECT:
+            continue
+        gateway = _hex_to_ipv4(f[2]) if flags & RTF_GATEWAY else None
+        routes.append(Route(f[0], gateway, int(f[6]), socket.AF_INET))
+    routes.sort(key=lambda r: r.metric)
+    return routes
+
+
+def parse_route_v6(text):
+    routes = []
+    for line in text.splitlines():
+        f = line.split()
+        if len(f) < 10:
+            continue
+        flags = int(f[8], 16)
+        if f[1] != "00" or not flags & RTF_UP or flags & RTF_REJECT:
+            continue
+        gateway = _hex_to_ipv6(f[4]) if int(f[4], 16) else None
+        routes.append(Route(f[9], gateway, int(f[5], 16), socket.AF_INET6))
+    routes.sort(key=lambda r: r.metric)
+    return routes
+
+
+class _RouteFile:
+    """单个路由表文件：内容不变时沿用上次解析结果"""
+    def __init__(self, path, parser):
+        self.path = path
+        self.parser = parser
+        self._raw = None
+        self.routes = []
+
+    def refresh(self):
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            self._raw, self.routes = None, []
+            return False
+        if raw == self._raw:
+            return False
+        self._raw = raw
+        self.routes = self.parser(raw.decode("ascii", "replace"))
+        return True
+
+
+class RouteTable:
+    """default() 返回跃点数最小的默认路由（优先IPv4），没有默认路由时返回 None"""
+    def __init__(self, min_interval=2.0):
+        self.min_interval = min_interval
+        self._files = [_RouteFile(ROUTE_V4, parse_route_v4), _RouteFile(ROUTE_V6, parse_route_v6)]
+        self._checked = None
+        self.generation = 0  # 路由变化一次加1
+
+    def check(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self._checked is not None and now - self._checked < self.min_interval:
+            return False
+        self._checked = now
+        changed = False
+        for f in self._files:
+            changed |= f.refresh()
+        if changed:
+            self.generation += 1
+        return changed
+
+    def routes(self):
+        return [r for f in self._files for r in f.routes]
+
+    def default(self):
+        self.check()
+        for f in self._files:
+            if f.routes:
+                return f.routes[0]
+        return None
+
+
+ROUTES = RouteTable()
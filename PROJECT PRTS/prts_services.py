@@ -0,0 +1,108 @@
+# prts_services.py
+"""
+端口 -> 服务名注册表
+启动时合并内置表与系统 services 文件（只读一次），按 (端口, 协议) O(1) 查询；
+可通过 add() / load_file() 追加用户自定义条目（格式同 /etc/services）；
+配置文件中的 [services] 作为单独一层覆盖（set_overrides），重载时整体替换。
+"""
+
+import os
+import sys
+
+# 内置表的名称比 services 文件更易读，同端口时优先使用
+BUILTIN_SERVICES = {
+    # 基础服务
+    21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP", 53: "DNS",
+    # Web服务
+    80: "HTTP", 443: "HTTPS", 8080: "HTTP-Alt", 8443: "HTTPS-Alt",
+    # 邮件服务
+    110: "POP3", 143: "IMAP", 993: "IMAPS", 995: "POP3S",
+    # 数据库
+    3306: "MySQL", 5432: "PostgreSQL", 27017: "MongoDB", 6379: "Redis",
+    1433: "SQL Server", 1521: "Oracle", 5984: "CouchDB",
+    # 搜索引擎
+    9200: "Elasticsearch", 9300: "Elasticsearch",
+    # 缓存
+    11211: "Memcached",
+    # 消息队列
+    2181: "Zookeeper", 9092: "Kafka", 5672: "RabbitMQ", 15672: "RabbitMQ-Web",
+    # 远程服务
+    3389: "RDP", 5900: "VNC",
+    # 开发服务
+    3000: "Node.js", 5000: "Flask", 8000: "Django", 9000: "SonarQube",
+}
+
+# 主动连接验证的常用端口
+COMMON_PORTS = (
+    21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389,
+    5432, 3306, 6379, 27017, 8080, 8443, 3000, 5000, 8000, 9000,
+    1433, 1521, 5984, 9200, 9300, 11211, 2181, 9092, 5672, 15672,
+)
+
+# 端口列表默认排序时排在前面的端口
+PRIORITY_PORTS = (21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389, 5432, 3306, 6379, 27017, 8080, 8443)
+
+if sys.platform.startswith("win"):
+    SYSTEM_SERVICES = os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32", "drivers", "etc", "services")
+else:
+    SYSTEM_SERVICES = "/etc/services"
+
+# 优先端口排在前面，其余按端口号；预先算成整数键，排序时不做成员判断
+_RANK = [1 << 16] * 65536
+for _port in PRIORITY_PORTS:
+    _RANK[_port] = 0
+
+
+def rank_key(port):
+    return _RANK[port] | port
+
+
+def parse_services(text):
+    """解析 services 格式文本，返回 {(端口, 协议): 名称}，同键保留第一条"""
+    entries = {}
+    for line in text.splitlines():
+        fields = line.split("#", 1)[0].split()
+        if len(fields) < 2:
+            continue
+        port, _, proto = fields[1].partition("/")
+        try:
+            port = int(port)
+        except ValueError:
+            continue
+        if 0 < port < 65536:
+            entries.setdefault((port, proto.lower() or "tcp"), fields[0])
+    return entries
+
+
+class ServiceRegistry:
+    def __init__(self, system_file=SYSTEM_SERVICES):
+        self._names = {}
+        self._overrides = {}
+        if system_file:
+            try:
+                self.load_file(system_file)
+            except OSError:
+                pass
+        for port, name in BUILTIN_SERVICES.items():
+            self.add(port, name)
+
+    def add(self, port, name, proto="tcp"):
+        self._names[(int(port), proto)] = name
+
+    def load_file(self, path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            self._names.update(parse_services(f.read()))
+
+    def set_overrides(self, entries):
+        """entries: {(端口, 协议): 名称}"""
+        self._overrides = dict(entries)
+
+    def lookup(self, port, proto="tcp"):
+        key = (port, proto)
+        return self._overrides.get(key) or self._names.get(key)
+
+    def __len__(self):
+        return len(self._names)
+
+
+SERVICES = ServiceRegistry()
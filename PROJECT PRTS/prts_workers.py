@@ -0,0 +1,169 @@
+# prts_workers.py
+"""
+带硬性截止时间的采集线程池
+每次调用都有截止时间，到期仍未返回的调用由 expire() 以 CallTimeout 结束，调度器不再等待它。
+Python 线程无法被强制结束，因此：
+  - 采集函数经 run_command() 启动的子进程，超时不超过本次调用剩余的时间，到期即被杀掉，线程随之返回；
+  - 仍卡住的线程（驱动调用、DNS解析等）被放弃，另起一个新线程补位；
+    被放弃的线程之后若返回，结果丢弃、线程退出。放弃的线程数有上限，达到上限后不再补位，
+    池的并发随之下降，而不是无限增加线程。
+"""
+
+import time
+import queue
+import threading
+import subprocess
+from concurrent.futures import Future
+
+_local = threading.local()
+
+# 视为“超时”的异常：截止时间到、子进程超时、套接字超时
+TIMEOUT_ERRORS = (TimeoutError, subprocess.TimeoutExpired)
+
+
+class CallTimeout(TimeoutError):
+    """调用超过截止时间"""
+
+
+def remaining():
+    """当前采集调用剩余的秒数，不在池中执行或没有截止时间时为 None"""
+    deadline = getattr(_local, "deadline", None)
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def run_command(cmd, timeout=None, **kwargs):
+    """运行子进程并取回文本输出；超时不超过当前调用剩余的时间，到期时 subprocess 杀掉子进程并抛出 TimeoutExpired"""
+    left = remaining()
+    if left is not None:
+        timeout = left if timeout is None else min(timeout, left)
+        timeout = max(timeout, 0.01)
+    kwargs.setdefault("capture_output", True)
+    kwargs.setdefault("text", True)
+    return subprocess.run(cmd, timeout=timeout, **kwargs)
+
+
+class _Worker(threading.Thread):
+    def __init__(self, pool, name):
+        super().__init__(name=name, daemon=True)
+        self.pool = pool
+        self.call = None        # 正在执行的 (future, 截止时间)
+        self.abandoned = False
+
+    def run(self):
+        pool = self.pool
+        while True:
+            item = pool._queue.get()
+            if item is None:
+                return
+            future, fn, args, timeout = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            deadline = time.monotonic() + timeout if timeout else None
+            with pool._lock:
+                self.call = (future, deadline)
+            _local.deadline = deadline
+            try:
+                result, error = fn(*args), None
+            except BaseException as e:
+                result, error = None, e
+            _local.deadline = None
+            with pool._lock:
+                self.call = None
+                # 超时的调用已由 expire() 结束，迟到的结果丢弃
+                if not future.done():
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+                if self.abandoned:
+                    pool._retire(self)
+                    return
+
+
+class DeadlinePool:
+    """
+    submit(fn, *args, timeout=秒) 返回 concurrent.futures.Future；
+    expire() 需要定期调用（调度器每次 poll 时调用），结束已到期的调用并替换卡住的线程。
+    """
+    def __init__(self, workers=3, name="prts-worker", max_abandoned=8):
+        self.size = workers
+        self.name = name
+        self.max_abandoned = max_abandoned
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._abandoned = []
+        self._serial = 0
+        self._closed = False
+        self.timeouts = 0      # 累计超时的调用数
+        self.replaced = 0      # 累计补位的线程数
+        for _ in range(workers):
+            self._spawn()
+
+    def _spawn(self):
+        self._serial += 1
+        worker = _Worker(self, f"{self.name}_{self._serial}")
+        self._workers.append(worker)
+        worker.start()
+
+    def _retire(self, worker):
+        """被放弃的线程终于返回：退出；此前因达到上限没有补位时补上（调用方持有锁）"""
+        self._abandoned.remove(worker)
+        if not self._closed and len(self._workers) < self.size:
+            self._spawn()
+            self.replaced += 1
+
+    def submit(self, fn, *args, timeout=None):
+        future = Future()
+        self._queue.put((future, fn, args, timeout))
+        return future
+
+    def expire(self, now=None):
+        """结束所有已到期的调用，返回本次结束的数量"""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        with self._lock:
+            for worker in list(self._workers):
+                call = worker.call
+                if call is None or call[1] is None or now < call[1]:
+                    continue
+                future = call[0]
+                worker.abandoned = True
+                self._workers.remove(worker)
+                self._abandoned.append(worker)
+                future.set_exception(CallTimeout(f"{worker.name} 超过截止时间"))
+                expired += 1
+                if len(self._abandoned) <= self.max_abandoned:
+                    self._spawn()
+                    self.replaced += 1
+            self.timeouts += expired
+        return expired
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "busy": sum(1 for w in self._workers if w.call is not None),
+                "stuck": len(self._abandoned),
+                "queued": self._queue.qsize(),
+                "timeouts": self.timeouts,
+                "replaced": self.replaced,
+            }
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            for worker in workers:
+                worker.join()
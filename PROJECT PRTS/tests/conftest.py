@@ -0,0 +1,8 @@
+# tests/conftest.py
+"""模块平铺在上级目录；Qt 使用 offscreen 平台，无显示器也能导入"""
+
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
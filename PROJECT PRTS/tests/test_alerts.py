@@ -0,0 +1,81 @@
+# tests/test_alerts.py
+import pytest
+
+from prts_alerts import FIRING, RESOLVED, AlertEngine, Rule, RuleError, SlidingWindow, WindowHistogram
+
+
+def states(events):
+    return [(e.rule, e.state) for e in events]
+
+
+def test_rule_parsing():
+    rule = Rule("avg(mem, 5m) > 85 for 30s")
+    assert (rule.agg, rule.metric, rule.window, rule.op_text, rule.threshold, rule.duration) == \
+        ("avg", "mem", 300.0, ">", 85.0, 30.0)
+    port = Rule("port 5432 down for 10s")
+    assert (port.metric, port.threshold, port.duration) == ("port:5432", 0.0, 10.0)
+    assert Rule("disk_free < 5").card == "disk"
+    for bad in ("cpu >", "p100(ping, 60s) > 1", "port x down", "cpu ~ 3"):
+        with pytest.raises(RuleError):
+            Rule(bad)
+
+
+def test_for_duration_requires_condition_to_hold():
+    engine = AlertEngine(["cpu > 90 for 60s"])
+    assert engine.feed({"cpu": 95}, now=0) == []
+    assert engine.feed({"cpu": 95}, now=59) == []
+    # 中途回落：重新计时
+    assert engine.feed({"cpu": 80}, now=60) == []
+    assert engine.feed({"cpu": 95}, now=61) == []
+    assert states(engine.feed({"cpu": 95}, now=121)) == [("cpu > 90 for 60s", FIRING)]
+    assert engine.feed({"cpu": 99}, now=130) == []
+    assert [r.text for r in engine.firing()] == ["cpu > 90 for 60s"]
+    assert states(engine.feed({"cpu": 10}, now=131)) == [("cpu > 90 for 60s", RESOLVED)]
+
+
+def test_window_aggregates_share_and_evict():
+    engine = AlertEngine(["avg(mem, 10s) > 50", "max(mem, 10s) >= 90", "min(mem, 10s) < 5"])
+    assert len(engine._windows) == 1
+    events = engine.feed({"mem": 90}, now=0)
+    assert states(events) == [("avg(mem, 10s) > 50", FIRING), ("max(mem, 10s) >= 90", FIRING)]
+    events = engine.feed({"mem": 0}, now=5)
+    assert states(events) == [("avg(mem, 10s) > 50", RESOLVED), ("min(mem, 10s) < 5", FIRING)]
+    # 10秒后第一个样本移出窗口
+    events = engine.feed({"mem": 20}, now=10.5)
+    assert states(events) == [("max(mem, 10s) >= 90", RESOLVED)]
+
+
+def test_percentile_rule():
+    engine = AlertEngine(["p95(ping, 60s) > 200"])
+    for i in range(90):
+        assert engine.feed({"ping": 20}, now=i) == []
+    events = []
+    for i in range(90, 100):
+        events += engine.feed({"ping": 500}, now=i)
+    assert states(events) == [("p95(ping, 60s) > 200", FIRING)]
+    assert engine.rules[0].value == pytest.approx(500, rel=0.06)
+
+
+def test_port_rule_and_missing_samples():
+    engine = AlertEngine(["port 5432 down for 10s"])
+    assert engine.feed({}, ports={5432}, now=0) == []
+    assert engine.feed({}, ports=set(), now=1) == []
+    # 没有端口数据的周期不评估
+    assert engine.feed({}, ports=None, now=20) == []
+    assert states(engine.feed({}, ports={22}, now=11)) == [("port 5432 down for 10s", FIRING)]
+    assert states(engine.feed({}, ports={5432}, now=12)) == [("port 5432 down for 10s", RESOLVED)]
+
+
+def test_sliding_window_and_histogram():
+    win = SlidingWindow(10, track_max=True, track_min=True)
+    for t, v in enumerate((3, 9, 1, 7)):
+        win.add(t, v)
+    assert (win.avg(), win.max(), win.min()) == (5.0, 9, 1)
+    win.add(12, 4)
+    assert (win.avg(), win.max(), win.min()) == (4.0, 7, 1)
+    hist = WindowHistogram(100)
+    assert hist.quantile(0.5) is None
+    for v in range(1, 101):
+        hist.add(0, float(v))
+    assert hist.quantile(0.5) == pytest.approx(50, rel=0.06)
+    assert hist.quantile(0.0) == pytest.approx(1, rel=0.06)
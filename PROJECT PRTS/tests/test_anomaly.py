@@ -0,0 +1,55 @@
+# tests/test_anomaly.py
+import numpy as np
+
+from prts_anomaly import AnomalyDetector, P2Quantiles, SeriesBank
+
+
+def test_p2_estimates_track_exact_quantiles():
+    rng = np.random.default_rng(7)
+    quantiles = (0.05, 0.5, 0.95)
+    data = np.stack([rng.normal(50, 10, 20000), rng.exponential(3, 20000)], axis=1)
+    p2 = P2Quantiles(2, quantiles)
+    assert np.isnan(p2.estimates()).all()
+    for row in data:
+        p2.update(row)
+    est = p2.estimates()
+    exact = np.quantile(data, quantiles, axis=0).T
+    spread = np.quantile(data, 0.95, axis=0) - np.quantile(data, 0.05, axis=0)
+    assert est.shape == (2, 3)
+    assert np.all(np.abs(est - exact) < 0.02 * spread[:, None])
+
+
+def test_p2_rows_warm_up_independently():
+    p2 = P2Quantiles(1, (0.5,))
+    for v in (5, 1, 4, 2):
+        p2.update([v])
+    assert np.isnan(p2.estimates()[0, 0])
+    p2.update([3])
+    assert p2.estimates()[0, 0] == 3
+
+
+def test_series_bank_flags_only_real_outliers():
+    rng = np.random.default_rng(1)
+    bank = SeriesBank(warmup=30)
+    names = ["cpu0", "cpu1"]
+    for _ in range(200):
+        assert not bank.update(names, rng.uniform(19, 21, 2)).any()
+    flagged = bank.update(names, [20.5, 60.0])
+    assert flagged.tolist() == [False, True]
+    # 插入一条新序列：旧序列的基线保留，新序列从头学习
+    flagged = bank.update(["cpu0", "cpu1", "cpu2"], [20.0, 20.0, 500.0])
+    assert flagged.tolist() == [False, False, False]
+    assert bank.count.tolist() == [202, 202, 1]
+
+
+def test_detector_reports_entering_anomalies_once():
+    rng = np.random.default_rng(3)
+    detector = AnomalyDetector(warmup=20)
+    for _ in range(100):
+        detector.observe("nic", ["eth0"], rng.uniform(98, 102, 1))
+    entered = detector.observe("nic", ["eth0"], [400.0])
+    assert [(name, value) for name, value, _ in entered] == [("eth0", 400.0)]
+    assert entered[0][2] > 4
+    assert detector.observe("nic", ["eth0"], [420.0]) == []
+    assert detector.snapshot() == {"nic": {"eth0": 420.0}}
+    assert detector.total == 1
@@ -0,0 +1,69 @@
+# tests/test_breakers.py
+from prts_breakers import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def fail(breaker, times, now):
+    for _ in range(times):
+        assert breaker.allow(now)
+        breaker.record(False, now)
+
+
+def test_trips_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker(base=5, threshold=3)
+    fail(breaker, 2, now=0)
+    breaker.record(True, now=0)
+    fail(breaker, 2, now=0)
+    assert breaker.state == CLOSED
+    fail(breaker, 1, now=0)
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert breaker.retry_in(now=1) == 4
+    assert not breaker.allow(now=4.9)
+    assert breaker.skipped == 1
+
+
+def test_half_open_failure_doubles_backoff_up_to_max():
+    breaker = CircuitBreaker(base=5, threshold=1, max_backoff=30)
+    fail(breaker, 1, now=0)
+    now, backoffs = 0, []
+    for _ in range(5):
+        now = breaker.retry_at
+        assert breaker.allow(now)
+        assert breaker.state == HALF_OPEN
+        breaker.record(False, now)
+        backoffs.append(breaker.backoff)
+    assert backoffs == [10, 20, 30, 30, 30]
+    assert breaker.trips == 1
+
+
+def test_half_open_success_closes_and_resets_backoff():
+    breaker = CircuitBreaker(base=5, threshold=1)
+    fail(breaker, 1, now=0)
+    assert breaker.allow(now=5)
+    breaker.record(False, now=5)
+    assert breaker.allow(now=15)
+    breaker.record(True, now=15)
+    assert breaker.state == CLOSED and breaker.backoff == 5 and breaker.failures == 0
+    fail(breaker, 1, now=20)
+    assert breaker.retry_at == 25 and breaker.trips == 2
+
+
+def test_failed_precheck_reopens_without_a_real_call():
+    checks = []
+    breaker = CircuitBreaker(base=5, threshold=1, precheck=lambda: checks.append(1) or False)
+    fail(breaker, 1, now=0)
+    assert not breaker.allow(now=5)
+    assert breaker.state == OPEN and breaker.backoff == 10 and breaker.retry_at == 15
+    assert not breaker.allow(now=10)
+    assert len(checks) == 1 and breaker.prechecks == 1
+    breaker.precheck = lambda: 1 / 0
+    assert not breaker.allow(now=15)
+    assert breaker.backoff == 20
+
+
+def test_reset_and_stats():
+    breaker = CircuitBreaker(base=5, threshold=1)
+    fail(breaker, 1, now=0)
+    stats = breaker.stats(now=2)
+    assert stats["state"] == OPEN and stats["retry_in_s"] == 3.0 and stats["trips"] == 1
+    breaker.reset()
+    assert breaker.state == CLOSED and breaker.allow(now=2)
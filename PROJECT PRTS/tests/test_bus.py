@@ -0,0 +1,67 @@
+# tests/test_bus.py
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from prts_bus import SnapshotBus
+from prts_diag import Diagnostics
+from prts_probes import Probe, ProbeRegistry
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    yield QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def registry():
+    counts = {"a": 0, "b": 0}
+
+    def collector(name):
+        def collect():
+            counts[name] += 1
+            return counts[name]
+        return collect
+
+    registry = ProbeRegistry()
+    registry.register(Probe("a", collector("a")))
+    registry.register(Probe("b", collector("b")))
+    registry.counts = counts
+    return registry
+
+
+def make_bus(registry, diag, **kwargs):
+    bus = SnapshotBus(registry, diag=diag, **kwargs)
+    bus.scheduler.inline = True
+    return bus
+
+
+def test_results_go_only_to_subscribers_of_each_field(registry):
+    bus = make_bus(registry, Diagnostics())
+    got_a, got_all = [], []
+    bus.subscribe(["a"], got_a.append)
+    bus.tick()
+    assert registry.counts == {"a": 1, "b": 0}
+    bus.subscribe(["a", "b"], got_all.append)
+    # 新订阅者先收到回放，新需要的 b 在下一次刷新时立即采样
+    assert got_all == [{"a": (True, 1)}]
+    bus.tick()
+    assert registry.counts == {"a": 1, "b": 1}
+    assert got_a == [{"a": (True, 1)}]
+    assert got_all[-1] == {"b": (True, 1)}
+    bus.unsubscribe(got_all.append)
+    bus.tick(force=True)
+    assert registry.counts == {"a": 2, "b": 1}
+    bus.shutdown()
+
+
+def test_each_bus_owns_its_diagnostic_sections(registry):
+    diag = Diagnostics()
+    first = make_bus(registry, diag)
+    with pytest.raises(ValueError):
+        SnapshotBus(registry, diag=diag)
+    second = make_bus(registry, diag, name="bar")
+    assert set(diag.sections()) == {"workers", "breakers", "workers_bar", "breakers_bar"}
+    second.shutdown()
+    assert set(diag.sections()) == {"workers", "breakers"}
+    first.shutdown()
+    assert diag.sections() == {}
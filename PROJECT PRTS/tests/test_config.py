@@ -0,0 +1,97 @@
+# tests/test_config.py
+import pytest
+
+from prts_config import DEFAULTS, ConfigError, load_config, parse_target, validate
+
+
+def test_empty_config_is_defaults():
+    assert validate({}) == DEFAULTS
+
+
+def test_parse_target():
+    assert parse_target("10.0.0.1") == ("10.0.0.1", None)
+    assert parse_target("10.0.0.1:53") == ("10.0.0.1", 53)
+    assert parse_target("dns.example", 53) == ("dns.example", 53)
+    assert parse_target("[2001:db8::1]:853") == ("2001:db8::1", 853)
+    assert parse_target("2001:db8::1", 53) == ("2001:db8::1", 53)
+    for bad in ("", ":53", "host:port"):
+        with pytest.raises(ConfigError):
+            parse_target(bad)
+
+
+def test_validate_merges_and_normalizes():
+    config = validate({
+        "ui": {"tick_ms": 500},
+        "targets": {"online": "10.0.0.1", "ping": "10.0.0.1:7", "timeout": 1,
+                    "dns": {"DNS1": "10.0.0.2", "DNS2": "[::1]:5353"}},
+        "probes": {"ping": {"enabled": False}, "procs": {"cadence": 5000}},
+        "services": {"7000": "myapp", "5353/udp": "mdns"},
+    }, probe_names={"ping", "procs"})
+    assert config["ui"] == {"img_dir": None, "tick_ms": 500, "marquee_ms": 120}
+    assert config["fonts"] == DEFAULTS["fonts"]
+    assert config["targets"] == {"online": ("10.0.0.1", 53), "ping": "10.0.0.1", "timeout": 1.0,
+                                 "dns": (("DNS1", "10.0.0.2", 53), ("DNS2", "::1", 5353))}
+    assert config["probes"] == {"ping": {"enabled": False}, "procs": {"cadence": 5000}}
+    assert config["services"] == {(7000, "tcp"): "myapp", (5353, "udp"): "mdns"}
+
+
+@pytest.mark.parametrize("data", [
+    {"extra": {}},
+    {"ui": {"tick_ms": 10}},
+    {"ui": {"tick_ms": True}},
+    {"ui": {"colour": "red"}},
+    {"ui": {"img_dir": 3}},
+    {"fonts": {"bender": 1}},
+    {"targets": {"timeout": 0}},
+    {"targets": {"dns": {}}},
+    {"targets": {"proxy": "x"}},
+    {"probes": {"nope": {"enabled": True}}},
+    {"probes": {"ping": {"enabled": "yes"}}},
+    {"probes": {"ping": {"cadence": 50}}},
+    {"probes": {"ping": {"priority": 1}}},
+    {"probes": {"ping": True}},
+    {"services": {"70000": "x"}},
+    {"services": {"80/sctp": "x"}},
+    {"services": {"80": 1}},
+])
+def test_validate_rejects(data):
+    with pytest.raises(ConfigError):
+        validate(data, probe_names={"ping"})
+
+
+def test_load_config(tmp_path):
+    path = tmp_path / "prts.toml"
+    assert load_config(str(path)) == DEFAULTS
+    path.write_text('[ui]\nmarquee_ms = 200\n[services]\n"7000/tcp" = "myapp"\n', encoding="utf-8")
+    config = load_config(str(path))
+    assert config["ui"]["marquee_ms"] == 200 and config["services"] == {(7000, "tcp"): "myapp"}
+    path.write_text("[ui\n", encoding="utf-8")
+    with pytest.raises(ConfigError):
+        load_config(str(path))
+
+
+def test_apply_probe_config_never_exposes_partial_targets():
+    import threading
+    from PRTSmain import apply_probe_config
+    from prts_probes import DEFAULT_TARGETS, TARGETS
+
+    configs = [validate({"targets": {"ping": host}}) for host in ("10.0.0.1", "10.0.0.2")]
+    apply_probe_config(configs[0], registry=[])
+    seen, done = set(), threading.Event()
+
+    def reader():
+        while not done.is_set():
+            seen.add(TARGETS.get("ping"))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for i in range(20000):
+            apply_probe_config(configs[i % 2], registry=[])
+    finally:
+        done.set()
+        thread.join()
+    # 工作线程只应看到某一份完整配置，不会读到被清空或只恢复了默认值的表
+    assert seen and seen <= {"10.0.0.1", "10.0.0.2"}
+    apply_probe_config(validate({}), registry=[])
+    assert TARGETS == DEFAULT_TARGETS
@@ -0,0 +1,108 @@
+# tests/test_fleet.py
+"""本机端到端：若干使用伪造数据源的 agent + aggregator + FleetClient"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+import prts_fakes
+import prts_fleet
+import prts_ifaces
+import prts_mounts
+import prts_probes
+import prts_procs
+import prts_workers
+from prts_fleet import Agent, Aggregator, FleetClient
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("等待超时")
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+
+    async def drain():
+        # 等被取消的 agent/aggregator 真正退出，避免停循环时遗留未完成的协程
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(drain(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def fakes():
+    providers = prts_fakes.make_providers(listen_ports=[22, 80, 443])
+    modules = [prts_probes, prts_procs, prts_mounts, prts_ifaces, prts_workers]
+    # prts_fleet 自己的 socket 用于 FleetClient 的真实连接，只替换 psutil（监听端口）
+    with prts_fakes.installed(modules, providers), \
+            prts_fakes.installed([prts_fleet], {"psutil": providers["psutil"]}):
+        yield providers
+
+
+def hosts_where(client, predicate):
+    fleet = client.latest()
+    if fleet is None:
+        return None
+    return [h for h in fleet["hosts"].values() if predicate(h)]
+
+
+def test_aggregator_tracks_agents_going_offline(loop, fakes):
+    agents = [Agent(name=f"agent-{i}", interval=0.1) for i in range(3)]
+    agent_runs = [asyncio.run_coroutine_threadsafe(agent.run("127.0.0.1", 0), loop) for agent in agents]
+    wait_for(lambda: all(agent.port for agent in agents))
+    aggregator = Aggregator([f"127.0.0.1:{agent.port}" for agent in agents], interval=0.1)
+    aggregator_run = asyncio.run_coroutine_threadsafe(aggregator.run("127.0.0.1", 0), loop)
+    wait_for(lambda: aggregator.port)
+    client = FleetClient(f"127.0.0.1:{aggregator.port}").start()
+    try:
+        def all_online():
+            online = hosts_where(client, lambda h: h["connected"] and h["snapshot"])
+            return online if online is not None and len(online) == 3 else None
+
+        online = wait_for(all_online)
+        assert sorted(h["name"] for h in online) == ["agent-0", "agent-1", "agent-2"]
+        for host in online:
+            snap = host["snapshot"]
+            assert snap["ports"] == [22, 80, 443]
+            assert snap["values"]["mem"] == "50.0%"
+            assert host["reconnects"] == 0 and host["error"] == ""
+
+        agent_runs[0].cancel()
+        offline = wait_for(lambda: hosts_where(client, lambda h: not h["connected"]))
+        assert [h["name"] for h in offline] == ["agent-0"]
+        assert offline[0]["reconnects"] == 1
+        assert len(hosts_where(client, lambda h: h["connected"])) == 2
+    finally:
+        client.stop()
+        aggregator_run.cancel()
+        for run in agent_runs:
+            run.cancel()
+
+
+def test_first_failed_connect_is_not_a_reconnect(loop):
+    aggregator = Aggregator(["127.0.0.1:1"], interval=0.1, connect_timeout=0.5)
+    run = asyncio.run_coroutine_threadsafe(aggregator.run("127.0.0.1", 0), loop)
+    try:
+        state = wait_for(lambda: aggregator.hosts.get("127.0.0.1:1"))
+        wait_for(lambda: state.error)
+        assert not state.connected and state.reconnects == 0
+    finally:
+        run.cancel()
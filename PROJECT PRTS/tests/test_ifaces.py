@@ -0,0 +1,26 @@
+# tests/test_ifaces.py
+from prts_ifaces import InterfaceTable
+
+
+class CountingTable(InterfaceTable):
+    rebuilds = 0
+
+    def _rebuild(self):
+        self.rebuilds += 1
+
+
+def test_address_change_rebuilds_before_max_age(tmp_path):
+    fib, inet6 = tmp_path / "fib_trie", tmp_path / "if_inet6"
+    fib.write_text("Main:\n  +-- 0.0.0.0/0 3 0 5\n     |-- 192.168.1.10\n        /32 host LOCAL\n")
+    table = CountingTable(max_age=60.0, addr_tables=(str(fib), str(inet6)))
+    assert table.check(now=0.0)
+    assert not table.check(now=1.0)
+    # DHCP 换了地址：网卡列表不变，但地址表变了
+    fib.write_text("Main:\n  +-- 0.0.0.0/0 3 0 5\n     |-- 192.168.1.42\n        /32 host LOCAL\n")
+    assert table.check(now=2.0)
+    inet6.write_text("fe800000000000000000000000000001 02 40 20 80 eth0\n")
+    assert table.check(now=3.0)
+    assert not table.check(now=4.0)
+    assert table.rebuilds == 3
+    # 地址表不变时仍按 max_age 过期重建
+    assert table.check(now=64.0)
@@ -0,0 +1,119 @@
+# tests/test_parsers.py
+"""/proc/diskstats、mountinfo 与路由表的解析"""
+
+import socket
+
+import numpy as np
+
+import prts_disk
+import prts_mounts
+import prts_rates
+import prts_routes
+from prts_routes import parse_route_v4, parse_route_v6
+
+
+def diskstats_line(name, reads, read_sectors, writes, write_sectors, in_flight, io_ticks, major=8, minor=0):
+    return (f"   {major}       {minor} {name} {reads} 0 {read_sectors} 0 {writes} 0 {write_sectors} 0 "
+            f"{in_flight} {io_ticks} 0 0 0 0 0 0 0\n")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_disk_sampler_rates(tmp_path, monkeypatch):
+    path = tmp_path / "diskstats"
+    monkeypatch.setattr(prts_disk, "DISKSTATS", str(path))
+    monkeypatch.setattr(prts_disk, "_is_whole_disk", lambda name: name in ("sda", "nvme0n1"))
+    clock = FakeClock()
+    monkeypatch.setattr(prts_rates, "time", clock)
+    sampler = prts_disk.DiskIOSampler(procfs=True)
+
+    path.write_text(diskstats_line("sda", 100, 2048, 50, 4096, 0, 1000) +
+                    diskstats_line("sda1", 100, 2048, 50, 4096, 0, 1000, minor=1) +
+                    diskstats_line("nvme0n1", 10, 8, 10, 8, 0, 0, major=259) +
+                    diskstats_line("loop0", 1, 1, 1, 1, 0, 0, major=7))
+    first = sampler()
+    assert set(first["devices"]) == {"sda", "nvme0n1"}
+    assert first["devices"]["sda"]["iops"] == 0.0
+
+    clock.now += 2.0
+    path.write_text(diskstats_line("sda", 300, 2048 + 4096, 150, 4096 + 8192, 4, 1500) +
+                    diskstats_line("nvme0n1", 10, 8, 10, 8, 0, 0, major=259))
+    value = sampler()
+    sda = value["devices"]["sda"]
+    assert sda["iops"] == (200 + 100) / 2
+    assert np.isclose(sda["read_mbps"], 4096 * 512 / 2 / 2 ** 20)
+    assert np.isclose(sda["write_mbps"], 8192 * 512 / 2 / 2 ** 20)
+    assert sda["queue"] == 4
+    assert sda["busy"] == 25.0
+    assert value["dev"] == "sda"
+    assert prts_disk.format_disk_io(value) == "sda R1.0 W2.0MB/s 150IOPS 25% Q4"
+
+
+def test_parse_mountinfo(monkeypatch):
+    monkeypatch.setattr(prts_mounts, "_is_removable", lambda device: device == "/dev/sdb1")
+    text = ("22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw\n"
+            "40 22 8:17 / /media/my\\040usb rw,nosuid shared:30 - vfat /dev/sdb1 rw,uid=1000\n"
+            "41 22 0:50 / /mnt/share rw,relatime shared:31 master:2 - nfs4 server:/export rw,vers=4.2\n"
+            "garbage line without separator\n")
+    root, usb, share = prts_mounts.parse_mountinfo(text)
+    assert root == prts_mounts.Mount("/dev/sda1", "/", "ext4", "rw,relatime", False, False)
+    assert usb.mountpoint == "/media/my usb" and usb.removable and not usb.network
+    assert share.device == "server:/export" and share.network and share.fstype == "nfs4"
+
+
+ROUTE_V4 = (
+    "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+    "wlan0\t00000000\t0100A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0\n"
+    "eth0\t00000000\t0101A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n"
+    "eth0\t0001A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0\n"
+    "tun0\t00000000\t00000000\t0001\t0\t0\t50\t00000000\t0\t0\t0\n"
+    "blk0\t00000000\t00000000\t0201\t0\t0\t1\t00000000\t0\t0\t0\n"
+)
+
+ROUTE_V6 = (
+    "00000000000000000000000000000000 00 00000000000000000000000000000000 00 "
+    "fe800000000000000000000000000001 00000400 00000001 00000000 00000003     eth0\n"
+    "fe800000000000000000000000000000 40 00000000000000000000000000000000 00 "
+    "00000000000000000000000000000000 00000100 00000001 00000000 00000001     eth0\n"
+    "00000000000000000000000000000000 00 00000000000000000000000000000000 00 "
+    "00000000000000000000000000000000 ffffffff 00000001 00000000 00200200       lo\n"
+)
+
+
+def test_parse_route_v4_defaults_by_metric():
+    routes = parse_route_v4(ROUTE_V4)
+    assert [(r.iface, r.gateway, r.metric) for r in routes] == [
+        ("tun0", None, 50), ("eth0", "192.168.1.1", 100), ("wlan0", "192.168.0.1", 600)]
+    assert all(r.family == socket.AF_INET for r in routes)
+
+
+def test_parse_route_v6_skips_reject_and_non_default():
+    routes = parse_route_v6(ROUTE_V6)
+    assert routes == [prts_routes.Route("eth0", "fe80::1", 1024, socket.AF_INET6)]
+
+
+def test_route_table_prefers_ipv4_and_tracks_changes(tmp_path, monkeypatch):
+    v4, v6 = tmp_path / "route", tmp_path / "ipv6_route"
+    v4.write_text(ROUTE_V4)
+    v6.write_text(ROUTE_V6)
+    monkeypatch.setattr(prts_routes, "ROUTE_V4", str(v4))
+    monkeypatch.setattr(prts_routes, "ROUTE_V6", str(v6))
+    clock = FakeClock()
+    monkeypatch.setattr(prts_routes, "time", clock)
+    table = prts_routes.RouteTable(min_interval=2.0)
+    assert table.default().iface == "tun0" and table.generation == 1
+    # 内容不变不算变化；间隔内不重新读取
+    clock.now += 2.0
+    assert not table.check()
+    v4.write_text(ROUTE_V4.splitlines(keepends=True)[0])
+    clock.now += 1.0
+    assert not table.check()
+    clock.now += 1.0
+    assert table.check() and table.generation == 2
+    assert table.default() == prts_routes.Route("eth0", "fe80::1", 1024, socket.AF_INET6)
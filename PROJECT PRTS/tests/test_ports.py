@@ -0,0 +1,178 @@
+# tests/test_ports.py
+import os
+
+import prts_fakes
+import prts_ports
+from prts_ports import ConnCounts, InodeIndex, ListenerHistory, PortOwners, SocketTable, listen_inodes
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+UDP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode ref pointer drops\n"
+
+
+def sock_line(i, port, state, inode, remote="00000000:0000", rx_queue=0, local_ip="00000000"):
+    return (f"{i:4}: {local_ip}:{port:04X} {remote} {state} 00000000:{rx_queue:08X} 00:00000000 00000000"
+            f"  1000        0 {inode} 1 0000000000000000 100 0 0 10 0\n")
+
+
+def write_proc(root, tcp=(), udp=(), tcp6=(), udp6=()):
+    """在 root 下生成 net/{tcp,udp}{,6}"""
+    os.makedirs(root / "net", exist_ok=True)
+    for name, lines, header in (("tcp", tcp, TCP_HEADER), ("tcp6", tcp6, TCP_HEADER),
+                                ("udp", udp, UDP_HEADER), ("udp6", udp6, UDP_HEADER)):
+        (root / "net" / name).write_text(header + "".join(lines), encoding="ascii")
+
+
+def add_process(root, pid, comm, inodes):
+    """/proc/<pid>/comm 与指向 socket:[inode] 的 fd 符号链接"""
+    fd_dir = root / str(pid) / "fd"
+    os.makedirs(fd_dir, exist_ok=True)
+    (root / str(pid) / "comm").write_text(comm + "\n", encoding="utf-8")
+    for fd, inode in enumerate(inodes, 3):
+        os.symlink(f"socket:[{inode}]", fd_dir / str(fd))
+
+
+def remove_process(root, pid):
+    fd_dir = root / str(pid) / "fd"
+    for fd in os.listdir(fd_dir):
+        os.unlink(fd_dir / fd)
+    os.rmdir(fd_dir)
+    os.unlink(root / str(pid) / "comm")
+    os.rmdir(root / str(pid))
+
+
+def test_listen_inodes_keeps_listeners_and_unconnected_udp(tmp_path):
+    write_proc(tmp_path,
+               tcp=[sock_line(0, 8080, "0A", 111), sock_line(1, 8080, "01", 112, remote="0100007F:D431")],
+               udp=[sock_line(0, 53, "07", 221), sock_line(1, 5353, "01", 222)],
+               tcp6=[sock_line(0, 22, "0A", 333, local_ip="00000000000000000000000000000000")])
+    assert listen_inodes(str(tmp_path)) == {111: (8080, "tcp"), 221: (53, "udp"), 333: (22, "tcp")}
+
+
+def test_socket_table_counts_connections_per_listener(tmp_path):
+    write_proc(tmp_path, tcp=[
+        sock_line(0, 8080, "0A", 111, rx_queue=3),
+        sock_line(1, 8080, "01", 0, remote="0100007F:D431"),
+        sock_line(2, 8080, "01", 0, remote="0100007F:D432"),
+        sock_line(3, 8080, "06", 0, remote="0100007F:D433"),
+        sock_line(4, 8080, "08", 0, remote="0100007F:D434"),
+        sock_line(5, 8080, "03", 0, remote="0100007F:D435"),
+        # 出站连接：本地端口不是监听端口，不计入
+        sock_line(6, 40000, "01", 0, remote="0100007F:1F90"),
+    ], udp=[sock_line(0, 53, "07", 221)])
+    table = SocketTable(procfs=True, root=str(tmp_path))
+    assert table.scan() == {(8080, "tcp"), (53, "udp")}
+    assert table.inodes == {111: (8080, "tcp"), 221: (53, "udp")}
+    counts = table.frozen_counts()
+    assert counts(8080) == ConnCounts(established=2, syn_recv=1, time_wait=1, close_wait=1, accept_queue=3)
+    assert counts(40000) is None
+
+    # 下一次扫描原地清零，之前取出的副本不受影响
+    write_proc(tmp_path, tcp=[sock_line(0, 8080, "0A", 111)], udp=[])
+    table.scan()
+    assert table.frozen_counts()(8080) == ConnCounts(0, 0, 0, 0, 0)
+    assert counts(8080).established == 2
+
+
+def test_port_owners_resolve_from_inode_index(tmp_path):
+    write_proc(tmp_path, tcp=[sock_line(0, 8080, "0A", 111)], udp=[sock_line(0, 53, "07", 221)])
+    add_process(tmp_path, 100, "nginx", [111, 999])
+    add_process(tmp_path, 200, "dnsmasq", [221])
+    owners = PortOwners(procfs=True)
+    owners.index = InodeIndex(str(tmp_path))
+    inodes = listen_inodes(str(tmp_path))
+    result = owners.update(inodes.values(), inodes)
+    assert result == {(8080, "tcp"): (100, "nginx"), (53, "udp"): (200, "dnsmasq")}
+
+
+def test_port_owners_psutil_path():
+    providers = prts_fakes.make_providers(listen_ports=[22, 80])
+    with prts_fakes.installed([prts_ports], providers):
+        owners = PortOwners(procfs=False)
+        result = owners.update([(22, "tcp"), (80, "tcp")])
+    assert result == {(22, "tcp"): (100, "proc100"), (80, "tcp"): (101, "proc101")}
+
+
+def test_listener_history_restart_and_flapping():
+    history = ListenerHistory()
+    key = (8080, "tcp")
+    history.update([key], {key: (1, "svc")}, now=0)
+    generation = history.generation
+    for i in range(1, 4):
+        history.update([], now=i * 10)
+        history.update([key], {key: (1 + i, "svc")}, now=i * 10 + 1)
+    record = history.active[key]
+    assert record.restarts == 3
+    assert record.pid == 4
+    assert key in history.flapping
+    assert history.generation > generation
+    # FLAP_WINDOW 之后没有新的重启，不再算频繁重启
+    history.update([key], {key: (4, "svc")}, now=31 + prts_ports.FLAP_WINDOW + 1)
+    assert key not in history.flapping
+
+
+def test_port_owners_follow_a_new_inode_on_the_same_port(tmp_path):
+    write_proc(tmp_path, tcp=[sock_line(0, 5432, "0A", 111)])
+    add_process(tmp_path, 100, "postgres", [111])
+    table_inodes = listen_inodes(str(tmp_path))
+    owners = PortOwners(procfs=True)
+    owners.index = InodeIndex(str(tmp_path))
+    first = owners.update([(5432, "tcp")], table_inodes)
+    assert first == {(5432, "tcp"): (100, "postgres")}
+    assert owners.update([(5432, "tcp")], dict(table_inodes)) is first
+
+    # 服务重启：端口不变，新进程持有新的 inode
+    remove_process(tmp_path, 100)
+    write_proc(tmp_path, tcp=[sock_line(0, 5432, "0A", 222)])
+    add_process(tmp_path, 300, "postgres", [222])
+    assert owners.update([(5432, "tcp")], listen_inodes(str(tmp_path))) == {(5432, "tcp"): (300, "postgres")}
+
+
+def test_history_counts_a_restart_finished_between_two_scans(tmp_path):
+    """两次快照端口相同、inode 不同：重启发生在两次扫描之间，只能从归属PID的变化看出来"""
+    key = (5432, "tcp")
+    owners = PortOwners(procfs=True)
+    owners.index = InodeIndex(str(tmp_path))
+    history = ListenerHistory()
+
+    write_proc(tmp_path, tcp=[sock_line(0, 5432, "0A", 111)])
+    add_process(tmp_path, 100, "postgres", [111])
+    history.update([key], owners.update([key], listen_inodes(str(tmp_path))), now=0)
+    generation = history.generation
+
+    remove_process(tmp_path, 100)
+    write_proc(tmp_path, tcp=[sock_line(0, 5432, "0A", 222)])
+    add_process(tmp_path, 300, "postgres", [222])
+    started, stopped = history.update([key], owners.update([key], listen_inodes(str(tmp_path))), now=5)
+
+    record = history.active[key]
+    assert (record.pid, record.restarts, record.since) == (300, 1, 5)
+    assert started == [key] and stopped == []
+    assert history.generation == generation + 1
+
+
+class CountingScanner(prts_ports.PortScanner):
+    def __init__(self, root):
+        super().__init__(procfs=True, verify_ports=(22, 80))
+        self.sockets = SocketTable(procfs=True, root=root)
+        self.owners.index = InodeIndex(root)
+        self.fallbacks = 0
+
+    def _scan_fallback(self, listening_ports):
+        self.fallbacks += 1
+        listening_ports.add(9999)
+
+
+def test_scanner_uses_fallbacks_only_when_the_table_is_unreadable(tmp_path):
+    write_proc(tmp_path, tcp=[sock_line(0, 8080, "0A", 111)], udp=[sock_line(0, 53, "07", 221)])
+    add_process(tmp_path, 100, "nginx", [111])
+    scanner = CountingScanner(str(tmp_path))
+    scan = scanner()
+    assert scanner.fallbacks == 0
+    assert (scan.tcp, scan.udp) == ({8080}, {53})
+    assert scan.active == [(53, "udp"), (8080, "tcp")]
+    assert scan.owners == {(8080, "tcp"): (100, "nginx")}
+
+    os.unlink(tmp_path / "net" / "tcp")
+    os.unlink(tmp_path / "net" / "tcp6")
+    scan = scanner()
+    assert scanner.fallbacks == 1 and scan.tcp == {9999}
@@ -0,0 +1,26 @@
+# tests/test_portview.py
+from prts_portview import PortEntry, PortListModel
+
+
+def entry(port, proto="tcp", service="", process="", restarts=0):
+    return PortEntry(port, proto, service, process, None, restarts, 0.0, False)
+
+
+def shown(model, pattern):
+    model.set_filter(pattern)
+    return sorted(model.entry(row).port for row in range(model.rowCount()))
+
+
+def test_filter_matches_port_proto_service_process_only():
+    model = PortListModel()
+    model.set_entries([entry(22, service="ssh", process="sshd"), entry(8080, process="java", restarts=9),
+                       entry(53, proto="udp"), entry(7000, restarts=1)])
+    assert shown(model, "80") == [8080]
+    assert shown(model, "udp") == [53]
+    assert shown(model, "SSH") == [22]
+    assert shown(model, "java") == [8080]
+    # 重启次数与未知服务/进程的 "-" 占位只用于显示，不参与过滤
+    assert shown(model, "9") == []
+    assert shown(model, "1") == []
+    assert shown(model, "-") == []
+    assert shown(model, "") == [22, 53, 7000, 8080]
@@ -0,0 +1,36 @@
+# tests/test_procs.py
+import prts_fakes
+import prts_procs
+from prts_procs import ProcessSampler
+
+
+class ReusedProcess(prts_fakes.FakeProcess):
+    """PID 复用：同一 PID 换成了启动时间与名称都不同的新进程"""
+    def name(self):
+        return f"proc{self.pid}-gen{self._owner.generation}"
+
+    def create_time(self):
+        return 1000.0 + self.pid + self._owner.generation
+
+
+class ReusingPsutil(prts_fakes.FakePsutil):
+    generation = 0
+
+    def pids(self):
+        return [1, 2, 3]
+
+    def Process(self, pid):
+        return ReusedProcess(self, pid)
+
+
+def test_psutil_path_rebuilds_entry_when_pid_is_reused():
+    fake = ReusingPsutil(processes=3)
+    sampler = ProcessSampler(top_n=3, procfs=False)
+    with prts_fakes.installed([prts_procs], {"psutil": fake}):
+        sampler()
+        assert {name for _, name, _ in sampler()["mem"]} == {"proc1-gen0", "proc2-gen0", "proc3-gen0"}
+        fake.generation = 1
+        result = sampler()
+    assert {name for _, name, _ in result["mem"]} == {"proc1-gen1", "proc2-gen1", "proc3-gen1"}
+    # 新进程没有上一次的 CPU 时间基准，本次占用记为 0
+    assert all(cpu == 0.0 for _, _, cpu in result["cpu"])
@@ -0,0 +1,54 @@
+# tests/test_scheduler.py
+import pytest
+
+from prts_breakers import OPEN, CircuitOpen
+from prts_diag import Diagnostics
+from prts_probes import BREAKER_BASE, Probe, ProbeRegistry, ProbeScheduler
+
+
+@pytest.fixture
+def scheduler():
+    calls = []
+
+    def collect():
+        calls.append(1)
+        raise OSError("unreachable")
+
+    registry = ProbeRegistry()
+    registry.register(Probe("net", collect, cadence=1000))
+    scheduler = ProbeScheduler(registry, diag=Diagnostics())
+    scheduler.inline = True
+    scheduler.calls = calls
+    yield scheduler
+    scheduler.shutdown()
+
+
+def trip(scheduler):
+    for now in range(3):
+        scheduler.tick(now=now)
+    breaker = scheduler.breaker(scheduler.registry.get("net"))
+    assert breaker.state == OPEN and len(scheduler.calls) == 3
+    return breaker
+
+
+def test_manual_refresh_does_not_bypass_an_open_breaker(scheduler):
+    breaker = trip(scheduler)
+    retry_at = breaker.retry_at
+    scheduler.reschedule(["net"])
+    ok, error = scheduler.tick(now=3)["net"]
+    assert not ok and isinstance(error, CircuitOpen)
+    assert len(scheduler.calls) == 3
+    assert breaker.state == OPEN and breaker.retry_at == retry_at
+
+
+def test_cadence_change_rebases_the_breaker(scheduler):
+    breaker = trip(scheduler)
+    assert breaker.base == BREAKER_BASE
+    scheduler.registry.get("net").cadence = 30000
+    scheduler.reset_breakers(["other"])
+    assert breaker.state == OPEN
+    scheduler.reset_breakers(["net"])
+    assert breaker.base == breaker.backoff == 60 and breaker.failures == 0
+    scheduler.reschedule(["net"])
+    assert scheduler.tick(now=3)["net"][0] is False
+    assert len(scheduler.calls) == 4
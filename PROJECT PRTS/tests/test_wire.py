@@ -0,0 +1,83 @@
+# tests/test_wire.py
+import pytest
+
+from prts_wire import QUANT, SnapshotDecoder, SnapshotEncoder, WireError
+
+
+def snapshots():
+    """值的增删改、指标的增删改与端口变化，覆盖关键帧和差量帧"""
+    values = {"cpu": "12%", "mem": "40%", "ip": "10.0.0.5"}
+    metrics = {"cpu": 12.34, "mem": 40.0, "ping": 15.5}
+    ports = [22, 80, 443]
+    for i in range(12):
+        values = dict(values, cpu=f"{10 + i}%")
+        metrics = dict(metrics, cpu=10.0 + i * 0.37, mem=40.0 - i * 1.005)
+        if i == 3:
+            values["gpu"] = "RTX"
+            metrics["gpu"] = 55.5
+            ports = ports + [8080]
+        if i == 5:
+            del values["ip"]
+            del metrics["ping"]
+            ports = [p for p in ports if p != 80]
+        if i == 7:
+            values = {k: v for k, v in values.items() if k != "gpu"}
+            metrics = {k: v for k, v in metrics.items() if k != "gpu"}
+        yield {"host": "node1", "seq": i + 1, "time": 1.7e9 + i, "values": dict(values),
+               "metrics": dict(metrics), "ports": list(ports)}
+
+
+def test_round_trip_across_keyframes_and_deltas():
+    encoder, decoder = SnapshotEncoder(keyframe_interval=4), SnapshotDecoder()
+    kinds = []
+    for snap in snapshots():
+        frame = encoder.encode(snap)
+        kinds.append(frame[1])
+        out = decoder.decode(frame)
+        assert out["host"] == "node1"
+        assert out["seq"] == snap["seq"]
+        assert out["time"] == pytest.approx(snap["time"])
+        assert out["values"] == snap["values"]
+        assert out["ports"] == sorted(snap["ports"])
+        assert out["metrics"].keys() == snap["metrics"].keys()
+        for k, v in snap["metrics"].items():
+            assert abs(out["metrics"][k] - v) <= 1.0 / QUANT
+    assert kinds == [1, 2, 2, 2, 2, 1, 2, 2, 2, 2, 1, 2]
+
+
+def test_delta_frames_are_smaller_than_keyframes():
+    encoder = SnapshotEncoder()
+    frames = [encoder.encode(s) for s in snapshots()]
+    assert max(map(len, frames[1:])) < len(frames[0])
+
+
+def test_delta_before_keyframe_and_out_of_order_frames():
+    encoder = SnapshotEncoder()
+    frames = [encoder.encode(s) for s in snapshots()]
+    with pytest.raises(WireError):
+        SnapshotDecoder().decode(frames[1])
+    decoder = SnapshotDecoder()
+    decoder.decode(frames[0])
+    with pytest.raises(WireError):
+        decoder.decode(frames[2])
+
+
+def test_truncated_and_unknown_frames():
+    frame = SnapshotEncoder().encode(next(snapshots()))
+    with pytest.raises(WireError):
+        SnapshotDecoder().decode(frame[:len(frame) // 2])
+    with pytest.raises(WireError):
+        SnapshotDecoder().decode(bytes([9]) + frame[1:])
+    with pytest.raises(WireError):
+        SnapshotDecoder().decode(frame[:1] + bytes([7]) + frame[2:])
+
+
+@pytest.mark.parametrize("removal_section", [0, 1])
+def test_out_of_range_removal_is_a_wire_error(removal_section):
+    """删除列表引用不存在的字段序号（损坏或不同步的帧）"""
+    decoder = SnapshotDecoder()
+    decoder.decode(SnapshotEncoder().encode(next(snapshots())))
+    body = [0, 1, 99] if removal_section == 0 else [0, 0, 0, 1, 99]
+    frame = bytes([1, 2, 2, 1, 0] + body + [0, 0])
+    with pytest.raises(WireError):
+        decoder.decode(frame)